@@ -36,12 +36,30 @@ SOFTWARE.
 
 import SerialMonitor.serialMonitorBaseClasses as baseClasses
 import SerialMonitor.commsInterface as commsInterface
+import SerialMonitor.portRegistry as portRegistry
+import SerialMonitor.renderBatcher as renderBatcher
+import SerialMonitor.scrollback as scrollback
+import SerialMonitor.sanitiser as sanitiser
+import SerialMonitor.pollScheduler as pollScheduler
+import SerialMonitor.byteStore as byteStore
+import SerialMonitor.hexDump as hexDump
+import SerialMonitor.searchIndex as searchIndex
+import SerialMonitor.highlighter as highlighter
+import SerialMonitor.timestamps as timestamps
+import SerialMonitor.pipelineStats as pipelineStats
+import SerialMonitor.logWriter as logWriter
+import SerialMonitor.captureFile as captureFile
+import SerialMonitor.rotation as rotation
+import SerialMonitor.captureView as captureView
+import SerialMonitor.replay as replay
 
 import wx, string
-import os, sys, time
+import os, sys, time, threading, re
 import serial
 import glob
-import logging, unicodedata
+import logging
+import logging.handlers
+import queue
 
 # Set the module version consistent with pip freeze. Handle exception if didn't
 # install with pip
@@ -51,6 +69,9 @@ try:
 except:
     __version__ = "unknown_version"
 
+# Capture files to open, also the segments compressed by rotation.
+OPEN_CAPTURE_WILDCARD = "Capture files (*.smcap;*.smcap.gz;*.smcap.xz)|*.smcap;*.smcap.gz;*.smcap.xz"
+
 class pleaseReconnectDialog(wx.Dialog):
     def __init__(self,parent):
         """ Tells the user to reconnect to the serial port for the new connection
@@ -97,6 +118,186 @@ class serialDetailsDialog( baseClasses.serialDetailsDialog ):
             self.byteSizeChoices.append(byteSize)
         self.byteSizeChoice.SetSelection(self.byteSizeChoices.index(currentByteSize))
 
+class scrollbackView(wx.VListBox):
+    def __init__(self, parent, lines):
+        """ Shows the lines held in a scrollback.Scrollback, or the rows of a
+        hexDump.HexDump, which are read the same way. Only the visible
+        lines are ever drawn, so redrawing costs the same however many lines
+        are stored. Selected lines can be copied with Ctrl+C.
+        """
+        wx.VListBox.__init__(self, parent, wx.ID_ANY, style=wx.LB_MULTIPLE|wx.BORDER_NONE)
+        self.lines = lines
+        self.dropped = lines.dropped # Lines dropped from the store when last refreshed.
+        self.SetFont(wx.Font(10, wx.FONTFAMILY_TELETYPE, wx.FONTSTYLE_NORMAL, wx.FONTWEIGHT_NORMAL))
+        self.boldFont = wx.Font(10, wx.FONTFAMILY_TELETYPE, wx.FONTSTYLE_NORMAL, wx.FONTWEIGHT_BOLD)
+        self.lineHeight = self.GetCharHeight() + 2
+        self.stale = False # Whether lines were added but not shown.
+        self.Bind(wx.EVT_KEY_DOWN, self.onKeyDown)
+        self.Bind(wx.EVT_SCROLLWIN, self.onScroll)
+        self.Bind(wx.EVT_MOUSEWHEEL, self.onScroll)
+
+    def OnMeasureItem(self, n):
+        """ All the lines are as high. """
+        return self.lineHeight
+
+    def OnDrawItem(self, dc, rect, n):
+        """ Draw the runs of text of line n one after another. A run's colour
+        is an RGB tuple, or a highlighter.Style, which can be bold, too. """
+        selected = self.IsSelected(n)
+        x = rect.x + 2
+        for text, colour in self.lines[n]:
+            dc.SetFont(self.boldFont if getattr(colour, 'bold', False) else self.GetFont())
+            if selected:
+                dc.SetTextForeground(wx.SystemSettings.GetColour(wx.SYS_COLOUR_HIGHLIGHTTEXT))
+            else:
+                dc.SetTextForeground(wx.Colour(*colour[:3]))
+            dc.DrawText(text, x, rect.y + 1)
+            x += dc.GetTextExtent(text)[0]
+
+    def refreshLines(self, scrollToEnd=True):
+        """ Show the lines added to the store since the last refresh.
+
+        Optional
+        ---------
+            scrollToEnd (bool, default True) - whether to show the newest line.
+        """
+        # Selected indices point at different lines once old ones are dropped.
+        if self.lines.dropped != self.dropped:
+            self.DeselectAll()
+            self.dropped = self.lines.dropped
+
+        self.stale = False
+        self.SetItemCount(len(self.lines))
+        if scrollToEnd and len(self.lines) > 0:
+            self.ScrollToRow(len(self.lines)-1)
+        self.Refresh()
+
+    def isFollowing(self):
+        """ Check if the newest line shown is in view, i.e. the user hasn't
+        scrolled up to read earlier output. """
+        return self.GetVisibleRowsEnd() >= self.GetItemCount()
+
+    def isHidden(self):
+        """ Check if the view can't be seen, e.g. the window is minimised. """
+        return not self.IsShownOnScreen() or self.GetTopLevelParent().IsIconized()
+
+    def linesAdded(self):
+        """ Show the lines added to the store, unless nobody would see them.
+        While the view is hidden or scrolled up, the lines are only marked
+        as not shown, see catchUp. """
+        if self.isHidden() or not self.isFollowing():
+            self.stale = True
+        else:
+            self.refreshLines()
+
+    def catchUp(self):
+        """ Show the newest lines in one go, if any were added while the view
+        was hidden or scrolled up and the user is back at the end of it. """
+        if self and self.stale and not self.isHidden() and self.isFollowing():
+            self.stale = False
+            self.refreshLines()
+
+    def onScroll(self, event):
+        """ Catch up once the user has scrolled back to the end. """
+        event.Skip()
+        wx.CallAfter(self.catchUp) # The view will have scrolled by then.
+
+    def onKeyDown(self, event):
+        """ Copy the selection with Ctrl+C, select everything with Ctrl+A. """
+        if event.ControlDown() and event.GetKeyCode() == ord('C'):
+            self.copySelection()
+        elif event.ControlDown() and event.GetKeyCode() == ord('A'):
+            self.SelectAll()
+        else:
+            event.Skip()
+            wx.CallAfter(self.catchUp) # Might have moved to the end.
+
+    def copySelection(self):
+        """ Put the text of the selected lines in the clipboard. """
+        selectedLines = []
+        item, cookie = self.GetFirstSelected()
+        while item != wx.NOT_FOUND:
+            selectedLines.append(self.lines.getText(item))
+            item, cookie = self.GetNextSelected(cookie)
+        if selectedLines and wx.TheClipboard.Open():
+            wx.TheClipboard.SetData(wx.TextDataObject('\n'.join(selectedLines)))
+            wx.TheClipboard.Close()
+
+class captureViewerFrame(wx.Frame):
+    def __init__(self, parent, path, sanitiser=None, highlighter=None):
+        """ Shows the bytes received in a capture file, read-only, formatted,
+        raw or as a hex dump. The file is memory-mapped and only the visible
+        lines are decoded, so it opens at once however large it is. The lines
+        are counted in the background and appear as they are.
+
+        Raises OSError or ValueError if the file can't be opened as a capture.
+        """
+        self.reader = captureFile.CaptureReader(path)
+        wx.Frame.__init__(self, parent, wx.ID_ANY, u"Capture - {}".format(os.path.basename(path)),
+            size=(800, 600))
+        self.capturedLines = captureView.CaptureLines(self.reader, sanitiser=sanitiser,
+            highlighter=highlighter)
+
+        self.formatRadioBox = wx.RadioBox(self, wx.ID_ANY, u"Output", choices=[u"Formatted", u"Raw", u"Hex"],
+            majorDimension=3, style=wx.RA_SPECIFY_COLS)
+        self.Bind(wx.EVT_RADIOBOX, self.onFormatChosen, self.formatRadioBox)
+        self.linesView = scrollbackView(self, self.capturedLines)
+        self.hexDumpView = scrollbackView(self, hexDump.HexDump(self.reader))
+        self.hexDumpView.Hide()
+        sizer = wx.BoxSizer(wx.VERTICAL)
+        sizer.Add(self.formatRadioBox, 0, wx.EXPAND|wx.ALL, 5)
+        sizer.Add(self.linesView, 1, wx.EXPAND)
+        sizer.Add(self.hexDumpView, 1, wx.EXPAND)
+        self.SetSizer(sizer)
+        self.CreateStatusBar()
+
+        self.linesView.refreshLines(scrollToEnd=False)
+        self.hexDumpView.refreshLines(scrollToEnd=False)
+        self.Bind(wx.EVT_CLOSE, self.onClose)
+        # Show the lines as they're counted and where in the capture the view is.
+        self.statusTimer = wx.Timer(self)
+        self.Bind(wx.EVT_TIMER, self.onUpdateStatus, self.statusTimer)
+        self.capturedLines.start()
+        self.statusTimer.Start(250)
+
+    def onFormatChosen(self, event):
+        """ Show the lines formatted or raw, or the hex dump. """
+        choice = self.formatRadioBox.GetSelection()
+        if choice < 2:
+            self.capturedLines.outputFormat = ['formatted', 'raw'][choice]
+            self.linesView.Refresh()
+        self.linesView.Show(choice < 2)
+        self.hexDumpView.Show(choice == 2)
+        self.Layout()
+
+    def onUpdateStatus(self, event):
+        """ Show the lines counted since the last update, and the size of the
+        capture and the time the first visible byte was received at. """
+        if len(self.capturedLines) != self.linesView.GetItemCount():
+            self.linesView.refreshLines(scrollToEnd=False)
+        if self.hexDumpView.IsShown():
+            offset = self.hexDumpView.GetVisibleRowsBegin()*self.hexDumpView.lines.bytesPerRow
+        elif len(self.capturedLines) > 0:
+            offset = self.capturedLines.lineStart(min(self.linesView.GetVisibleRowsBegin(),
+                len(self.capturedLines)-1))
+        else:
+            offset = 0
+        timestamp = self.reader.timestampAt(offset)
+        status = '{} bytes received, {} lines'.format(self.reader.endOffset, len(self.capturedLines))
+        if self.capturedLines.counted < 1.:
+            status += ' counted so far ({:.0f}%)'.format(100.*self.capturedLines.counted)
+        if timestamp is not None:
+            status += ', received at {}'.format(timestamps.formatTimestamp(timestamp,
+                self.reader.wallClockOffset))
+        self.SetStatusText(status)
+
+    def onClose(self, event):
+        """ Stop counting the lines before unmapping the file. """
+        self.statusTimer.Stop()
+        self.capturedLines.stop()
+        self.reader.close()
+        self.Destroy()
+
 class serialMonitorGuiMainFrame( baseClasses.mainFrame ):
 
     #============================
@@ -115,24 +316,170 @@ class serialMonitorGuiMainFrame( baseClasses.mainFrame ):
 
         # Create a logger for the application.
         self.logger = logging.getLogger("SMLog") # It stands for Serial Monitor, right ;)
-        self.handler = logging.StreamHandler() # Will output to STDERR.
+        self.handler = logWriter.DeferredFlushStreamHandler() # Will output to STDERR.
         self.logger.setLevel(logging.DEBUG) # Collect all levels in the main logger.
-        self.formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+        # Received data are logged with the time they were received at.
+        self.formatter = timestamps.ReceiveTimeFormatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
         self.handler.setFormatter(self.formatter)
         self.handler.setLevel(self.loggingLevel) # Filter logs at the handler level.
                                                 # Logging to file will log everything.
-        self.logger.addHandler(self.handler)
+        # The logger only puts the records in a queue. They're formatted and
+        # written in a background thread, in batches, so that logging every
+        # output doesn't hold up the GUI.
+        self.logQueue = queue.SimpleQueue()
+        self.queueHandler = logging.handlers.QueueHandler(self.logQueue)
+        self.logger.addHandler(self.queueHandler)
+        self.logListener = logWriter.BatchingQueueListener(self.logQueue, self.handler)
+        self.logListener.start()
+        self.fileHandler = None # Writes the log file, if there is one.
+
+        self.logFlushMenuItem = self.fileMenu.Insert(0, wx.ID_ANY, u"Log flush interval...")
+        self.Bind(wx.EVT_MENU, self.onSetLogFlushInterval, id=self.logFlushMenuItem.GetId())
+
+        # The raw bytes sent and received can be captured to a binary file.
+        self.captureWriter = None
+        self.capturePortId = 0 # Id of the current port in the capture file.
+        self.captureMenuItem = self.fileMenu.InsertCheckItem(0, wx.ID_ANY, u"Capture to file...")
+        self.openCaptureMenuItem = self.fileMenu.Insert(0, wx.ID_ANY, u"Open capture...")
+        self.Bind(wx.EVT_MENU, self.onOpenCapture, id=self.openCaptureMenuItem.GetId())
+        self.Bind(wx.EVT_MENU, self.onToggleCapture, id=self.captureMenuItem.GetId())
+        self.captureFlushTimer = wx.Timer(self)
+        self.Bind(wx.EVT_TIMER, lambda event: self.captureWriter.flush(), self.captureFlushTimer)
+
+        # Log and capture files can be split into segments by size and age.
+        # Closed segments are compressed and old ones deleted in the background.
+        self.segmentCompressor = rotation.SegmentCompressor()
+        self.segmentCompressor.start()
+        self.rotationSettings = dict(rotation.DEFAULT_SETTINGS) # Keyword arguments of the Rotators.
+        self.rotationSettingsMenuItem = self.fileMenu.Insert(0, wx.ID_ANY, u"Rotation settings...")
+        self.Bind(wx.EVT_MENU, self.onEditRotationSettings, id=self.rotationSettingsMenuItem.GetId())
+        self.rotateFilesMenuItem = self.fileMenu.InsertCheckItem(0, wx.ID_ANY,
+            u"Rotate log and capture files")
 
         # serial communication
         self.portOpen = False # indicates if the serial communication port is open
         self.currentPort = 'None' # currently chosen port
         self.currentSerialConnection = 0 # holds the serial connection object once it has been initialised
-        self.serialOutputBuffer = '' # buffer for storing inbound data if it arrives in chunks
+        self.serialOutputFramer = commsInterface.LineFramer() # holds inbound data if it arrives in chunks
+        self.portReader = None # reads the port in a background thread, if enabled
+
+        # Only keep the most recent output and only draw the visible part of it,
+        # so that long sessions don't use ever more memory. The view takes the
+        # place of the generated text control.
+        self.scrollback = scrollback.Scrollback(maxLines=100000)
+        self.outputView = scrollbackView(self, self.scrollback)
+        self.logFileTextControl.GetContainingSizer().Replace(self.logFileTextControl, self.outputView)
+        self.logFileTextControl.Destroy()
+        del self.logFileTextControl
+
+        # The raw bytes are kept, too, and shown as a hex dump in place of the
+        # text when hex output is chosen. Only the visible rows are formatted.
+        self.byteStore = byteStore.ByteStore()
+        self.hexDumpView = scrollbackView(self, hexDump.HexDump(self.byteStore))
+        outputSizer = self.outputView.GetContainingSizer()
+        for i, item in enumerate(outputSizer.GetChildren()):
+            if item.GetWindow() is self.outputView:
+                outputSizer.Insert(i+1, self.hexDumpView, item.GetProportion(),
+                    item.GetFlag(), item.GetBorder())
+                break
+        self.hexDumpView.Hide()
+        self.hexOutputCheckbox.Bind(wx.EVT_CHECKBOX, self.onHexOutputTicked)
+
+        # Statistics of the data flowing through, always counted and shown
+        # under the output once a second if the user wants to see them.
+        self.pipelineStats = pipelineStats.PipelineStats()
+        self.statsText = wx.StaticText(self, wx.ID_ANY, u"")
+        self.statsText.SetFont(wx.Font(9, wx.FONTFAMILY_TELETYPE, wx.FONTSTYLE_NORMAL, wx.FONTWEIGHT_NORMAL))
+        outputSizer.Insert(i+2, self.statsText, 0, wx.ALL|wx.EXPAND, 5) # Under the hex dump.
+        self.statsText.Hide()
+        self.statsTimer = wx.Timer(self)
+        self.Bind(wx.EVT_TIMER, self.onUpdateStats, self.statsTimer)
+
+        # The views aren't updated while minimised, catch up when restored.
+        self.Bind(wx.EVT_ICONIZE, self.onIconize)
+
+        self.viewMenu = wx.Menu()
+        self.scrollbackLinesMenuItem = self.viewMenu.Append(wx.ID_ANY, u"Scrollback limit (lines)...")
+        self.Bind(wx.EVT_MENU, self.onSetScrollbackLines, id=self.scrollbackLinesMenuItem.GetId())
+        self.scrollbackCharsMenuItem = self.viewMenu.Append(wx.ID_ANY, u"Scrollback limit (characters)...")
+        self.Bind(wx.EVT_MENU, self.onSetScrollbackChars, id=self.scrollbackCharsMenuItem.GetId())
+        self.hexDumpLimitMenuItem = self.viewMenu.Append(wx.ID_ANY, u"Hex dump limit (MiB)...")
+        self.Bind(wx.EVT_MENU, self.onSetHexDumpLimit, id=self.hexDumpLimitMenuItem.GetId())
+        self.viewMenu.AppendSeparator()
+        self.escapeControlMenuItem = self.viewMenu.AppendCheckItem(wx.ID_ANY,
+            u"Escape control characters")
+        self.Bind(wx.EVT_MENU, self.onChangeSanitiser, id=self.escapeControlMenuItem.GetId())
+        self.keepTabsMenuItem = self.viewMenu.AppendCheckItem(wx.ID_ANY,
+            u"Keep tabs and carriage returns")
+        self.Bind(wx.EVT_MENU, self.onChangeSanitiser, id=self.keepTabsMenuItem.GetId())
+        self.viewMenu.AppendSeparator()
+        self.showTimestampsMenuItem = self.viewMenu.AppendCheckItem(wx.ID_ANY,
+            u"Show receive times")
+        self.outputAtLineStart = True # Whether the next output starts a new line.
+        self.highlightingMenuItem = self.viewMenu.Append(wx.ID_ANY, u"Highlighting rules...")
+        self.Bind(wx.EVT_MENU, self.onEditHighlighting, id=self.highlightingMenuItem.GetId())
+        self.viewMenu.AppendSeparator()
+        self.showStatsMenuItem = self.viewMenu.AppendCheckItem(wx.ID_ANY, u"Show statistics")
+        self.Bind(wx.EVT_MENU, self.onToggleStats, id=self.showStatsMenuItem.GetId())
+        self.resetStatsMenuItem = self.viewMenu.Append(wx.ID_ANY, u"Reset statistics")
+        self.Bind(wx.EVT_MENU, lambda event: self.pipelineStats.reset(), id=self.resetStatsMenuItem.GetId())
+        self.m_menubar1.Append(self.viewMenu, u"View")
+
+        # Find text in the scrollback. The index is kept up to date as lines
+        # arrive and searched in a background thread.
+        self.searchIndex = searchIndex.SearchIndex()
+        self.searchGeneration = 0 # Counts the searches, to ignore outdated results.
+        self.searchQuery = ''
+        self.searchMatches = [] # (lineNumber, column, length) of the last search.
+        self.searchMatch = -1 # Index of the match shown.
+        self.searchMenu = wx.Menu()
+        self.findMenuItem = self.searchMenu.Append(wx.ID_ANY, u"Find...\tCtrl+F")
+        self.Bind(wx.EVT_MENU, lambda event: self.onFind(event, regex=False), id=self.findMenuItem.GetId())
+        self.findRegexMenuItem = self.searchMenu.Append(wx.ID_ANY, u"Find regular expression...\tCtrl+Shift+F")
+        self.Bind(wx.EVT_MENU, lambda event: self.onFind(event, regex=True), id=self.findRegexMenuItem.GetId())
+        self.findNextMenuItem = self.searchMenu.Append(wx.ID_ANY, u"Find next\tF3")
+        self.Bind(wx.EVT_MENU, lambda event: self.onFindNext(event, step=1), id=self.findNextMenuItem.GetId())
+        self.findPreviousMenuItem = self.searchMenu.Append(wx.ID_ANY, u"Find previous\tShift+F3")
+        self.Bind(wx.EVT_MENU, lambda event: self.onFindNext(event, step=-1), id=self.findPreviousMenuItem.GetId())
+        self.searchMenu.AppendSeparator()
+        self.matchCaseMenuItem = self.searchMenu.AppendCheckItem(wx.ID_ANY, u"Match case")
+        self.m_menubar1.Append(self.searchMenu, u"Search")
+        self.CreateStatusBar()
+
+        # Colours the received text according to the user's rules.
+        self.highlighter = highlighter.Highlighter()
+
+        # Replaces control characters in the output, see onChangeSanitiser.
+        self.sanitiser = None
+        self.onChangeSanitiser(None)
+
+        # Text to be shown in the text box is rendered in batches, at most
+        # 30 times a second, so that fast devices don't freeze the GUI.
+        self.renderBatcher = renderBatcher.RenderBatcher(self.renderToTextBox,
+            lambda delay, callback: wx.CallLater(max(1, int(1000*delay)), callback))
 
         # set default values
         self.readDelay = int(self.readDelayTxtCtrl.GetValue())
         self.BaudRate = int(self.baudRateTxtCtrl.GetValue())
 
+        # The read delay is the longest one, the timer reads the port more often
+        # when data are flowing. Put the shortest delay under the longest one.
+        self.readDelayText.SetLabel(u"Max read delay [ms]")
+        self.minReadDelayText = wx.StaticText(self.m_panel1, wx.ID_ANY, u"Min read delay [ms]")
+        self.minReadDelayTxtCtrl = wx.TextCtrl(self.m_panel1, wx.ID_ANY, u"10",
+            style=wx.TE_PROCESS_ENTER)
+        readDelaySizer = self.readDelayTxtCtrl.GetContainingSizer()
+        for i, item in enumerate(readDelaySizer.GetChildren()):
+            if item.GetWindow() is self.readDelayTxtCtrl:
+                readDelaySizer.Insert(i+1, self.minReadDelayText, 0, wx.ALL|wx.EXPAND, 5)
+                readDelaySizer.Insert(i+2, self.minReadDelayTxtCtrl, 0, wx.ALL|wx.EXPAND, 5)
+                break
+        self.minReadDelayTxtCtrl.Bind(wx.EVT_KILL_FOCUS, self.onUpdateReadDelay)
+        self.minReadDelayTxtCtrl.Bind(wx.EVT_TEXT_ENTER, self.onUpdateReadDelay)
+        self.minReadDelay = int(self.minReadDelayTxtCtrl.GetValue())
+        self.pollScheduler = pollScheduler.PollScheduler(self.minReadDelay, self.readDelay,
+            baudRate=self.BaudRate)
+
         # No raw output so hexOutputCheckbox checkbox won't change anything.
         # Disable it not to confuse the users.
         self.hexOutputCheckbox.Enable(False)
@@ -142,10 +489,40 @@ class serialMonitorGuiMainFrame( baseClasses.mainFrame ):
         self.currentParity = serial.PARITY_NONE
         self.currentByteSize = serial.EIGHTBITS
 
+        # Read the port in a background thread by default. The timer, which
+        # reads the port on the GUI thread, is only used if this gets disabled.
+        self.readInThreadMenuItem = self.serialMenu.AppendCheckItem(wx.ID_ANY,
+            u"Read port in background thread")
+        self.readInThreadMenuItem.Check(True)
+        self.Bind(wx.EVT_MENU, self.onToggleReadInThread, id=self.readInThreadMenuItem.GetId())
+
+        # Adapt the read delay to the data when reading with the timer.
+        self.adaptiveReadDelayMenuItem = self.serialMenu.AppendCheckItem(wx.ID_ANY,
+            u"Adapt read delay to the data")
+        self.adaptiveReadDelayMenuItem.Check(True)
+        self.Bind(wx.EVT_MENU, self.onToggleAdaptiveReadDelay, id=self.adaptiveReadDelayMenuItem.GetId())
+
+        # A capture can be replayed into the monitor, through a pseudo-terminal
+        # where available, as if it came from the device that sent it.
+        self.replayer = None
+        self.replayPort = None # PtyPort the capture is replayed through, if any.
+        self.replayConnection = None # serial.Serial the monitor reads the replay with.
+        self.replayMenuItem = self.serialMenu.AppendCheckItem(wx.ID_ANY, u"Replay capture...")
+        self.Bind(wx.EVT_MENU, self.onToggleReplay, id=self.replayMenuItem.GetId())
+
         # initialise the timing function for receiving the data from the serial port at a specific interval
-        self.parseOutputsTimer.Start(int(self.readDelay))
+        if not self.readInThreadMenuItem.IsChecked():
+            self.startParseOutputsTimer()
 
         # update the ports available at start-up
+        self.portsUpdate = 0 # Counts the port updates, to ignore outdated results.
+        self.pendingPortSelection = 'None' # Port to select again once it's found.
+        # Where available, keep a cache of the ports up to date in the background.
+        self.portRegistry = None
+        if portRegistry.haveSysfs():
+            self.portRegistry = portRegistry.PortRegistry(
+                onChange=lambda: wx.CallAfter(self.onPortsChanged))
+            self.portRegistry.start()
         self.updatePorts(suppressWarn=True)
         self.portChoice.SetSelection(0)
 
@@ -158,10 +535,32 @@ class serialMonitorGuiMainFrame( baseClasses.mainFrame ):
     def onClose(self, event):
         """ close the serial port before terminating, need to make sure it isn't left hanging """
         if self.portOpen:
+            self.stopReader()
             self.currentSerialConnection.close()
             self.logger.info('Disconnected from port before shutdown.')
+        self.stopReplay()
+        if self.portRegistry is not None:
+            self.portRegistry.stop()
+        self.statsTimer.Stop()
+        if self.captureWriter is not None:
+            self.captureFlushTimer.Stop()
+            self.captureWriter.close()
+        # Write all the records that are still waiting and close the log file.
+        self.logger.removeHandler(self.queueHandler)
+        self.logListener.stop()
+        if self.fileHandler is not None:
+            self.logListener.removeHandler(self.fileHandler)
+        # Finish compressing the segments that have just been closed.
+        self.segmentCompressor.stop()
         self.Destroy()
 
+    def onIconize(self, event):
+        """ Show the output that arrived while the window was minimised. """
+        event.Skip()
+        if not event.IsIconized():
+            wx.CallAfter(self.outputView.catchUp)
+            wx.CallAfter(self.hexDumpView.catchUp)
+
     def onSendInput(self, event):
         """ pass the message from the txtControl to the message parsing method that
         links with the comms protocol. """
@@ -178,6 +577,7 @@ class serialMonitorGuiMainFrame( baseClasses.mainFrame ):
                 if self.portChoice.GetStringSelection() != self.currentPort:
                     # close any open ports if present
                     if self.portOpen:
+                        self.stopReader()
                         self.currentSerialConnection.close()
 
                     self.currentSerialConnection = serial.Serial(port=self.portChoice.GetStringSelection(),
@@ -192,6 +592,9 @@ class serialMonitorGuiMainFrame( baseClasses.mainFrame ):
                         self.portOpen = True
                         self.currentPort = self.portChoice.GetStringSelection()
                         self.logger.info('Connected to port {}'.format(self.currentPort))
+                        if self.captureWriter is not None:
+                            self.capturePortId = self.captureWriter.addPort(self.currentPort)
+                        self.startReader()
                         # To verify the setting of the serial connection details.
                         self.logger.debug('baud={},stop bits={},parity={},byte size={}'.format(
                             self.currentSerialConnection.baudrate,
@@ -222,6 +625,94 @@ class serialMonitorGuiMainFrame( baseClasses.mainFrame ):
         else:
             self.disconnect()
 
+    def onToggleReplay(self, event):
+        """ Replay the bytes received in a capture file into the monitor, at
+        the speed the user chooses, or stop replaying. """
+        if not self.replayMenuItem.IsChecked():
+            self.stopReplay()
+            self.logger.info('Stopped replaying.')
+            return
+        self.replayMenuItem.Check(False) # Until the replay has started.
+        fileDialog = wx.FileDialog(self, "Replay capture file", os.getcwd(), "",
+            OPEN_CAPTURE_WILDCARD, wx.FD_OPEN|wx.FD_FILE_MUST_EXIST)
+        if fileDialog.ShowModal() != wx.ID_OK:
+            return
+        speedDialog = wx.TextEntryDialog(self, 'How many times faster than recorded to replay,\n'
+            'e.g. 1 for the original timing, or 0 for as fast as possible:', 'Replay speed', '1')
+        if speedDialog.ShowModal() != wx.ID_OK:
+            return
+        try:
+            speed = float(speedDialog.GetValue())
+            if speed < 0:
+                raise ValueError('The speed can\'t be negative.')
+        except ValueError as err:
+            wx.MessageBox(str(err), 'Invalid replay speed', wx.OK | wx.ICON_WARNING)
+            return
+
+        self.stopReplay()
+        self.disconnect()
+        reader = None
+        try:
+            reader = captureFile.CaptureReader(fileDialog.GetPath())
+            try:
+                self.replayPort = replay.PtyPort()
+                url = self.replayPort.name
+            except OSError: # No pseudo-terminals, e.g. on Windows.
+                url = 'loop://'
+            self.currentSerialConnection = serial.serial_for_url(url, baudrate=self.BaudRate, timeout=2,
+                stopbits=self.currentStopBits, parity=self.currentParity, bytesize=self.currentByteSize)
+            self.replayConnection = self.currentSerialConnection
+        except (OSError, ValueError, serial.SerialException) as err:
+            if reader is not None:
+                reader.close()
+            self.stopReplay()
+            self.logger.error('Could not replay the capture: {}'.format(err))
+            wx.MessageBox(str(err), 'Could not replay the capture', wx.OK | wx.ICON_ERROR)
+            return
+
+        self.portOpen = True
+        self.currentPort = url
+        if self.captureWriter is not None:
+            self.capturePortId = self.captureWriter.addPort(self.currentPort)
+        self.startReader()
+        replayer = replay.CaptureReplayer(reader, self.replayPort or self.currentSerialConnection,
+            speed or None, onFinished=lambda: wx.CallAfter(self.onReplayFinished, replayer))
+        self.replayer = replayer
+        self.replayer.start()
+        self.replayMenuItem.Check(True)
+        self.logger.info('Replaying {} through {} at {}.'.format(fileDialog.GetPath(), url,
+            '{:g}x speed'.format(speed) if speed else 'full speed'))
+
+    def onReplayFinished(self, replayer):
+        """ Report how the replay went. The port stays open until the user
+        disconnects, so that the monitor reads everything that was replayed. """
+        if replayer is not self.replayer: # Stopped by the user, or an earlier replay.
+            return
+        self.replayMenuItem.Check(False)
+        self.logger.info('Replayed {} chunks, {} bytes, at most {:.1f} ms late.'.format(
+            self.replayer.chunksReplayed, self.replayer.bytesReplayed, self.replayer.maxLag/1e6))
+        if self.replayer.error is not None:
+            self.logger.error('Replay stopped by: {}'.format(self.replayer.error))
+
+    def stopReplay(self):
+        """ Stop replaying, disconnect from the replay port and close it. """
+        if self.replayer is not None:
+            replayer = self.replayer
+            self.replayer = None
+            replayer.stop(wait=False)
+            if self.replayPort is not None:
+                self.replayPort.cancelWrite() # Don't wait for the monitor to read it.
+            replayer.join(1.) # A write to a full loop:// can't be cancelled, give up on it.
+            replayer.reader.close()
+        # The port name may have been reset since by updating the ports, the
+        # connection is still the replay's until the user disconnects.
+        if self.portOpen and self.currentSerialConnection is self.replayConnection:
+            self.disconnect()
+        self.replayConnection = None
+        if self.replayPort is not None:
+            self.replayPort.close()
+            self.replayPort = None
+
     def onUpdatePorts(self, event):
         """ call the update ports method - need a wrapper to be able to call it during initialisation """
         self.logger.debug('Attempting to update avaialble ports.')
@@ -235,6 +726,14 @@ class serialMonitorGuiMainFrame( baseClasses.mainFrame ):
     def onParseOutputs(self, event):
         """ Get information from the data received via the serial port, if there is anything available """
         self.parseOutputs()
+        # The timer only fires once, so that every delay can be different.
+        if not self.readInThreadMenuItem.IsChecked():
+            self.startParseOutputsTimer()
+
+    def startParseOutputsTimer(self):
+        """ Schedule the next read of the port, after the delay chosen by
+        the poll scheduler. """
+        self.parseOutputsTimer.Start(self.pollScheduler.delay, wx.TIMER_ONE_SHOT)
 
     def onUpdateBaudRate(self, event):
         """ Update the Baud rate but do not restart the connection; the change will take effect
@@ -246,6 +745,7 @@ class serialMonitorGuiMainFrame( baseClasses.mainFrame ):
         try:
             newValue = int(self.baudRateTxtCtrl.GetValue())
             self.BaudRate = newValue
+            self.pollScheduler.baudRate = newValue
             self.notifyToReconnect() # Some people are confused about how this works.
         except ValueError as ve:
             self.baudRateTxtCtrl.SetValue("{:d}".format(self.BaudRate))
@@ -259,17 +759,170 @@ class serialMonitorGuiMainFrame( baseClasses.mainFrame ):
         self.logger.debug('Attempting to update read delay.')
         try:
             newValue = int(self.readDelayTxtCtrl.GetValue())
+            newMinValue = int(self.minReadDelayTxtCtrl.GetValue())
+            self.pollScheduler.setBounds(newMinValue, newValue)
             self.readDelay = newValue
-            self.parseOutputsTimer.Start(int(self.readDelay))
-            self.logger.info('Changed read delay to {} ms.'.format(self.readDelay))
+            self.minReadDelay = newMinValue
+            if not self.readInThreadMenuItem.IsChecked():
+                self.startParseOutputsTimer()
+            self.logger.info('Changed read delay to {}-{} ms.'.format(self.minReadDelay, self.readDelay))
         except ValueError as ve:
             self.readDelayTxtCtrl.SetValue("{:d}".format(self.readDelay))
+            self.minReadDelayTxtCtrl.SetValue("{:d}".format(self.minReadDelay))
             self.logger.error('ValueError while updating read delay: {}'.format(ve))
 
     def onClearConsole(self, event):
         """ Clear the output/input console """
         self.logger.debug('Console cleared.')
-        self.logFileTextControl.Clear()
+        self.renderBatcher.clear()
+        self.scrollback.clear()
+        self.outputAtLineStart = True
+        self.searchIndex.clear()
+        self.searchMatches = []
+        self.outputView.refreshLines()
+        self.byteStore.clear()
+        self.hexDumpView.refreshLines()
+
+    def onSetScrollbackLines(self, event):
+        """ Ask the user how many lines of output to keep. """
+        maxLines = wx.GetNumberFromUser('Number of most recent lines to keep in the output window.',
+            'Lines:', 'Scrollback limit', self.scrollback.maxLines, 1, 10000000, self)
+        if maxLines > 0:
+            self.scrollback.setLimits(maxLines, self.scrollback.maxChars)
+            self.outputView.refreshLines()
+            self.logger.info('Changed scrollback limit to {} lines.'.format(maxLines))
+
+    def onSetScrollbackChars(self, event):
+        """ Ask the user how many characters of output to keep. """
+        maxChars = wx.GetNumberFromUser('Number of most recent characters to keep in the output window,\n'
+            '0 for no limit other than the number of lines.', 'Characters:', 'Scrollback limit',
+            self.scrollback.maxChars or 0, 0, 2**31-1, self)
+        if maxChars >= 0:
+            self.scrollback.setLimits(self.scrollback.maxLines, maxChars or None)
+            self.outputView.refreshLines()
+            self.logger.info('Changed scrollback limit to {} characters.'.format(maxChars or 'unlimited'))
+
+    def onSetHexDumpLimit(self, event):
+        """ Ask the user how many of the received bytes to keep. """
+        maxMiB = wx.GetNumberFromUser('Number of most recent MiB of received bytes to keep for the hex dump.\n'
+            'They are kept in memory in every output format.',
+            'MiB:', 'Hex dump limit', self.byteStore.maxBytes//2**20, 1, 65536, self)
+        if maxMiB > 0:
+            self.byteStore.setLimits(maxMiB*2**20, self.byteStore.dropBlock)
+            self.hexDumpView.refreshLines()
+            self.logger.info('Changed hex dump limit to {} MiB.'.format(maxMiB))
+
+    def onFind(self, event, regex=False):
+        """ Ask the user what to find and search the scrollback for it in a
+        background thread. """
+        kind = 'Regular expression' if regex else 'Text'
+        dialog = wx.TextEntryDialog(self, '{} to find in the output:'.format(kind), 'Find', self.searchQuery)
+        if dialog.ShowModal() != wx.ID_OK or not dialog.GetValue():
+            return
+        self.searchQuery = dialog.GetValue()
+        self.searchGeneration += 1
+        # Include the last line, even if it hasn't been completed yet.
+        lastLine = None
+        if self.scrollback.lineOpen and len(self.scrollback) > 0:
+            lastLine = self.scrollback.getText(-1)
+        self.SetStatusText('Searching for {!r}...'.format(self.searchQuery))
+        threading.Thread(target=self.runSearch, name='Search', daemon=True,
+            args=(self.searchGeneration, self.searchQuery, regex,
+                self.matchCaseMenuItem.IsChecked(), lastLine)).start()
+
+    def runSearch(self, generation, query, regex, matchCase, lastLine):
+        """ Search the index and pass the matches to the GUI thread. Runs in
+        a background thread started by onFind. """
+        try:
+            matches = self.searchIndex.search(query, regex, matchCase, lastLine)
+            wx.CallAfter(self.finishSearch, generation, matches)
+        except re.error as reError:
+            wx.CallAfter(self.finishSearch, generation, [], reError)
+
+    def finishSearch(self, generation, matches, error=None):
+        """ Show the first match at or below the top of the view. """
+        if not self or generation != self.searchGeneration:
+            return # Frame closed or a newer search started.
+
+        self.searchMatches = matches
+        self.searchMatch = -1
+        if error is not None:
+            self.SetStatusText('Invalid regular expression: {}'.format(error))
+            self.logger.error('Invalid regular expression {!r}: {}'.format(self.searchQuery, error))
+        elif not matches:
+            self.SetStatusText('No matches for {!r}.'.format(self.searchQuery))
+        else:
+            topLine = self.scrollback.dropped + self.outputView.GetVisibleRowsBegin()
+            self.searchMatch = next((i for i, match in enumerate(matches) if match[0] >= topLine), 0)
+            self.showSearchMatch()
+
+    def onFindNext(self, event, step=1):
+        """ Show the next (step=1) or the previous (step=-1) match, or ask
+        what to find if there are none. """
+        if not self.searchMatches:
+            self.onFind(event)
+        else:
+            self.searchMatch = (self.searchMatch + step) % len(self.searchMatches)
+            self.showSearchMatch()
+
+    def showSearchMatch(self):
+        """ Select and scroll to the line of the current match. """
+        lineNumber, column, length = self.searchMatches[self.searchMatch]
+        index = lineNumber - self.scrollback.dropped
+        if index < 0:
+            self.SetStatusText('Match {} of {} for {!r} has been dropped from the scrollback.'.format(
+                self.searchMatch+1, len(self.searchMatches), self.searchQuery))
+            return
+        self.outputView.refreshLines(scrollToEnd=False)
+        self.outputView.DeselectAll()
+        self.outputView.Select(index)
+        self.outputView.ScrollToRow(max(index - 2, 0))
+        self.SetStatusText('Match {} of {} for {!r}, line {} column {}.'.format(
+            self.searchMatch+1, len(self.searchMatches), self.searchQuery, index+1, column+1))
+
+    def onEditHighlighting(self, event):
+        """ Let the user edit the rules that colour the received text. """
+        dialog = wx.TextEntryDialog(self, 'One rule per line: #rrggbb[,bold][,line] regex, e.g.\n'
+            '#ff0000,bold ERROR\n#808080,line ^heartbeat\n'
+            'With line, the whole line is coloured. Earlier rules take precedence.',
+            'Highlighting rules', highlighter.formatRules(self.highlighter.rules),
+            style=wx.TE_MULTILINE|wx.OK|wx.CANCEL)
+        if dialog.ShowModal() != wx.ID_OK:
+            return
+        try:
+            self.highlighter = highlighter.Highlighter(highlighter.parseRules(dialog.GetValue()))
+            self.logger.info('Using {} highlighting rules.'.format(len(self.highlighter.rules)))
+        except (ValueError, re.error) as error:
+            self.logger.error('Invalid highlighting rules: {}'.format(error))
+            wx.MessageBox(str(error), 'Invalid highlighting rules', wx.OK | wx.ICON_WARNING)
+
+    def onToggleStats(self, event):
+        """ Show or hide the statistics under the output. """
+        if self.showStatsMenuItem.IsChecked():
+            self.onUpdateStats(None)
+            self.statsText.Show()
+            self.statsTimer.Start(1000)
+        else:
+            self.statsTimer.Stop()
+            self.statsText.Hide()
+        self.Layout()
+
+    def onUpdateStats(self, event):
+        """ Show the statistics gathered since the last update. """
+        snapshot = self.pipelineStats.snapshot()
+        self.statsText.SetLabel(pipelineStats.describe(snapshot))
+        self.logger.debug('Statistics: {}'.format(snapshot))
+
+    def onChangeSanitiser(self, event):
+        """ Choose how to deal with the control characters in the output,
+        according to the View menu. Line ends are always kept, so that the
+        output is split into lines. """
+        keep = '\n'
+        if self.keepTabsMenuItem.IsChecked():
+            keep += '\t\r'
+        policy = 'escape' if self.escapeControlMenuItem.IsChecked() else 'replace'
+        self.sanitiser = sanitiser.Sanitiser(policy, keep)
+        self.logger.debug('Control characters: {}, keeping {!r}.'.format(policy, keep))
 
     def onToggleLogFile(self, event):
         """ Open a log file if none is active, or close the existing one. """
@@ -282,20 +935,95 @@ class serialMonitorGuiMainFrame( baseClasses.mainFrame ):
                                          wx.FD_SAVE|wx.FD_OVERWRITE_PROMPT)
             fileDialog.ShowModal() # Wait for response.
             self.fileLoggerName = fileDialog.GetPath() # User-chosen log file.
-            fileHandler = logging.FileHandler(self.fileLoggerName)
-            fileHandler.setFormatter(self.formatter) # Default log formatter.
-            self.logger.addHandler(fileHandler) # Already logs to STDERR, now also the file.
+            if self.rotateFilesMenuItem.IsChecked():
+                self.fileHandler = rotation.RotatingLogFileHandler(self.makeRotator(self.fileLoggerName))
+                self.logger.info('Logging to segments of {}.'.format(self.fileLoggerName))
+            else:
+                self.fileHandler = logWriter.DeferredFlushFileHandler(self.fileLoggerName)
+            self.fileHandler.setFormatter(self.formatter) # Default log formatter.
+            self.logListener.addHandler(self.fileHandler) # Already logs to STDERR, now also the file.
         else:
             dlg=wx.MessageDialog(self, "Stop logging?", "Stop", wx.YES_NO|wx.ICON_QUESTION)
             if dlg.ShowModal() == wx.ID_YES: # Avoid accidental log termination.
-                # Remove the file handler from the logger.
-                for hdlr in self.logger.handlers:
-                    if isinstance(hdlr, logging.FileHandler): # Only one file handler foreseen.
-                        self.logger.removeHandler(hdlr)
+                # Stop writing to the file and close it.
+                self.logListener.removeHandler(self.fileHandler)
+                self.fileHandler = None
                 self.fileLoggerName = None # Reset.
             else: # The checkbox should still be checked if we don't stop logging.
                 self.fileLogCheckbox.SetValue(True)
 
+    def onSetLogFlushInterval(self, event):
+        """ Ask the user how often to flush the log to the terminal and the file. """
+        interval = wx.GetNumberFromUser('Longest time the log can wait to be written to the disk.',
+            'Milliseconds:', 'Log flush interval', int(1000*self.logListener.flushInterval),
+            int(1000*logWriter.MIN_FLUSH_INTERVAL), 60000, self)
+        if interval >= 0:
+            self.logListener.flushInterval = interval/1000.
+            self.logger.info('Changed log flush interval to {} ms.'.format(interval))
+
+    def onOpenCapture(self, event):
+        """ Show a capture file in a window of its own. """
+        fileDialog = wx.FileDialog(self, "Open capture file", os.getcwd(), "",
+            OPEN_CAPTURE_WILDCARD, wx.FD_OPEN|wx.FD_FILE_MUST_EXIST)
+        if fileDialog.ShowModal() != wx.ID_OK:
+            return
+        try:
+            captureViewerFrame(self, fileDialog.GetPath(), self.sanitiser, self.highlighter).Show()
+            self.logger.info('Opened capture {}.'.format(fileDialog.GetPath()))
+        except (OSError, ValueError) as err:
+            self.logger.error('Could not open capture file: {}'.format(err))
+            wx.MessageBox(str(err), 'Could not open capture file', wx.OK | wx.ICON_ERROR)
+
+    def onToggleCapture(self, event):
+        """ Start capturing the raw bytes to a file, or stop. """
+        if self.captureMenuItem.IsChecked():
+            fileDialog = wx.FileDialog(self, "Choose capture file", os.getcwd(),
+                time.strftime("%Y%m%d%H%M%S_SM.smcap"), "Capture files (*.smcap)|*.smcap",
+                wx.FD_SAVE|wx.FD_OVERWRITE_PROMPT)
+            if fileDialog.ShowModal() != wx.ID_OK:
+                self.captureMenuItem.Check(False)
+                return
+            try:
+                if self.rotateFilesMenuItem.IsChecked():
+                    self.captureWriter = rotation.RotatingCaptureWriter(self.makeRotator(fileDialog.GetPath()))
+                else:
+                    self.captureWriter = captureFile.CaptureWriter(fileDialog.GetPath())
+            except OSError as err:
+                self.captureMenuItem.Check(False)
+                self.logger.error('Could not create capture file: {}'.format(err))
+                wx.MessageBox(str(err), 'Could not create capture file', wx.OK | wx.ICON_ERROR)
+                return
+            if self.portOpen:
+                self.capturePortId = self.captureWriter.addPort(self.currentPort)
+            self.captureFlushTimer.Start(1000)
+            self.logger.info('Capturing to {}.'.format(fileDialog.GetPath()))
+        else:
+            self.captureFlushTimer.Stop()
+            self.captureWriter.close()
+            self.logger.info('Stopped capturing to {}.'.format(self.captureWriter.path))
+            self.captureWriter = None
+
+    def makeRotator(self, path):
+        """ Create a Rotator for the segments of a file with the current settings. """
+        return rotation.Rotator(path, compressor=self.segmentCompressor, **self.rotationSettings)
+
+    def onEditRotationSettings(self, event):
+        """ Let the user choose how to rotate the log and capture files. The
+        settings apply to the files opened from now on. """
+        dialog = wx.TextEntryDialog(self, 'Segments are closed at segmentMiB or after segmentHours,\n'
+            'compressed with gzip, lzma or none, and the oldest deleted while\n'
+            'they take more than keepMiB or are older than keepDays. 0 means no limit.',
+            'Rotation settings', rotation.formatSettings(self.rotationSettings),
+            style=wx.TE_MULTILINE|wx.OK|wx.CANCEL)
+        if dialog.ShowModal() != wx.ID_OK:
+            return
+        try:
+            self.rotationSettings = dict(rotation.DEFAULT_SETTINGS, **rotation.parseSettings(dialog.GetValue()))
+            self.logger.info('Rotation settings: {}.'.format(self.rotationSettings))
+        except ValueError as error:
+            self.logger.error('Invalid rotation settings: {}'.format(error))
+            wx.MessageBox(str(error), 'Invalid rotation settings', wx.OK | wx.ICON_WARNING)
+
     def onRawOutputTicked(self, event):
         """ Raw output checkbox status defines whether hex output can also be
         enabled or not. Grey it out when it won't affect the program not to
@@ -309,6 +1037,12 @@ class serialMonitorGuiMainFrame( baseClasses.mainFrame ):
             self.hexOutputCheckbox.Enable(False) # Grey it out.
             # Upon re-enabling raw output start from the default state of the hex output, too.
             self.hexOutputCheckbox.SetValue(False)
+        self.updateOutputView()
+
+    def onHexOutputTicked(self, event):
+        """ Show the hex dump or the text, depending on the output format. """
+        self.logger.debug('Hex output ticked: {}.'.format(event.IsChecked()))
+        self.updateOutputView()
 
     def onEditSerialPort( self, event ):
         """ Edit the more fine details of the serial connection, like the parity
@@ -329,6 +1063,28 @@ class serialMonitorGuiMainFrame( baseClasses.mainFrame ):
         else: # Nothing's changed.
             pass
 
+    def onToggleReadInThread(self, event):
+        """ Switch between reading the port in a background thread and reading
+        it with the timer on the GUI thread. """
+        if self.readInThreadMenuItem.IsChecked():
+            self.logger.debug('Reading port in background thread.')
+            self.parseOutputsTimer.Stop()
+            self.startReader()
+        else:
+            self.logger.debug('Reading port every {}-{} ms.'.format(self.minReadDelay, self.readDelay))
+            self.stopReader()
+            self.startParseOutputsTimer()
+
+    def onToggleAdaptiveReadDelay(self, event):
+        """ Switch between reading the port every max read delay and adapting
+        the delay to the data. """
+        if self.adaptiveReadDelayMenuItem.IsChecked():
+            self.pollScheduler.policy = 'adaptive'
+        else:
+            self.pollScheduler.policy = 'fixed'
+        self.pollScheduler.setBounds(self.minReadDelay, self.readDelay)
+        self.logger.debug('Using {} read delay.'.format(self.pollScheduler.policy))
+
     def onLoggingLevelChosen(self, event):
         """ Check if the new logging level is different to the currently selected
         one and, if so, do an update. """
@@ -358,42 +1114,95 @@ class serialMonitorGuiMainFrame( baseClasses.mainFrame ):
         """ Checks the list of open serial ports and updates the internal list
         and the options shown in the dropdown selection menu.
 
+        Where the sysfs is available, the ports are taken from the port registry
+        straight away. Otherwise, they are probed in a background thread and
+        added to the dropdown as soon as they're found, so the GUI doesn't
+        freeze in the meantime.
+
         Args
         -----
         suppressWarn (bool): whether to suppress showing a wx.MessageBox with
             a warning if no active ports are found.
         """
 
-        # check what ports are currently open
-        ports = commsInterface.getActivePorts()
-        if len(ports) <= 0 and not suppressWarn:
-            wx.MessageBox('Check connection and port permissions.', 'Found no active ports!',
-                wx.ICON_ERROR, None)
+        # Results of earlier updates that are still running will be ignored.
+        self.portsUpdate += 1
 
         # save current selection
-        currentSelection = self.portChoice.GetStringSelection()
+        self.pendingPortSelection = self.portChoice.GetStringSelection()
 
         # Remove the current options
         for i in range(len(self.portChoice.GetStrings())-1, -1, -1):
             self.portChoice.Delete(i)
-
-        # add the newly found ports
         self.portChoice.Append('None')
-        for port in ports:
-            self.portChoice.Append(port)
-
-        # attempt to return to the last selected port, use None if it's not found
-        if currentSelection in ports:
-            for i in range(len(ports)):
-                if ports[i] == currentSelection:
-                    self.portChoice.SetSelection(i+1)
-        else:
-            self.portChoice.SetSelection(0)
+        self.portChoice.SetSelection(0)
+
+        # The cache is cheap to refresh, no need for a background thread.
+        if self.portRegistry is not None:
+            self.portRegistry.refresh()
+            ports = [info.device for info in self.portRegistry.ports]
+            for port in ports:
+                self.addFoundPort(self.portsUpdate, port)
+            self.finishUpdatePorts(self.portsUpdate, ports, suppressWarn)
+            return
+
+        # check what ports are currently open
+        threading.Thread(target=self.probePorts, args=(self.portsUpdate, suppressWarn),
+            name='UpdatePorts', daemon=True).start()
+
+    def onPortsChanged(self):
+        """ Update the dropdown when a port has been plugged in or removed. """
+        if not self:
+            return # Frame closed.
+        ports = [info.device for info in self.portRegistry.ports]
+        if ports != self.portChoice.GetStrings()[1:]:
+            self.logger.debug('Available ports changed.')
+            self.updatePorts(suppressWarn=True)
+
+    def probePorts(self, portsUpdate, suppressWarn):
+        """ Find the open ports and pass them to the GUI thread one by one.
+        Runs in a background thread started by updatePorts. """
+        ports = []
+        for port in commsInterface.iterActivePorts():
+            ports.append(port)
+            wx.CallAfter(self.addFoundPort, portsUpdate, port)
+        wx.CallAfter(self.finishUpdatePorts, portsUpdate, ports, suppressWarn)
+
+    def addFoundPort(self, portsUpdate, port):
+        """ Add a newly found port to the dropdown. """
+        if not self or portsUpdate != self.portsUpdate:
+            return # Frame closed or a newer update started.
+
+        self.portChoice.Append(port)
+        # attempt to return to the last selected port
+        if port == self.pendingPortSelection and self.portChoice.GetSelection() == 0:
+            self.portChoice.SetSelection(len(self.portChoice.GetStrings())-1)
+
+    def finishUpdatePorts(self, portsUpdate, ports, suppressWarn):
+        """ Warn if no ports have been found and forget the last selection if
+        it wasn't found. """
+        if not self or portsUpdate != self.portsUpdate:
+            return # Frame closed or a newer update started.
+
+        if len(ports) <= 0 and not suppressWarn:
+            wx.MessageBox('Check connection and port permissions.', 'Found no active ports!',
+                wx.ICON_ERROR, None)
+
+        # use None if the last selected port is not found, but keep the name
+        # of a replay port, which is never listed
+        if self.pendingPortSelection not in ports and not (self.portOpen and
+                self.currentSerialConnection is self.replayConnection):
             self.currentPort = 'None'
 
+        # Tell the adapters apart by their serial numbers etc.
+        if self.portRegistry is not None:
+            self.portChoice.SetToolTip('\n'.join(info.describe() for info in self.portRegistry.ports))
+        self.Layout() # makes sure the choice dropdown is big enough to fit all the choice options
+
     def disconnect(self):
         """ Drop the current connection with the serial port """
         if self.portOpen:
+            self.stopReader()
             self.currentSerialConnection.close()
         self.currentSerialConnection = 0
         self.portOpen = False
@@ -412,6 +1221,7 @@ class serialMonitorGuiMainFrame( baseClasses.mainFrame ):
         if not commsInterface.checkConnection(self.currentSerialConnection):
             # handle all internal nuts and bolts related to the connection
             # by setting them back to defaults.
+            self.stopReader()
             self.currentSerialConnection = 0
             self.portOpen = False
             self.currentPort = 'None'
@@ -428,9 +1238,8 @@ class serialMonitorGuiMainFrame( baseClasses.mainFrame ):
     def writeToTextBox(self, msg, prepend="", colour=(0,0,0)):
         """ Log a message inside the main text display window.
 
-        Refreshes the position inside the text box, writes the message, and sets
-        the cursour at the end of the text box to avoid issues with the user
-        accidentally clicking somewhere and disturbing the output process.
+        The message is queued and shown together with the others that arrive
+        within the same frame, see renderToTextBox.
 
         Arguments
         ---------
@@ -440,28 +1249,30 @@ class serialMonitorGuiMainFrame( baseClasses.mainFrame ):
         ---------
             prepend (string, default empty) - how to prepend the message, useful
                 for highlighting e.g. in/out directions, etc.
-            colour (int tuple, len=3, default=(0,0,0)) - RGB colour of text
+            colour (int tuple, len=3, default=(0,0,0)) - RGB colour of text, or
+                a highlighter.Style
         """
+        self.renderBatcher.add(r'{}{}'.format(prepend, msg), colour)
 
-        # Move the cursor to the end of the box
-        self.logFileTextControl.MoveEnd()
+    def renderToTextBox(self, runs):
+        """ Add a batch of messages to the scrollback and show them in the main
+        display window, scrolled to the end. The view is only refreshed once
+        per batch, and not at all while the window is minimised or the user
+        has scrolled up. It catches up when they come back to the end.
 
-        # Set colour if needed
-        if colour != (0,0,0):
-            self.logFileTextControl.BeginTextColour(colour)
-
-		# Write the message, with a preamble if desired.
-        if len(prepend) > 0:
-            prepend = "{}".format(prepend) # Format the desired preamble nicely.
-        self.logFileTextControl.WriteText(r'{}{}'.format(prepend, msg))
-
-		# Scroll to the end of the box.
-        self.logFileTextControl.ShowPosition(self.logFileTextControl.GetLastPosition())
+        Arguments
+        ---------
+            runs (list) - (text, colour) tuples to write, colour being an RGB
+                int tuple.
+        """
+        if not self:
+            return # Frame closed before the batch was due.
 
-        # Re-set colour to default but only if it's been changed to avoid WX
-		# warning 'Debug: Too many EndStyle calls!"'.
-        if colour != (0,0,0):
-            self.logFileTextControl.EndTextColour()
+        with self.pipelineStats.time('render'):
+            for text, colour in runs:
+                self.scrollback.append(text, colour)
+            self.searchIndex.update(self.scrollback)
+            self.outputView.linesAdded()
 
     def sendMessage(self, msg):
         """ Sends a message to the port via the serial conneciton, but also takes
@@ -478,111 +1289,272 @@ class serialMonitorGuiMainFrame( baseClasses.mainFrame ):
                 # Send the message; need to pass as a regular string to avoid compatibility
                 # issues with new wxWidgets which use unicode string formatting
                 # Convert msg to bytes, then pass to serial.
-                self.currentSerialConnection.write(msg.encode('utf-8'))
+                dataStr = msg.encode('utf-8')
+                self.currentSerialConnection.write(dataStr)
+                self.pipelineStats.addSent(len(dataStr))
+                if self.captureWriter is not None:
+                    self.captureWriter.write(dataStr, captureFile.SENT, self.capturePortId)
                 # Log in the main display box in new line and in blue to make sure it stands out.
                 self.writeToTextBox(msg+'\n',prepend='\nOUT: ',colour=(0,0,255))
+                self.outputAtLineStart = True
                 # Log the sent command.
                 self.logger.info(r'OUT: {}'.format(msg))
 
     def parseOutputs(self):
         """ Check the serial connection for any inbound information and read it if it's
         available. Pass it to the respective handlers accordingly. """
-        if self.portOpen:
+        if not self.portOpen:
+            self.pollScheduler.update(0) # Nothing to read, back off.
+        elif self.checkConnection():
+            # How much has arrived since the last read decides when to read next.
+            bytesWaiting = self.currentSerialConnection.inWaiting()
+            self.pollScheduler.update(bytesWaiting)
+            self.pipelineStats.addBacklog(bytesWaiting)
+
+            # # if incoming bytes are waiting to be read from the serial input buffer
+            # if (self.currentSerialConnection.inWaiting() > 0):
+            #     # Read the bytes.
+            #     dataStr = self.currentSerialConnection.read(
+            #         self.currentSerialConnection.inWaiting() )
+            #
+            #     # Pass to the buffer and convert from binary array to ASCII
+            #     # and split the output on EOL characters, unless the user
+            #     # desires to see the raw, undecoded output. In such case,
+            #     # don't expect end of line characters and replace unkown bytes
+            #     # with unicode replacement character. Also allow the user
+            #     # to see the hex code of the received bytes, not unicode.
+            #
+            #     # Processed and (arguably) nicely formatted output.
+            #     if not self.rawOutputCheckbox.GetValue():
+            #         try:
+            #             self.serialOutputBuffer += dataStr.decode('ascii')
+            #
+            #             # extract any full lines and log them - there can be more than
+            #             # one, depending on the loop frequencies on either side of the
+            #             # serial conneciton
+            #             lines = self.serialOutputBuffer.rpartition("\n")
+            #             if lines[0]:
+            #                 for line in lines[0].split("\n"):
+            #                     # Write the line to text ctrl and log it.
+            #                     self.writeToTextBox(msg+"\n")
+            #                     logger.info(line)
+            #
+            #                     # this is where one can pass the outputs to where they need to go
+            #
+            #                 # Keep the remaining output in buffer if there are no EOL characters
+            #                 # in it. This is useful if only part of a message was received on last
+            #                 # buffer update.
+            #                 self.serialOutputBuffer = lines[2]
+            #
+            #         except UnicodeDecodeError as uderr:
+            #             # Sometimes rubbish gets fed to the serial port.
+            #             # Print the error in the console to let the user know something's not right.
+            #             self.writeToTextBox("!!!   ERROR DECODING ASCII STRING   !!!\n", colour=(255,0,0))
+            #             # Log the error and the line that caused it.
+            #             logger.warning('UnicodeDecodeError :( with string:\n\t{}'.format(dataStr))
+            #
+            #     # Raw but not formatted output.
+            #     elif not self.hexOutputCheckbox.GetValue():
+            #         # Just print whatever came out of the serial port.
+            #         # Writing unicode(dataStr) to logFileTextControl will sometimes
+            #         # skip characters (e.g. for 0x00) and the remaining parts of the dataStr.
+            #         # Write one character at the time and repalce invalid bytes manually.
+            #         for c in dataStr:
+            #             try:
+            #                 self.writeToTextBox(chr(c))
+            #
+            #             # c was an unknown byte - replace it.
+            #             except UnicodeDecodeError:
+            #                 self.writeToTextBox(u'\uFFFD')
+            #
+            #         # Log the line that we received.
+            #         logger.info(str(dataStr))
+            #
+            #     else: # Hex output.
+            #         # Hex encoding of the datStr.
+            #         hexDataStr = ":".join("{}".format(hex(c)) for c in dataStr)
+            #         self.writeToTextBox(hexDataStr)
+            #         logger.info(hexDataStr)
+
+            # grab the outputs
+            startOffset = self.byteStore.endOffset
+            with self.pipelineStats.time('read'):
+                output, decodeErrors = commsInterface.readPortOutput(
+                    self.currentSerialConnection, self.serialOutputFramer,
+                    self.getOutputFormat(), store=self.byteStore)
+            self.pipelineStats.addReceived(self.byteStore.endOffset - startOffset)
+            if self.captureWriter is not None:
+                self.captureWriter.write(self.byteStore.getBytes(startOffset, self.byteStore.endOffset),
+                    captureFile.RECEIVED, self.capturePortId, self.byteStore.lastTimestamp)
+            self.showOutputs(output, decodeErrors, self.byteStore.lastTimestamp)
+            # The tick should be done before the next one is due.
+            self.pipelineStats.endTick(1000000*self.pollScheduler.delay)
+
+    def parseReaderOutputs(self):
+        """ Take the data received by the background reader thread, if there is
+        anything available, and pass it to the respective handlers. Called on
+        the GUI thread whenever the reader has new data. """
+        # Might have been disconnected since the reader asked for this.
+        reader = self.portReader
+        if reader is None:
+            return
+
+        self.showReaderChunks(reader.getChunks())
+        # What's left behind is what the GUI hasn't kept up with.
+        self.pipelineStats.addBacklog(reader.backlog())
+
+        if reader.error is not None:
+            self.logger.error('Background reader stopped due to {}.'.format(
+                reader.error))
+            self.stopReader()
+            # Let checkConnection tidy up and tell the user if the port is gone,
+            # otherwise keep on reading.
             if self.checkConnection():
-                # # if incoming bytes are waiting to be read from the serial input buffer
-                # if (self.currentSerialConnection.inWaiting() > 0):
-                #     # Read the bytes.
-                #     dataStr = self.currentSerialConnection.read(
-                #         self.currentSerialConnection.inWaiting() )
-                #
-                #     # Pass to the buffer and convert from binary array to ASCII
-                #     # and split the output on EOL characters, unless the user
-                #     # desires to see the raw, undecoded output. In such case,
-                #     # don't expect end of line characters and replace unkown bytes
-                #     # with unicode replacement character. Also allow the user
-                #     # to see the hex code of the received bytes, not unicode.
-                #
-                #     # Processed and (arguably) nicely formatted output.
-                #     if not self.rawOutputCheckbox.GetValue():
-                #         try:
-                #             self.serialOutputBuffer += dataStr.decode('ascii')
-                #
-                #             # extract any full lines and log them - there can be more than
-                #             # one, depending on the loop frequencies on either side of the
-                #             # serial conneciton
-                #             lines = self.serialOutputBuffer.rpartition("\n")
-                #             if lines[0]:
-                #                 for line in lines[0].split("\n"):
-                #                     # Write the line to text ctrl and log it.
-                #                     self.writeToTextBox(msg+"\n")
-                #                     logger.info(line)
-                #
-                #                     # this is where one can pass the outputs to where they need to go
-                #
-                #                 # Keep the remaining output in buffer if there are no EOL characters
-                #                 # in it. This is useful if only part of a message was received on last
-                #                 # buffer update.
-                #                 self.serialOutputBuffer = lines[2]
-                #
-                #         except UnicodeDecodeError as uderr:
-                #             # Sometimes rubbish gets fed to the serial port.
-                #             # Print the error in the console to let the user know something's not right.
-                #             self.writeToTextBox("!!!   ERROR DECODING ASCII STRING   !!!\n", colour=(255,0,0))
-                #             # Log the error and the line that caused it.
-                #             logger.warning('UnicodeDecodeError :( with string:\n\t{}'.format(dataStr))
-                #
-                #     # Raw but not formatted output.
-                #     elif not self.hexOutputCheckbox.GetValue():
-                #         # Just print whatever came out of the serial port.
-                #         # Writing unicode(dataStr) to logFileTextControl will sometimes
-                #         # skip characters (e.g. for 0x00) and the remaining parts of the dataStr.
-                #         # Write one character at the time and repalce invalid bytes manually.
-                #         for c in dataStr:
-                #             try:
-                #                 self.writeToTextBox(chr(c))
-                #
-                #             # c was an unknown byte - replace it.
-                #             except UnicodeDecodeError:
-                #                 self.writeToTextBox(u'\uFFFD')
-                #
-                #         # Log the line that we received.
-                #         logger.info(str(dataStr))
-                #
-                #     else: # Hex output.
-                #         # Hex encoding of the datStr.
-                #         hexDataStr = ":".join("{}".format(hex(c)) for c in dataStr)
-                #         self.writeToTextBox(hexDataStr)
-                #         logger.info(hexDataStr)
-
-                # see in what format to request data
-                if not self.rawOutputCheckbox.GetValue():
-                    outputFormat = "formatted"
-                elif not self.hexOutputCheckbox.GetValue():
-                    outputFormat = "raw"
-                else:
-                    outputFormat = "hex"
-
-                # grab the outputs
-                output, self.serialOutputBuffer, warningSummary = commsInterface.grabPortOutput(
-                    self.currentSerialConnection, self.serialOutputBuffer, outputFormat)
-
-                # Log and print received data in the text box. output is a string,
-				# which is Unicode in Python 3, so no need to cast.
-				# Only print when there is some message to avoid spamming the logs
-				# with empty lines.
-                if len(output) > 0:
-                    # Replace control characters with unicode unknown character.
-                    # Otherwise, the log might stall. Never seen this happen in
-                    # the wx text box but just to be safe.
-                    cleanOutput=''.join(ch if unicodedata.category(ch)[0]!='C' else chr(0xFFFD) for ch in output)
-                    self.writeToTextBox(cleanOutput)
-                    self.logger.info(cleanOutput)
-
-                # Log and print (in red) warnings, if there are any.
-                if len(warningSummary) > 0:
-                    for w in warningSummary:
-                        self.writeToTextBox("{}, check the log!\n".format(w), colour=(255,0,0))
-                        self.logger.warning(warningSummary[w])
+                self.startReader()
+
+    def startReader(self):
+        """ Start reading the current port in a background thread, if the user
+        wants that. The reader asks for parseReaderOutputs to be called on the
+        GUI thread whenever it has new data. """
+        if self.portOpen and self.portReader is None and self.readInThreadMenuItem.IsChecked():
+            self.portReader = commsInterface.PortReader(self.currentSerialConnection,
+                onData=lambda: wx.CallAfter(self.parseReaderOutputs))
+            self.portReader.start()
+
+    def stopReader(self):
+        """ Stop the background reader thread, if there is one, and show any
+        data it has already read. """
+        if self.portReader is not None:
+            reader = self.portReader
+            self.portReader = None
+            reader.stop()
+            self.showReaderChunks(reader.getChunks())
+
+    def showReaderChunks(self, chunks):
+        """ Format, show and log the chunks of data read by the background
+        reader thread.
+
+        Arguments
+        ---------
+            chunks (list) - (monotonic_ns, bytes) tuples returned by
+                commsInterface.PortReader.getChunks.
+        """
+        if not chunks:
+            return
+
+        for timestamp, dataStr in chunks:
+            self.byteStore.append(dataStr, timestamp)
+            if self.captureWriter is not None:
+                self.captureWriter.write(dataStr, captureFile.RECEIVED, self.capturePortId, timestamp)
+        nBytes = sum(len(dataStr) for timestamp, dataStr in chunks)
+        self.pipelineStats.addReceived(nBytes)
+
+        if self.showTimestampsMenuItem.IsChecked():
+            # Format every chunk on its own to show the time it was received at,
+            # but warn about the decoding errors of all of them once.
+            batchErrors = commsInterface.DecodeErrorSummary()
+            for timestamp, dataStr in chunks:
+                with self.pipelineStats.time('read'):
+                    output, decodeErrors = commsInterface.formatPortOutput(
+                        dataStr, self.serialOutputFramer, self.getOutputFormat())
+                batchErrors.merge(decodeErrors)
+                self.showOutputs(output, None, timestamp)
+            self.showDecodeErrors(batchErrors)
+        else:
+            # Format everything that arrived since the last call in one go.
+            with self.pipelineStats.time('read'):
+                output, decodeErrors = commsInterface.formatPortOutput(
+                    b''.join(dataStr for timestamp, dataStr in chunks),
+                    self.serialOutputFramer, self.getOutputFormat())
+            self.showOutputs(output, decodeErrors, chunks[-1][0])
+        # The chunks should be dealt with within a frame, or they pile up.
+        self.pipelineStats.endTick(1e9*self.renderBatcher.interval)
+
+    def updateOutputView(self):
+        """ Show the hex dump in place of the text if hex output is chosen,
+        or the other way round. """
+        showHex = self.getOutputFormat() == "hex"
+        self.outputView.Show(not showHex)
+        self.hexDumpView.Show(showHex)
+        self.Layout()
+        if showHex:
+            self.hexDumpView.refreshLines()
+        else:
+            self.outputView.refreshLines()
+
+    def getOutputFormat(self):
+        """ See in what format to show the received data.
+
+        Returns
+        -------
+        (string) - outputFormat understood by commsInterface.
+        """
+        if not self.rawOutputCheckbox.GetValue():
+            return "formatted"
+        elif not self.hexOutputCheckbox.GetValue():
+            return "raw"
+        else:
+            return "hex"
+
+    def showOutputs(self, output, decodeErrors, timestamp=None):
+        """ Show and log the formatted data received from the port.
+
+        Arguments
+        ---------
+            output (string) - formatted data, as returned by commsInterface.
+            decodeErrors (commsInterface.DecodeErrorSummary) - errors
+                encountered while formatting the data, None if they're
+                shown separately with showDecodeErrors.
+
+        Optional
+        ---------
+            timestamp (int, default None) - time.monotonic_ns() the data were
+                received at, to show in front of the lines if the user wants
+                that and to log them with.
+        """
+        # Log and print received data in the text box. output is a string,
+        # which is Unicode in Python 3, so no need to cast.
+        # Only print when there is some message to avoid spamming the logs
+        # with empty lines.
+        if len(output) > 0:
+            # Replace control characters with unicode unknown character.
+            # Otherwise, the log might stall. Never seen this happen in
+            # the wx text box but just to be safe.
+            with self.pipelineStats.time('sanitise'):
+                cleanOutput = self.sanitiser.sanitise(output)
+            self.pipelineStats.addReceived(0, cleanOutput.count('\n'))
+            # The hex dump shows the bytes straight from the byte store.
+            if self.getOutputFormat() == "hex":
+                self.hexDumpView.linesAdded()
+            else:
+                stamp = None
+                if timestamp is not None and self.showTimestampsMenuItem.IsChecked():
+                    stamp = '[{}] '.format(timestamps.formatTimestamp(timestamp))
+                # All the rules are applied to the whole output in one go.
+                for text, colour in self.highlighter.highlight(cleanOutput):
+                    if stamp is not None:
+                        text = timestamps.stampLines(text, stamp, self.outputAtLineStart)
+                    self.outputAtLineStart = text.endswith('\n')
+                    self.writeToTextBox(text, colour=colour)
+            self.logger.info(cleanOutput, extra={'received': timestamp})
+        self.showDecodeErrors(decodeErrors)
+
+    def showDecodeErrors(self, decodeErrors):
+        """ Log and print (in red) a warning about decoding errors, if there
+        are any. All the errors from one read are coalesced into a single
+        warning, so that a noisy line doesn't flood the text box and the log.
+
+        Arguments
+        ---------
+            decodeErrors (commsInterface.DecodeErrorSummary) - errors to warn
+                about, or None.
+        """
+        if decodeErrors:
+            self.pipelineStats.addDecodeErrors(len(decodeErrors))
+            self.writeToTextBox("{} decoding errors ({:.2f}% of received bytes), check the log!\n".format(
+                len(decodeErrors), 100.*decodeErrors.rate), colour=(255,0,0))
+            self.outputAtLineStart = True
+            self.logger.warning(decodeErrors.describe())
 
     def notifyToReconnect(self):
         """ Notify the user to reconnect to the serial port for the changes they've
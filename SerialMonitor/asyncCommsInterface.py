@@ -0,0 +1,251 @@
+#!/bin/env/python3
+
+import serial
+import os
+import asyncio
+
+import SerialMonitor.commsInterface as commsInterface
+
+class AsyncSerialPort(object):
+	""" Read and write a serial port from asyncio coroutines.
+
+	On platforms where the port has a file descriptor and the event loop can
+	watch it (e.g. Linux), the loop wakes the reading coroutine as soon as data
+	arrives, using loop.add_reader. Many ports can thus be served by one event
+	loop without a thread per port. Ports without a file descriptor, such as
+	pySerial's loop://, are polled every `pollInterval` instead.
+
+	Arguments
+	---------
+		port (serial.SerialBase) - open instance of a port interface. It's
+			switched to non-blocking reads (timeout=0) and shouldn't be read
+			by anything else afterwards.
+
+	Optional
+	---------
+		pollInterval (float, default 0.01) - how often to check ports without
+			a file descriptor for new data [s].
+		readSize (int, default 65536) - the most bytes to read at a time.
+		loop (asyncio.AbstractEventLoop, default None) - the event loop the
+			port will be used from. The running loop if None.
+
+	Raises
+	---------
+		TypeError - when `port` isn't a serial.SerialBase.
+		RuntimeError - when no loop is given and none is running.
+	"""
+
+	def __init__(self, port, pollInterval=0.01, readSize=65536, loop=None):
+		if not isinstance(port,serial.SerialBase):
+			raise TypeError('Expected port of type serial.serialposix.Serial,\
+			 got {} instead.'.format(type(port)))
+
+		self.port = port
+		self.port.timeout = 0 # Never block the event loop.
+		self.pollInterval = pollInterval
+		self.readSize = readSize
+		self.buffer = bytearray() # Bytes read from the port but not returned yet.
+		self.loop = asyncio.get_running_loop() if loop is None else loop
+		self.waiting = set() # Futures of the coroutines waiting for the port.
+		self.closed = False
+
+		# Use the file descriptor if there is one and the loop can watch it.
+		self.fd = None
+		try:
+			fd = self.port.fileno()
+			self.loop.add_reader(fd, lambda: None)
+			self.loop.remove_reader(fd)
+			self.fd = fd
+		except (AttributeError, NotImplementedError, OSError, ValueError):
+			pass # No fd (e.g. loop://) or a loop that doesn't support add_reader.
+
+	@classmethod
+	async def open(cls, url, pollInterval=0.01, **kwargs):
+		""" Open a port and wrap it for use from coroutines.
+
+		Arguments
+		---------
+			url (string) - port name or URL, e.g. /dev/ttyUSB0 or loop://
+			kwargs - passed to serial.serial_for_url, e.g. baudrate.
+
+		Returns
+		---------
+			(AsyncSerialPort) - the opened port.
+		"""
+		# Opening and configuring a port can take a while on some adapters.
+		port = await asyncio.get_running_loop().run_in_executor(None,
+			lambda: serial.serial_for_url(url, **kwargs))
+		return cls(port, pollInterval=pollInterval)
+
+	def close(self):
+		""" Close the port. Coroutines still waiting for it get a
+		serial.SerialException. Call from the event loop's thread. """
+		if self.closed:
+			return
+		self.closed = True
+		if self.fd is not None:
+			self.loop.remove_reader(self.fd)
+			self.loop.remove_writer(self.fd)
+		for future in self.waiting:
+			if not future.done():
+				future.set_exception(serial.SerialException('port closed'))
+		self.waiting.clear()
+		self.port.close()
+
+	async def _wait(self, addWatcher, removeWatcher):
+		""" Wait for the event loop to call back when the port's ready, or
+		for the port to be closed. """
+		if self.closed:
+			raise serial.SerialException('port closed')
+		ready = self.loop.create_future()
+		self.waiting.add(ready)
+		addWatcher(self.fd, lambda: ready.done() or ready.set_result(None))
+		try:
+			await ready
+		finally:
+			self.waiting.discard(ready)
+			if not self.closed: # The fd may have been reused once closed.
+				removeWatcher(self.fd)
+
+	async def _waitReadable(self):
+		""" Wait until there might be something to read in the port. """
+		if self.fd is None:
+			if self.closed:
+				raise serial.SerialException('port closed')
+			await asyncio.sleep(self.pollInterval)
+			return
+		await self._wait(self.loop.add_reader, self.loop.remove_reader)
+
+	async def _waitWritable(self):
+		""" Wait until the port can take more bytes to write. """
+		await self._wait(self.loop.add_writer, self.loop.remove_writer)
+
+	def _readAvailable(self, ready=False):
+		""" Read whatever is available in the port without blocking.
+
+		Arguments
+		---------
+			ready (bool, default False) - whether the event loop has just said
+				the port is ready to read.
+
+		Raises
+		---------
+			serial.SerialException - when the port has been disconnected.
+		"""
+		if self.fd is None:
+			return self.port.read(min(max(1, self.port.inWaiting()), self.readSize))
+
+		try:
+			dataStr = os.read(self.fd, self.readSize)
+		except BlockingIOError:
+			return b''
+		except OSError as err:
+			raise serial.SerialException('read failed: {}'.format(err))
+		if not dataStr and ready:
+			# Disconnected devices, at least on Linux, are always ready to
+			# read but return no data - same check as pySerial does. Without
+			# the readiness, no data just means nothing has arrived yet.
+			raise serial.SerialException('device reports readiness to read but '
+				'returned no data (device disconnected?)')
+		return dataStr
+
+	async def read(self, size=None):
+		""" Wait for at least one byte and return all the bytes received.
+
+		Arguments
+		---------
+			size (int, default None) - the most bytes to return. All the bytes
+				available are returned if None.
+
+		Returns
+		---------
+			(bytes) - at least one received byte.
+		"""
+		ready = False
+		while not self.buffer:
+			self.buffer += self._readAvailable(ready)
+			if not self.buffer:
+				await self._waitReadable()
+				ready = True
+
+		if size is None:
+			size = len(self.buffer)
+		dataStr = bytes(self.buffer[:size])
+		del self.buffer[:size]
+		return dataStr
+
+	async def readline(self):
+		""" Wait for a complete line.
+
+		Returns
+		---------
+			(bytes) - the line, terminated with b'\n'.
+		"""
+		scanned = 0 # Bytes already searched for the end of the line.
+		ready = False
+		while True:
+			end = self.buffer.find(b'\n', scanned)
+			if end >= 0:
+				line = bytes(self.buffer[:end+1])
+				del self.buffer[:end+1]
+				return line
+			scanned = len(self.buffer)
+			dataStr = self._readAvailable(ready)
+			if dataStr:
+				self.buffer += dataStr
+				ready = False
+			else:
+				await self._waitReadable()
+				ready = True
+
+	async def write(self, dataStr):
+		""" Write all the bytes to the port, waiting for it to take them if need be.
+
+		Arguments
+		---------
+			dataStr (bytes) - bytes to send.
+		"""
+		if self.fd is None:
+			self.port.write(dataStr)
+			return
+
+		view = memoryview(dataStr)
+		while view:
+			try:
+				view = view[os.write(self.fd, view):]
+			except BlockingIOError:
+				await self._waitWritable()
+			except OSError as err:
+				raise serial.SerialException('write failed: {}'.format(err))
+
+	async def readOutput(self, framer, outputFormat):
+		""" Wait for data to arrive in the port and format it, like
+		commsInterface.readPortOutput does for data that has already arrived.
+
+		Arguments
+		---------
+			framer (commsInterface.LineFramer) - holds incomplete lines between
+				the calls. Keep passing the same instance for the same port.
+			outputFormat (string) - chosen formatting type, must be one of
+				['formatted', 'raw', 'hex']
+
+		Returns
+		---------
+			(string) - formatted output from the serial port. May be empty in
+				the 'formatted' format, if no line has been completed yet.
+			(commsInterface.DecodeErrorSummary) - summary of the errors
+				encountered.
+
+		Raises
+		---------
+			ValueError - when supplied `outputFormat` is not supported.
+			TypeError - when `framer` isn't a commsInterface.LineFramer.
+		"""
+		if outputFormat not in ['formatted', 'raw', 'hex']:
+			raise ValueError("Requested output format {} not supported.".format(outputFormat))
+
+		if not isinstance(framer,commsInterface.LineFramer):
+			raise TypeError('Expected framer of type LineFramer, got {}\
+			 instead.'.format(type(framer)))
+
+		return commsInterface.formatPortOutput(await self.read(), framer, outputFormat)
@@ -0,0 +1,166 @@
+#!/bin/env/python3
+
+import array, bisect, time
+
+# Most bytes kept by default. Every byte received is kept, whatever the
+# output format, so this is what a session costs in memory once it's full.
+DEFAULT_MAX_BYTES = 2**26
+
+class ByteStore(object):
+	""" Store of the raw bytes received from the port, in one bytearray, so
+	that they can be shown again in any format without having kept the
+	formatted text.
+
+	Bytes are addressed by their offset, i.e. the number of bytes received
+	before them since the start or the last clear. The offsets don't change
+	when the oldest bytes are dropped.
+
+	Every chunk of bytes appended is stamped with the time.monotonic_ns() it
+	was received at. The offset and the time of every chunk are kept in two
+	arrays of 64-bit ints, i.e. 16 bytes per chunk, however long it is.
+
+	When there are more than `maxBytes` bytes, the oldest ones are dropped,
+	in blocks of `dropBlock` bytes (or half of `maxBytes` if that's less),
+	so that dropping happens rarely.
+
+	Optional
+	---------
+		maxBytes (int, default DEFAULT_MAX_BYTES, i.e. 64 MiB) - most bytes
+			to keep.
+		dropBlock (int, default 1 MiB) - how many bytes to drop at a time.
+			Blocks are rounded up to a multiple of 16 bytes, so that the
+			first offset kept stays aligned with the rows of a hex dump.
+
+	Raises
+	---------
+		ValueError - when the limits aren't positive.
+	"""
+
+	def __init__(self, maxBytes=DEFAULT_MAX_BYTES, dropBlock=2**20):
+		self.data = bytearray()
+		self.startOffset = 0 # Offset of data[0].
+		self.chunkOffsets = array.array('q') # Offset of the first byte of every chunk.
+		self.chunkTimes = array.array('q') # time.monotonic_ns() every chunk was received at.
+		self.setLimits(maxBytes, dropBlock)
+
+	def __len__(self):
+		return len(self.data)
+
+	@property
+	def endOffset(self):
+		""" Offset of the next byte to arrive. """
+		return self.startOffset + len(self.data)
+
+	def setLimits(self, maxBytes=DEFAULT_MAX_BYTES, dropBlock=2**20):
+		""" Change the limits, dropping the oldest bytes if need be. See the
+		class description for the arguments. """
+		if maxBytes < 1 or dropBlock < 1:
+			raise ValueError('Byte store limits must be positive.')
+		self.maxBytes = maxBytes
+		self.dropBlock = dropBlock
+		self._enforceLimit()
+
+	def clear(self):
+		""" Drop all the bytes and start counting the offsets from 0 again. """
+		self.data = bytearray()
+		self.startOffset = 0
+		self.chunkOffsets = array.array('q')
+		self.chunkTimes = array.array('q')
+
+	@property
+	def lastTimestamp(self):
+		""" time.monotonic_ns() the last chunk was received at, None if there
+		are no bytes. """
+		return self.chunkTimes[-1] if self.chunkTimes else None
+
+	def append(self, dataStr, timestamp=None):
+		""" Add a chunk of bytes at the end.
+
+		Arguments
+		---------
+			dataStr (bytes, bytearray or memoryview) - bytes to add.
+
+		Optional
+		---------
+			timestamp (int, default None) - time.monotonic_ns() the bytes were
+				received at, now if None.
+		"""
+		if len(dataStr) == 0:
+			return
+		self.chunkOffsets.append(self.endOffset)
+		self.chunkTimes.append(time.monotonic_ns() if timestamp is None else timestamp)
+		self.data += dataStr
+		self._enforceLimit()
+
+	def timestampAt(self, offset):
+		""" Get the time the byte at an offset was received at.
+
+		Arguments
+		---------
+			offset (int) - offset of the byte.
+
+		Returns
+		---------
+			(int) - time.monotonic_ns() of the chunk holding the byte, None if
+				it's been dropped or hasn't arrived yet.
+		"""
+		if not self.startOffset <= offset < self.endOffset:
+			return None
+		return self.chunkTimes[bisect.bisect_right(self.chunkOffsets, offset) - 1]
+
+	def getChunks(self, start, stop):
+		""" Get the chunks of bytes between two offsets, clipped to the bytes
+		still kept, e.g. to export them with the times they were received at.
+
+		Arguments
+		---------
+			start (int) - offset of the first byte.
+			stop (int) - offset after the last byte.
+
+		Returns
+		---------
+			(list) - (offset, monotonic_ns, bytes) tuples, oldest first.
+		"""
+		start = max(start, self.startOffset)
+		stop = min(stop, self.endOffset)
+		chunks = []
+		i = max(bisect.bisect_right(self.chunkOffsets, start) - 1, 0)
+		while start < stop:
+			chunkEnd = self.chunkOffsets[i+1] if i+1 < len(self.chunkOffsets) else self.endOffset
+			end = min(chunkEnd, stop)
+			chunks.append((start, self.chunkTimes[i], self.getBytes(start, end)))
+			start = end
+			i += 1
+		return chunks
+
+	def getBytes(self, start, stop):
+		""" Get the bytes between two offsets, clipped to the ones still kept.
+
+		Arguments
+		---------
+			start (int) - offset of the first byte.
+			stop (int) - offset after the last byte.
+
+		Returns
+		---------
+			(bytes) - the bytes, empty if none of them are kept.
+		"""
+		start = max(start - self.startOffset, 0)
+		stop = max(stop - self.startOffset, 0)
+		return bytes(self.data[start:stop])
+
+	def _enforceLimit(self):
+		""" Drop a block of the oldest bytes if there are too many, so that
+		the rest fit in maxBytes. Deleting from the front of a bytearray
+		doesn't move the rest. """
+		excess = len(self.data) - self.maxBytes
+		if excess > 0:
+			drop = max(excess, min(self.dropBlock, self.maxBytes//2))
+			drop = min(-(-drop//16)*16, len(self.data)) # Round up to 16.
+			del self.data[:drop]
+			self.startOffset += drop
+			# Keep the chunk that the first byte kept belongs to.
+			dropChunks = bisect.bisect_right(self.chunkOffsets, self.startOffset) - 1
+			if dropChunks > 0:
+				del self.chunkOffsets[:dropChunks]
+				del self.chunkTimes[:dropChunks]
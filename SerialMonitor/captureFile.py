@@ -0,0 +1,385 @@
+#!/bin/env/python3
+
+import array, bisect, collections, gzip, lzma, mmap, os, shutil, struct, sys, tempfile, time
+
+# Every capture file starts with the magic and the difference between the wall
+# clock and time.monotonic_ns() when it was created [ns], so that the times of
+# the records can be shown as wall clock times later.
+MAGIC = b'SMCAP\x00\x01\n'
+_FILE_HEADER = struct.Struct('<8sq')
+
+# Every record is a header followed by `length` bytes of payload.
+_RECORD_HEADER = struct.Struct('<IBHq') # length, kind, port id, monotonic_ns
+RECEIVED = 0 # Payload are bytes received from the port.
+SENT = 1 # Payload are bytes sent to the port.
+PORT = 2 # Payload is the name of the port with the record's port id, UTF-8.
+
+# The sidecar index holds one entry per block of the capture file: the file
+# offset, time and received offset of the first record that starts in it.
+INDEX_SUFFIX = '.idx'
+
+# Longest time between the first and the last chunk merged into one record by
+# default [ns]. Short enough for a replay to keep the timing of the chunks.
+DEFAULT_MERGE_INTERVAL = 5000000
+_INDEX_ENTRY = struct.Struct('<QqQ')
+
+# Extensions of compressed capture files, e.g. segments compressed by a
+# rotation.SegmentCompressor, and how to open them for reading.
+DECOMPRESSORS = {'.gz': gzip.open, '.xz': lzma.open}
+
+Record = collections.namedtuple('Record', ['kind', 'portId', 'timestamp', 'data',
+	'fileOffset', 'receivedOffset', 'length'])
+Record.__doc__ = """ A record read from a capture file. receivedOffset is the
+number of bytes received before it, i.e. the offset of its first byte in the
+stream of the received bytes if it's a RECEIVED record. length is the length
+of the payload, also when it hasn't been read. """
+
+class CaptureWriter(object):
+	""" Append raw received and sent bytes to a capture file, as length-prefixed
+	records with their direction, port and time.monotonic_ns(). A record
+	costs 15 bytes on top of its payload.
+
+	A slow port is read in chunks of a byte or two, which would mostly be
+	record headers, so chunks written within `mergeInterval` of the first one
+	in a record, in the same direction and from the same port, are merged into
+	that record. Its time is then the time of its first chunk, so merging
+	trades the precision of the times for the size of the file: the longer
+	the interval, the fewer headers, but the more chunks are replayed as
+	one. The record is written when a chunk that can't be merged into it
+	arrives, or on `flush`.
+
+	Every `blockSize` bytes of the file, an entry pointing at the next record
+	is added to a sidecar index (the file name + INDEX_SUFFIX), so that a
+	CaptureReader can find the records around a time or an offset without
+	reading the whole file. The index is only ever appended to, too.
+
+	Writes are buffered, call `flush` to make sure they reach the disk.
+
+	Arguments
+	---------
+		path (string) - where to create the capture file. An existing file is
+			overwritten.
+
+	Optional
+	---------
+		blockSize (int, default 64 KiB) - how many bytes of the file to index
+			with one entry. Also the most bytes merged into one record.
+		mergeInterval (int, default DEFAULT_MERGE_INTERVAL, i.e. 5 ms) - longest
+			time between the first and the last chunk merged into one record
+			[ns], 0 not to merge.
+	"""
+
+	def __init__(self, path, blockSize=2**16, mergeInterval=DEFAULT_MERGE_INTERVAL):
+		self.path = path
+		self.blockSize = blockSize
+		self.mergeInterval = mergeInterval
+		self.pending = None # [kind, port id, time, bytearray] of the record being merged.
+		self.file = open(path, 'wb', buffering=2**16)
+		self.indexFile = open(path + INDEX_SUFFIX, 'wb')
+		self.file.write(_FILE_HEADER.pack(MAGIC, time.time_ns() - time.monotonic_ns()))
+		self.fileOffset = _FILE_HEADER.size # Where the next record goes.
+		self.nextBlock = self.fileOffset # Index the first record at or after this offset.
+		self.receivedOffset = 0
+		self.ports = {} # Port ids by name.
+
+	def addPort(self, name):
+		""" Get the id of a port, recording its name the first time.
+
+		Returns
+		---------
+			(int) - the id to write the port's records with.
+		"""
+		if name not in self.ports:
+			self.ports[name] = len(self.ports)
+			self._writePending()
+			self._write(PORT, self.ports[name], time.monotonic_ns(), name.encode('utf-8'))
+		return self.ports[name]
+
+	@property
+	def size(self):
+		""" Size the file will have once the record being merged is written. """
+		if self.pending is None:
+			return self.fileOffset
+		return self.fileOffset + _RECORD_HEADER.size + len(self.pending[3])
+
+	def write(self, dataStr, kind=RECEIVED, portId=0, timestamp=None):
+		""" Append a chunk of bytes.
+
+		Arguments
+		---------
+			dataStr (bytes, bytearray or memoryview) - the bytes.
+
+		Optional
+		---------
+			kind (int, default RECEIVED) - RECEIVED or SENT.
+			portId (int, default 0) - id of the port, as given by addPort.
+			timestamp (int, default None) - time.monotonic_ns() the bytes were
+				received or sent at, now if None.
+		"""
+		if len(dataStr) == 0:
+			return
+		if timestamp is None:
+			timestamp = time.monotonic_ns()
+		pending = self.pending
+		if (pending is not None and pending[0] == kind and pending[1] == portId and
+				timestamp - pending[2] < self.mergeInterval and len(pending[3]) < self.blockSize):
+			pending[3] += dataStr
+		else:
+			self._writePending()
+			self.pending = [kind, portId, timestamp, bytearray(dataStr)]
+
+	def _writePending(self):
+		""" Write the record that chunks are being merged into, if any. """
+		if self.pending is not None:
+			kind, portId, timestamp, payload = self.pending
+			self.pending = None
+			self._write(kind, portId, timestamp, payload)
+			if kind == RECEIVED:
+				self.receivedOffset += len(payload)
+
+	def _write(self, kind, portId, timestamp, payload):
+		""" Append a record and index it if it starts a new block. """
+		if self.fileOffset >= self.nextBlock:
+			self.indexFile.write(_INDEX_ENTRY.pack(self.fileOffset, timestamp, self.receivedOffset))
+			self.nextBlock = self.fileOffset - self.fileOffset % self.blockSize + self.blockSize
+		self.file.write(_RECORD_HEADER.pack(len(payload), kind, portId, timestamp))
+		self.file.write(payload)
+		self.fileOffset += _RECORD_HEADER.size + len(payload)
+
+	def flush(self):
+		""" Write everything that's been buffered to the disk, also the record
+		that chunks are being merged into. """
+		self._writePending()
+		self.file.flush()
+		self.indexFile.flush()
+
+	def close(self):
+		""" Flush and close the files. """
+		self._writePending()
+		self.file.close()
+		self.indexFile.close()
+
+class CaptureReader(object):
+	""" Read the records of a capture file written by a CaptureWriter.
+
+	The file is memory-mapped read-only, so opening it costs the same however
+	large it is, and only the parts that are read are ever loaded, by the OS.
+	The received bytes can be read by their offset like those in a
+	byteStore.ByteStore, e.g. by a hexDump.HexDump.
+
+	The sidecar index is used to start reading near a time or an offset. If
+	it's missing, e.g. because only the capture file was copied, it's
+	rebuilt in memory by reading the record headers, which does take time in
+	proportion to the size of the file. A record cut short at the end of the
+	file, e.g. when the writer didn't close it, is ignored.
+
+	A compressed capture file, with one of the DECOMPRESSORS' extensions, is
+	decompressed to an anonymous temporary file first, which is mapped in its
+	place, so opening it does take time and disk space in proportion to its
+	size. Its index is expected to be compressed the same way.
+
+	Arguments
+	---------
+		path (string) - the capture file.
+
+	Raises
+	---------
+		ValueError - when the file isn't a capture file.
+	"""
+
+	startOffset = 0 # Offset of the first received byte, as in a ByteStore.
+
+	def __init__(self, path):
+		self.path = path
+		base, extension = os.path.splitext(path)
+		opener = DECOMPRESSORS.get(extension)
+		if opener is None:
+			captureFile = open(path, 'rb')
+			indexPath, indexOpener = path + INDEX_SUFFIX, open
+		else:
+			captureFile = tempfile.TemporaryFile() # Deleted once closed.
+			try:
+				with opener(path, 'rb') as compressedFile:
+					shutil.copyfileobj(compressedFile, captureFile, 2**20)
+			except (OSError, EOFError, lzma.LZMAError) as err: # E.g. not compressed or cut short.
+				captureFile.close()
+				raise ValueError('{} is not a capture file: {}'.format(path, err))
+			captureFile.seek(0)
+			indexPath, indexOpener = base + INDEX_SUFFIX + extension, opener
+		with captureFile:
+			self.size = os.fstat(captureFile.fileno()).st_size
+			header = captureFile.read(_FILE_HEADER.size)
+			if len(header) < _FILE_HEADER.size or header[:len(MAGIC)] != MAGIC:
+				raise ValueError('{} is not a capture file.'.format(path))
+			self.file = mmap.mmap(captureFile.fileno(), self.size, access=mmap.ACCESS_READ)
+		self.wallClockOffset = _FILE_HEADER.unpack(header)[1]
+
+		# Columns of the index entries, in arrays of 64-bit ints.
+		try:
+			entries = array.array('q')
+			with indexOpener(indexPath, 'rb') as indexFile:
+				entries.frombytes(indexFile.read())
+			if sys.byteorder != 'little':
+				entries.byteswap()
+			entries = entries[:len(entries) - len(entries) % 3]
+			self.indexFileOffsets = entries[0::3]
+			self.indexTimes = entries[1::3]
+			self.indexReceivedOffsets = entries[2::3]
+		except (OSError, EOFError, lzma.LZMAError, ValueError): # ValueError if cut in the middle of an int.
+			self.rebuildIndex()
+
+		# Count the received bytes from the last indexed record on, which may
+		# be followed by sent records only.
+		self.receivedSize = self.indexReceivedOffsets[-1] if len(self.indexReceivedOffsets) else 0
+		self.lastTimestamp = None # Time of the last record.
+		for record in self.records(len(self.indexFileOffsets) - 1, headersOnly=True):
+			if record.kind == RECEIVED:
+				self.receivedSize = record.receivedOffset + record.length
+			self.lastTimestamp = record.timestamp
+		self._ports = None
+
+	@property
+	def ports(self):
+		""" Names of the ports by id. Found by reading all the record headers
+		the first time, so it takes time in proportion to the size of the file. """
+		if self._ports is None:
+			self._ports = dict((record.portId, record.data.decode('utf-8'))
+				for record in self.records(headersOnly=True) if record.kind == PORT)
+		return self._ports
+
+	def rebuildIndex(self, blockSize=2**16):
+		""" Index the file by reading all the record headers. """
+		self.indexFileOffsets = array.array('q')
+		self.indexTimes = array.array('q')
+		self.indexReceivedOffsets = array.array('q')
+		nextBlock = 0
+		for record in self.records(headersOnly=True):
+			if record.fileOffset >= nextBlock:
+				self.indexFileOffsets.append(record.fileOffset)
+				self.indexTimes.append(record.timestamp)
+				self.indexReceivedOffsets.append(record.receivedOffset)
+				nextBlock = record.fileOffset - record.fileOffset % blockSize + blockSize
+
+	def close(self):
+		""" Unmap the file. A temporary one is deleted, too. """
+		self.file.close()
+
+	def __len__(self):
+		return self.receivedSize
+
+	@property
+	def endOffset(self):
+		""" Offset just past the last received byte, as in a ByteStore. """
+		return self.receivedSize
+
+	def getBytes(self, start, stop):
+		""" Get the received bytes between two offsets, like
+		ByteStore.getBytes. Only the records holding them are read.
+
+		Arguments
+		---------
+			start (int) - offset of the first byte.
+			stop (int) - offset just past the last byte.
+
+		Returns
+		---------
+			(bytes) - the bytes, fewer if the offsets are out of range.
+		"""
+		start = max(start, 0)
+		stop = min(stop, self.receivedSize)
+		parts = []
+		if start < stop:
+			for record in self.records(self.seekOffset(start), headersOnly=True):
+				if record.receivedOffset >= stop:
+					break
+				if record.kind != RECEIVED or record.receivedOffset + record.length <= start:
+					continue
+				payloadStart = record.fileOffset + _RECORD_HEADER.size
+				parts.append(self.file[payloadStart + max(start - record.receivedOffset, 0):
+					payloadStart + min(stop - record.receivedOffset, record.length)])
+		return b''.join(parts)
+
+	def timestampAt(self, offset):
+		""" Get the time a received byte was received at, like
+		ByteStore.timestampAt.
+
+		Arguments
+		---------
+			offset (int) - offset of the byte.
+
+		Returns
+		---------
+			(int) - time.monotonic_ns() of the writer of the record holding the
+				byte, None if there's no such byte.
+		"""
+		if not 0 <= offset < self.receivedSize:
+			return None
+		for record in self.records(self.seekOffset(offset), headersOnly=True):
+			if record.kind == RECEIVED and record.receivedOffset + record.length > offset:
+				return record.timestamp
+
+	def records(self, start=0, headersOnly=False):
+		""" Iterate over the records, oldest first.
+
+		Optional
+		---------
+			start (int, default 0) - index entry to start from, see seekTime
+				and seekOffset.
+			headersOnly (bool, default False) - whether to skip reading the
+				payloads, which are None then, except for PORT records.
+
+		Yields
+		---------
+			(Record) - the records.
+		"""
+		if start > 0 and start < len(self.indexFileOffsets):
+			fileOffset = self.indexFileOffsets[start]
+			receivedOffset = self.indexReceivedOffsets[start]
+		else:
+			fileOffset = _FILE_HEADER.size
+			receivedOffset = 0
+		while fileOffset + _RECORD_HEADER.size <= self.size:
+			length, kind, portId, timestamp = _RECORD_HEADER.unpack_from(self.file, fileOffset)
+			payloadStart = fileOffset + _RECORD_HEADER.size
+			if payloadStart + length > self.size:
+				return # Cut short.
+			data = None
+			if not headersOnly or kind == PORT:
+				data = self.file[payloadStart:payloadStart + length]
+			yield Record(kind, portId, timestamp, data, fileOffset, receivedOffset, length)
+			fileOffset = payloadStart + length
+			if kind == RECEIVED:
+				receivedOffset += length
+
+	def seekTime(self, timestamp):
+		""" Find where to start reading the records to get to a time.
+
+		Arguments
+		---------
+			timestamp (int) - time.monotonic_ns() of the writer.
+
+		Returns
+		---------
+			(int) - index entry to pass to `records`, the records from it on
+				include the first one at or after the time.
+		"""
+		return max(bisect.bisect_left(self.indexTimes, timestamp) - 1, 0)
+
+	def seekOffset(self, receivedOffset):
+		""" Find where to start reading the records to get to a received byte.
+
+		Arguments
+		---------
+			receivedOffset (int) - number of bytes received before the byte.
+
+		Returns
+		---------
+			(int) - index entry to pass to `records`, the records from it on
+				include the one holding the byte.
+		"""
+		return max(bisect.bisect_right(self.indexReceivedOffsets, receivedOffset) - 1, 0)
+
+	def toWallClock(self, timestamp):
+		""" Convert a time.monotonic_ns() of the writer to the time.time() it
+		corresponds to [s]. """
+		return (timestamp + self.wallClockOffset)/1e9
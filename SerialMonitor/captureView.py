@@ -0,0 +1,182 @@
+#!/bin/env/python3
+
+import array, bisect, collections, threading
+
+import SerialMonitor.highlighter as highlighter
+
+_NON_ASCII_BYTES = bytes(range(128, 256)) # Dropped from the formatted lines.
+
+class CaptureLines(object):
+	""" Lines of the bytes received in a capture file, decoded only when
+	they're asked for, so that a view shows a capture of any size as quickly
+	as a small one. The lines are read like those of a scrollback.Scrollback,
+	so the same views can show them.
+
+	To find the lines, the number of line ends before every block of the
+	capture's index is counted in a background thread, started by `start`.
+	That takes 8 bytes per block of the index, and only the lines counted so
+	far can be read until it finishes. A line is then found by reading the
+	block it starts in, and the line starts of the last few blocks read are
+	cached, so that scrolling through them doesn't read them again.
+
+	Arguments
+	---------
+		reader (captureFile.CaptureReader) - the capture.
+
+	Optional
+	---------
+		outputFormat (string, default 'formatted') - 'formatted' to decode the
+			bytes as ASCII, dropping the invalid ones like LineFramer does, or
+			'raw' to show one character per byte.
+		sanitiser (sanitiser.Sanitiser, default None) - to clean the control
+			characters out of the lines, if given.
+		highlighter (highlighter.Highlighter, default None) - to colour the
+			lines, they're all highlighter.DEFAULT_COLOUR if None.
+		maxLineBytes (int, default 4096) - longest part of a line to decode,
+			so that a capture without line ends doesn't decode all at once.
+		cachedBlocks (int, default 16) - how many blocks to keep the line
+			starts of.
+
+	Raises
+	---------
+		ValueError - when the output format isn't supported.
+	"""
+
+	dropped = 0 # Nothing is ever dropped from a capture.
+
+	def __init__(self, reader, outputFormat='formatted', sanitiser=None, highlighter=None,
+			maxLineBytes=4096, cachedBlocks=16):
+		if outputFormat not in ['formatted', 'raw']:
+			raise ValueError("Requested output format {} not supported.".format(outputFormat))
+		self.reader = reader
+		self.outputFormat = outputFormat
+		self.sanitiser = sanitiser
+		self.highlighter = highlighter
+		self.maxLineBytes = maxLineBytes
+		self.cachedBlocks = cachedBlocks
+		self.blockCache = collections.OrderedDict() # Line starts by block, least recently used first.
+
+		# Offsets in the received bytes where the blocks start, and the number
+		# of line ends before them, with the totals at the end once counted.
+		self.blockOffsets = array.array('q', [0])
+		self.lineCounts = array.array('q', [0])
+		previousOffset = 0
+		for offset in reader.indexReceivedOffsets:
+			if offset > previousOffset: # Skip blocks without any received bytes.
+				self.blockOffsets.append(offset)
+				previousOffset = offset
+		if self.blockOffsets[-1] < reader.endOffset:
+			self.blockOffsets.append(reader.endOffset)
+
+		self.thread = threading.Thread(target=self._countLines, name='CaptureLines', daemon=True)
+		self.stopping = False
+
+	def start(self):
+		""" Start counting the lines in the background. """
+		self.thread.start()
+
+	def stop(self):
+		""" Stop counting the lines and wait for it. Do this before closing
+		the reader. """
+		self.stopping = True
+		if self.thread.is_alive():
+			self.thread.join()
+
+	@property
+	def counted(self):
+		""" Fraction of the capture in which the lines have been counted. """
+		if self.reader.endOffset == 0:
+			return 1.
+		return self.blockOffsets[len(self.lineCounts)-1]/self.reader.endOffset
+
+	def _countLines(self):
+		""" Count the line ends in every block, oldest first. """
+		for i in range(1, len(self.blockOffsets)):
+			if self.stopping:
+				return
+			lineEnds = self.reader.getBytes(self.blockOffsets[i-1], self.blockOffsets[i]).count(b'\n')
+			self.lineCounts.append(self.lineCounts[-1] + lineEnds)
+
+	def __len__(self):
+		""" Number of lines counted so far. The bytes after the last line end
+		make a line, too, once all of them have been counted. """
+		lines = self.lineCounts[-1]
+		if len(self.lineCounts) == len(self.blockOffsets) and self.reader.endOffset > 0:
+			if self.lineStart(lines) < self.reader.endOffset:
+				lines += 1
+		return lines
+
+	def _blockLineStarts(self, block):
+		""" Get the offsets just past the line ends in a block. """
+		if block in self.blockCache:
+			self.blockCache.move_to_end(block)
+			return self.blockCache[block]
+		start = self.blockOffsets[block]
+		dataStr = self.reader.getBytes(start, self.blockOffsets[block+1])
+		lineStarts = array.array('q')
+		lineEnd = dataStr.find(b'\n')
+		while lineEnd >= 0:
+			lineStarts.append(start + lineEnd + 1)
+			lineEnd = dataStr.find(b'\n', lineEnd + 1)
+		self.blockCache[block] = lineStarts
+		if len(self.blockCache) > self.cachedBlocks:
+			self.blockCache.popitem(last=False)
+		return lineStarts
+
+	def lineStart(self, index):
+		""" Get the offset of the first byte of a line. """
+		if index == 0:
+			return 0
+		# The block holding the line end before the line.
+		block = bisect.bisect_left(self.lineCounts, index) - 1
+		return self._blockLineStarts(block)[index - self.lineCounts[block] - 1]
+
+	def getBytes(self, index):
+		""" Get the bytes of a line without the line end, at most maxLineBytes
+		of them. """
+		if index < 0:
+			index += len(self)
+		if not 0 <= index < len(self):
+			raise IndexError('Capture line index out of range.')
+		start = self.lineStart(index)
+		if index < self.lineCounts[-1]:
+			stop = self.lineStart(index + 1) - 1 # Just before its line end.
+		else: # The last line, which has no line end.
+			stop = self.reader.endOffset
+		return self.reader.getBytes(start, min(stop, start + self.maxLineBytes))
+
+	def getText(self, index):
+		""" Get the decoded text of a line. """
+		dataStr = self.getBytes(index)
+		if self.outputFormat == 'formatted':
+			text = dataStr.translate(None, _NON_ASCII_BYTES).decode('ascii')
+		else:
+			text = dataStr.decode('latin-1')
+		if self.sanitiser is not None:
+			text = self.sanitiser.sanitise(text)
+		return text
+
+	def __getitem__(self, index):
+		""" Get a line as (text, colour) runs, 0 being the oldest line. """
+		text = self.getText(index)
+		if self.highlighter is None:
+			return [(text, highlighter.DEFAULT_COLOUR)] if text else []
+		return self.highlighter.highlight(text)
+
+	def lineAt(self, offset):
+		""" Get the index of the line holding a received byte, e.g. to show
+		the line a hex dump row is in. Only lines counted so far are found.
+
+		Arguments
+		---------
+			offset (int) - offset of the byte.
+
+		Returns
+		---------
+			(int) - index of the line.
+		"""
+		block = bisect.bisect_right(self.blockOffsets, offset, 0, len(self.lineCounts)) - 1
+		if block >= len(self.lineCounts) - 1:
+			return max(len(self) - 1, 0)
+		lineStarts = self._blockLineStarts(block)
+		return self.lineCounts[block] + bisect.bisect_right(lineStarts, offset)
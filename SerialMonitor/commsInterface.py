@@ -3,40 +3,134 @@
 import serial
 import sys
 import glob
-
-def getActivePorts():
-	""" Find the open serial ports and return as a list.
-
-	Main part of the code from:
-	http://stackoverflow.com/questions/12090503/listing-available-com-ports-with-python
-
-	Returns
-    -------
-    	(list) a list of strings denoting names of open ports.
-	"""
-
+import re
+import itertools
+import threading
+import queue
+import time
+
+# Byte values used to split received data into valid ASCII and the rest in
+# bulk, with bytes.translate, rather than looking at every byte in Python.
+_ASCII_BYTES = bytes(range(128))
+_NON_ASCII_BYTES = bytes(range(128, 256))
+_NON_ASCII_RE = re.compile(b'[\x80-\xff]')
+
+def _candidatePorts():
+	""" List the names of all the ports that might exist on this platform. """
 	if sys.platform.startswith('win'):
-		candidatePorts = ['COM' + str(i + 1) for i in range(256)]
+		return ['COM' + str(i + 1) for i in range(256)]
 
 	elif sys.platform.startswith('linux') or sys.platform.startswith('cygwin'):
-		candidatePorts = glob.glob('/dev/tty[A-Za-z]*')
+		return glob.glob('/dev/tty[A-Za-z]*')
 
 	elif sys.platform.startswith('darwin'):
-		candidatePorts = glob.glob('/dev/tty.*')
+		return glob.glob('/dev/tty.*')
 
 	else:
 		raise EnvironmentError('Unsupported platform')
 
-	ports = []
+def _probePort(port, results):
+	""" Try to open a port and put (port, True/False) in the results queue. """
+	try:
+		s = serial.Serial(port)
+		s.close()
+		results.put((port, True))
+	except (OSError, serial.SerialException):
+		results.put((port, False))
+
+def iterActivePorts(candidatePorts=None, timeout=1., maxWorkers=16):
+	""" Find the open serial ports and yield their names as soon as they're found.
+
+	The candidate ports are probed in parallel by a pool of daemon threads.
+	A probe that takes longer than `timeout`, e.g. because of a misbehaving
+	adapter, is abandoned and its thread replaced, so the remaining ports
+	don't wait for it.
+
+	Optional
+	---------
+		candidatePorts (list, default None) - names of the ports to probe. All
+			the ports that might exist on this platform if None.
+		timeout (float, default 1.) - longest time to wait for a single port [s].
+		maxWorkers (int, default 16) - number of ports probed at the same time.
+
+	Yields
+	---------
+		(string) - names of the open ports, in the order they were found.
+
+	Raises
+	---------
+		EnvironmentError - when the platform isn't supported.
+	"""
+	if candidatePorts is None:
+		candidatePorts = _candidatePorts()
+
+	todo = queue.Queue()
 	for port in candidatePorts:
+		todo.put(port)
+	results = queue.Queue() # (port, isOpen) tuples.
+	started = {} # time.monotonic() at which every probe has started, by port.
+
+	def probePorts():
+		while True:
+			try:
+				port = todo.get_nowait()
+			except queue.Empty:
+				return
+			started[port] = time.monotonic()
+			_probePort(port, results)
+
+	def startWorker():
+		threading.Thread(target=probePorts, name='PortProbe', daemon=True).start()
+
+	for i in range(min(maxWorkers, len(candidatePorts))):
+		startWorker()
+
+	finished = set()
+	abandoned = set()
+	while len(finished) + len(abandoned) < len(candidatePorts):
 		try:
-			s = serial.Serial(port)
-			s.close()
-			ports.append(port)
-		except (OSError, serial.SerialException):
+			port, isOpen = results.get(timeout=min(timeout, 0.05))
+			if port in abandoned:
+				continue # Too late, already given up on.
+			finished.add(port)
+			if isOpen:
+				yield port
+		except queue.Empty:
 			pass
 
-	return ports
+		# Give up on the ports that hang and let other threads take over.
+		now = time.monotonic()
+		for port, startTime in list(started.items()):
+			if port not in finished and port not in abandoned and now - startTime > timeout:
+				abandoned.add(port)
+				startWorker()
+
+def getActivePorts(candidatePorts=None, timeout=1., maxWorkers=16):
+	""" Find the open serial ports and return as a list.
+
+	Main part of the code from:
+	http://stackoverflow.com/questions/12090503/listing-available-com-ports-with-python
+
+	The ports are probed in parallel, see iterActivePorts. Use that to get
+	the ports as soon as they're found instead of waiting for all of them.
+
+	Optional
+	---------
+		candidatePorts (list, default None) - names of the ports to probe. All
+			the ports that might exist on this platform if None.
+		timeout (float, default 1.) - longest time to wait for a single port [s].
+		maxWorkers (int, default 16) - number of ports probed at the same time.
+
+	Returns
+    -------
+    	(list) a list of strings denoting names of open ports.
+	"""
+	if candidatePorts is None:
+		candidatePorts = _candidatePorts()
+
+	# Same order as the candidates, not as the probes happened to finish.
+	ports = set(iterActivePorts(candidatePorts, timeout, maxWorkers))
+	return [port for port in candidatePorts if port in ports]
 
 def checkConnection(port):
 	""" Check the serial port connection.
@@ -67,9 +161,369 @@ def checkConnection(port):
 	else:
 		return True
 
+class DecodeErrorSummary(object):
+	""" Compact summary of the errors encountered while decoding received bytes.
+
+	Rather than holding one entry per invalid byte, only counts the errors of
+	every type and keeps the first few of them as samples, so that a noisy
+	line or a wrong baud rate doesn't produce thousands of warnings.
+
+	Evaluates to False when no errors have been recorded, len() gives the total
+	number of errors.
+
+	Arguments
+	---------
+		maxSamples (int, default 8) - how many errors to keep the offset and
+			the value of the invalid byte for.
+	"""
+
+	def __init__(self, maxSamples=8):
+		self.maxSamples = maxSamples
+		self.counts = {} # Number of errors of every type, e.g. UnicodeDecodeError.
+		self.offsets = [] # Offsets of the first maxSamples invalid bytes.
+		self.samples = bytearray() # Values of the first maxSamples invalid bytes.
+		self.bytesChecked = 0 # Total number of bytes looked at, valid or not.
+
+	def __len__(self):
+		return sum(self.counts.values())
+
+	@property
+	def count(self):
+		""" (int) total number of errors of all types. """
+		return len(self)
+
+	@property
+	def rate(self):
+		""" (float) fraction of the checked bytes that were invalid. """
+		if self.bytesChecked == 0:
+			return 0.
+		return float(len(self))/self.bytesChecked
+
+	def addInvalidBytes(self, errorType, dataStr, startOffset, count):
+		""" Record all the invalid bytes found in one chunk of received data.
+
+		Arguments
+		---------
+			errorType (string) - type of the errors, e.g. UnicodeDecodeError.
+			dataStr (bytes) - the chunk with the invalid bytes in it.
+			startOffset (int) - offset of the first byte of dataStr in the
+				stream of received bytes.
+			count (int) - number of invalid bytes in dataStr.
+		"""
+		self.counts[errorType] = self.counts.get(errorType, 0) + count
+		# Only search for the positions of as many bytes as will be kept.
+		for match in itertools.islice(_NON_ASCII_RE.finditer(dataStr),
+				max(self.maxSamples-len(self.offsets), 0)):
+			self.offsets.append(startOffset+match.start())
+			self.samples.append(dataStr[match.start()])
+
+	def merge(self, other):
+		""" Add all the errors recorded in another summary to this one. """
+		for errorType in other.counts:
+			self.counts[errorType] = self.counts.get(errorType, 0) + other.counts[errorType]
+		free = max(self.maxSamples-len(self.offsets), 0)
+		self.offsets += other.offsets[:free]
+		self.samples += other.samples[:free]
+		self.bytesChecked += other.bytesChecked
+
+	def describe(self):
+		""" Describe all the recorded errors in one line of text.
+
+		Returns
+		---------
+			(string) - e.g. 'UnicodeDecodeError x3 (1.50% of 200 bytes), first
+				at offsets 12,40,77 with bytes 0x80:0xff:0xfe'
+		"""
+		text = ', '.join('{} x{}'.format(errorType, self.counts[errorType])
+			for errorType in sorted(self.counts))
+		text += ' ({:.2f}% of {} bytes)'.format(100.*self.rate, self.bytesChecked)
+		if self.offsets:
+			text += ', first at offsets {} with bytes {}'.format(
+				','.join(str(o) for o in self.offsets), formatHex(self.samples))
+		return text
+
+class LineFramer(object):
+	""" Split the bytes received from a serial port into complete lines.
+
+	Holds an incomplete line, which was received without its end-of-line
+	character ('\n'), between calls to `feed`. Only the newly arrived bytes are
+	searched for the end of line, so a device that sends long lines in many
+	small chunks doesn't cause the whole line to be re-scanned on every call.
+
+	Bytes that aren't valid ASCII (>=128) are discarded on arrival and reported
+	in a `DecodeErrorSummary`.
+
+	Arguments
+	---------
+		outputBuffer (string, default empty) - leftover contents of an
+			incomplete message to start with, e.g. `outputBuffer` returned by
+			`grabPortOutput`.
+	"""
+
+	def __init__(self, outputBuffer=""):
+		# Received bytes that haven't been passed on as a complete line yet.
+		self.buffer = bytearray(outputBuffer.encode('utf-8', 'surrogatepass'))
+		# Number of leading bytes in self.buffer known not to hold any EOLs
+		# that still need passing on. The initial outputBuffer is scanned on the
+		# first call to feed, in case it already contains complete lines.
+		self.scanned = 0
+		# Number of bytes fed to the framer so far, to tell where errors are.
+		self.received = 0
+
+	@property
+	def pending(self):
+		""" (string) the incomplete line currently held by the framer. """
+		return self.buffer.decode('utf-8', 'surrogatepass')
+
+	def clear(self):
+		""" Discard the incomplete line currently held by the framer. """
+		del self.buffer[:]
+		self.scanned = 0
+
+	def feed(self, dataStr):
+		""" Add the received bytes to the framer and get all the lines it can now
+		complete.
+
+		Arguments
+		---------
+			dataStr (bytes, bytearray or memoryview) - bytes received from the
+				serial port.
+
+		Returns
+		---------
+			(string) - all the complete lines, each terminated with '\n', or an
+				empty string if no line has been completed.
+			(DecodeErrorSummary) - summary of the invalid bytes, with their
+				offsets counted from the first byte fed to the framer.
+		"""
+		decodeErrors = DecodeErrorSummary()
+		decodeErrors.bytesChecked = len(dataStr)
+
+		# memoryview doesn't have the methods needed below.
+		if isinstance(dataStr, memoryview):
+			dataStr = dataStr.tobytes()
+
+		# Trying to decode the entire dataStr to ASCII will discard all the
+		# bytes contained therein even if only one of them is invalid. Thus,
+		# strip the invalid bytes (>=128) from dataStr and only then decode
+		# what's left in one go. Most chunks are pure ASCII and skip this.
+		if not dataStr.isascii():
+			# Sometimes rubbish gets fed to the serial port.
+			# Count the invalid bytes and remember where the first few were.
+			validBytes = dataStr.translate(None, _NON_ASCII_BYTES)
+			decodeErrors.addInvalidBytes('UnicodeDecodeError', dataStr,
+				self.received, len(dataStr)-len(validBytes))
+			self.received += len(dataStr)
+			dataStr = validBytes
+		else:
+			self.received += len(dataStr)
+		self.buffer += dataStr
+
+		# Extract any full lines - there can be more than one, depending on the
+		# loop frequencies on either side of the serial conneciton. All of them
+		# are passed on in one go, each still terminated with '\n'.
+		output = ""
+		lastEOL = self.buffer.rfind(b"\n", self.scanned)
+		# A lone EOL at the very start of the buffer isn't passed on until
+		# another line is completed, same as grabPortOutput always did.
+		if lastEOL > 0:
+			output = self.buffer[:lastEOL+1].decode('utf-8', 'surrogatepass')
+			# Keep the remaining output in buffer if there are no EOL characters
+			# in it. This is useful if only part of a message was received on last
+			# buffer update.
+			del self.buffer[:lastEOL+1]
+		self.scanned = len(self.buffer)
+
+		return output, decodeErrors
+
+def formatHex(dataStr, bytesPerLine=0, startOffset=None):
+	""" Format bytes as a string of their hex-codes, e.g. 0x00:0x01:0x0a.
+
+	By default, all the bytes are put in one line, which is what the 'hex'
+	output format has always shown. Optionally, the bytes can be split into
+	lines of a fixed length, each starting with the offset of its first byte.
+
+	NOTE 1 - there's a leading '0' for integers smaller than 0x0F+1=16.
+	         Need it to understand transmissions involving many bytes.
+	NOTE 2 - there will be no leading or trailing colon (':') in any line.
+
+	Arguments
+	---------
+		dataStr (bytes, bytearray or memoryview) - bytes to format.
+
+	Optional
+	---------
+		bytesPerLine (int, default 0) - how many bytes to put in every line.
+			Every line, including the last one, is then terminated with '\n'.
+			0 puts all bytes in one line without the '\n'.
+		startOffset (int, default None) - offset of the first byte in dataStr,
+			e.g. the number of bytes received before it. If given, every line
+			starts with the offset of its first byte, e.g. '0000001a: '.
+
+	Returns
+	---------
+		(string) - hex-codes of the bytes.
+	"""
+	# bytes.hex does all the work in C; all that's left is to add the '0x'
+	# prefixes, which is a single replace of the separators.
+	if bytesPerLine <= 0:
+		if startOffset is None:
+			return _hexCodes(dataStr)
+		bytesPerLine = max(len(dataStr), 1)
+
+	lines = []
+	for start in range(0, len(dataStr), bytesPerLine):
+		line = _hexCodes(dataStr[start:start+bytesPerLine])
+		if startOffset is not None:
+			line = '{:08x}: {}'.format(startOffset+start, line)
+		lines.append(line)
+	lines.append('') # Terminate the last line, too.
+	return '\n'.join(lines)
+
+def _hexCodes(dataStr):
+	""" Format all of dataStr as hex-codes separated with ':' in one line. """
+	if len(dataStr) == 0:
+		return ''
+	return '0x' + dataStr.hex(':').replace(':', ':0x')
+
+def formatPortOutput(dataStr, framer, outputFormat):
+	""" Format bytes received from a serial port into a string.
+
+	Support different formatting types, which depend on the supplied `outputFormat`
+	argument:
+	* raw - convert bytes into `str` (unicode), one character per byte,
+	* hex - convert all bytes into `str` containing hex-codes of the individual
+	  bytes, e.g. 0x00:0x01:0x0a,
+	* formatted - expect the bytes to contain end-of-line characters ('\n'),
+	  which will be used to split the bytes into lines. If the last line is
+	  incomplete, it will be held in `framer` until the rest of it arrives.
+	  For `hex` and `raw` formatting types, `framer` is not used.
+
+	Arguments
+	---------
+		dataStr (bytes, bytearray or memoryview) - bytes received from the
+			serial port. E.g. a memoryview of a preallocated buffer that the
+			bytes have been read into.
+		framer (LineFramer) - holds incomplete lines between the calls.
+		outputFormat (string) - chosen formatting type, must be one of
+			['formatted', 'raw', 'hex']
+
+	Returns
+	---------
+		(string) - formatted output.
+		(DecodeErrorSummary) - summary of the errors encountered. These should
+			be taken care of externally - this function tries its best not to
+			fall over.
+	"""
+
+	# will hold any errors encountered.
+	decodeErrors = DecodeErrorSummary()
+	# formatted output
+	output = ""
+
+	# Pass to the buffer and convert from binary array to \n-separated ASCII,
+	# unless the user desires to see the raw, undecoded output. In such case,
+	# don't expect end of line characters. Also allow the user to see the
+	# hex codes of the received bytes, not the corresponding unicode characters.
+
+	# Processed and (arguably) nicely formatted output.
+	if outputFormat == "formatted":
+		output, decodeErrors = framer.feed(dataStr)
+
+	# Raw but not formatted output.
+	elif outputFormat == "raw":
+		# Just print whatever came out of the serial port as a string.
+		# Converting dataStr to unicode used to sometimes skip characters
+		# (e.g. for 0x00) and the remaining parts of the dataStr.
+		# It would also cause UnicodeDecodeErrors, which were caught here and
+		# the wrong bytes were replaced with u'\uFFFD'. In Python 3, this is
+		# no longer necessary - all strings are unicode and the maximum range
+		# of unicode codes (0x10FFFF) can't be exceeded with a single byte.
+		# Mapping every byte to the unicode character with the same code, i.e.
+		# chr(c), is exactly what latin-1 decoding does, so do it in one go.
+		# latin-1 maps every byte, 0x00 included, to exactly one character and
+		# never fails. str() reads bytearray and memoryview without a copy.
+		output = str(dataStr, 'latin-1')
+
+	# Hex output.
+	else:
+		# Format every byte as a hex-code, e.g. 0x12 or 0x03, separated with ':'.
+		output = formatHex(dataStr)
+
+	return output, decodeErrors
+
+def readPortOutput(port, framer, outputFormat, readBuffer=None, store=None):
+	""" See if there is anything to read in the port and grab the outputs.
+
+	The calling part of the code is responsible for checking the status of the
+	connection. The grabbed output is formatted into a string, as described in
+	`formatPortOutput`, which can then be examined or parsed as needed.
+
+	Arguments
+	---------
+		port (serial.Serial) - instance of a port interface.
+		framer (LineFramer) - holds incomplete lines between the calls. Keep
+			passing the same instance for the same port to avoid data loss.
+		outputFormat (string) - chosen formatting type, must be one of
+			['formatted', 'raw', 'hex']
+
+	Optional
+	---------
+		readBuffer (bytearray, default None) - preallocated buffer to read the
+			bytes into, instead of allocating new bytes on every call. At most
+			len(readBuffer) bytes are read per call; the rest stays in the port
+			until the next call.
+		store (byteStore.ByteStore, default None) - where to keep the raw
+			bytes read, too, e.g. to show them in a hex dump later.
+
+	Returns
+	---------
+		(string) - formatted output from the serial port.
+		(DecodeErrorSummary) - summary of the errors encountered. These should
+			be taken care of externally - this function tries its best not to
+			fall over.
+
+	Raises
+	---------
+		ValueError - when supplied `outputFormat` is not supported.
+		TypeError - when `port` or `framer` are not of expected types
+		(serial.SerialBase and LineFramer, respectively).
+	"""
+
+	# Check requested formatting and other input types.
+	if outputFormat not in ['formatted', 'raw', 'hex']:
+		raise ValueError("Requested output format {} not supported.".format(outputFormat))
+
+	if not isinstance(port,serial.SerialBase):
+		raise TypeError('Expected port of type serial.serialposix.Serial,\
+		 got {} instead.'.format(type(port)))
+
+	if not isinstance(framer,LineFramer):
+		raise TypeError('Expected framer of type LineFramer, got {}\
+		 instead.'.format(type(framer)))
+
+	# if incoming bytes are waiting to be read from the serial input buffer
+	if (port.inWaiting() > 0):
+		if readBuffer is None:
+			# Read the bytes (dataStr is <class 'bytes'>).
+			dataStr = port.read(port.inWaiting())
+		else:
+			# Read into the buffer and only pass on the part that's been filled.
+			view = memoryview(readBuffer)
+			dataStr = view[:port.readinto(view[:port.inWaiting()])]
+		if store is not None:
+			store.append(dataStr)
+		return formatPortOutput(dataStr, framer, outputFormat)
+
+	return "", DecodeErrorSummary()
+
 def grabPortOutput(port, outputBuffer, outputFormat):
 	""" See if there is anything to read in the port and grab the outputs.
 
+	Kept for compatibility with code that keeps the incomplete lines in a
+	string - new code should keep a `LineFramer` and call `readPortOutput`,
+	which doesn't re-scan the incomplete line every time.
+
 	The calling part of the code is responsible for checking the status of the
 	connection. The grabbed output is formatted into a string which can then
 	be examined or parsed as needed.
@@ -107,11 +561,6 @@ def grabPortOutput(port, outputBuffer, outputFormat):
 		(serial.SerialBase and str, respectively).
 	"""
 
-	# will hold any warnings encountered.
-	warningSummary = {}
-	# formatted output
-	output = ""
-
 	# Check requested formatting and other input types.
 	if outputFormat not in ['formatted', 'raw', 'hex']:
 		raise ValueError("Requested output format {} not supported.".format(outputFormat))
@@ -124,74 +573,146 @@ def grabPortOutput(port, outputBuffer, outputFormat):
 		raise TypeError('Expected outputBuffer of type str, got {}\
 		 instead.'.format(type(outputBuffer)))
 
+	# will hold any warnings encountered.
+	warningSummary = {}
+	# formatted output
+	output = ""
+
 	# if incoming bytes are waiting to be read from the serial input buffer
 	if (port.inWaiting() > 0):
 		# Read the bytes (dataStr is <class 'bytes'>).
 		dataStr = port.read(port.inWaiting())
-
-		# Pass to the buffer and convert from binary array to \n-separated ASCII,
-		# unless the user desires to see the raw, undecoded output. In such case,
-		# don't expect end of line characters. Also allow the user to see the
-		# hex codes of the received bytes, not the corresponding unicode characters.
-
-		# Processed and (arguably) nicely formatted output.
-		if outputFormat == "formatted":
-			# Trying to decode the entire dataStr to ASCII will discard all the
-			# bytes contained therein even if only one of them is invalid. Thus,
-			# go through each byte in dataStr one by one.
-			for i in range(len(dataStr)): # Need the index of the bye to cast an error, if need be.
-				try:
-					if dataStr[i] < 128: # Valid ASCII character.
-						outputBuffer += chr(dataStr[i])
-					else: # Not in ASCII range. chr() will cope with this becuase
-						# it convers to Unicode, which has a larger range but here
-						# we specifically want ASCII.
-						raise UnicodeDecodeError('SM',dataStr,i,i+1,'Outside of ASCII range, i.e. >=128.')
-				except UnicodeDecodeError as uderr:
-					# Sometimes rubbish gets fed to the serial port.
-					# Log the error and the line that caused it. Include index
-					# of every error to keep track of all the encountered errors.
-					warningSummary['UnicodeDecodeError{}'.format(len(warningSummary))] = \
-					'UnicodeDecodeError :( with character:\n\t{}'.format(dataStr[i])
-
-			# Extract any full lines and log them - there can be more than
-			# one, depending on the loop frequencies on either side of the
-			# serial conneciton
-			lines = outputBuffer.rpartition("\n")
-			if lines[0]: # lines[0] = complete lines terminated with '\n'.
-				for line in lines[0].split("\n"):
-					output += "{}\n".format(line)
-
-				# Keep the remaining output in buffer if there are no EOL characters
-				# in it. This is useful if only part of a message was received on last
-				# buffer update.
-				outputBuffer = lines[2] # lines[2] = Remainder after the
-					# last '\n' and not terminated with '\n'.
-					# lines[1] = '\n'
-
-		# Raw but not formatted output.
-		elif outputFormat == "raw":
-			# Just print whatever came out of the serial port as a string.
-			# Converting dataStr to unicode used to sometimes skip characters
-			# (e.g. for 0x00) and the remaining parts of the dataStr.
-			# It would also cause UnicodeDecodeErrors, which were caught here and
-			# the wrong bytes were replaced with u'\uFFFD'. In Python 3, this is
-			# no longer necessary - all strings are unicode and the maximum range
-			# of unicode codes (0x10FFFF) can't be exceeded with a single byte.
-			for c in dataStr: # For every byte (dataStr is <class 'bytes'>)
-				output += chr(c) # Convert one byte at a time.
-
-		# Hex output.
-		else:
-			# Take one byte at a time from dataStr (<class 'bytes'>) and format
-			# it as a hex-code, e.g. 0x12 or 0x03. Iterating over dataStr will
-			# produce single integers (<class 'int'>). Separate consecutive bytes
-			# with ':'.
-			# NOTE 1 - there's a leading '0' for integers smaller than 0x0F+1=16.
-			#          Need it to understand transmissions involving many bytes.
-			# NOTE 2 - because we process one byte at a time, endian doesn't matter;
-			#          big or small will yield the same *single* byte.
-			# NOTE 3 - there will be no leading or trailing colon (':').
-			output = ':'.join('0x'+c.to_bytes(1,'big',signed=False).hex() for c in dataStr)
+		framer = LineFramer(outputBuffer)
+		output, decodeErrors = formatPortOutput(dataStr, framer, outputFormat)
+
+		if decodeErrors:
+			# Log every invalid byte, in the order they were received.
+			# Include index of every error to keep track of all the
+			# encountered errors.
+			for badByte in dataStr.translate(None, _ASCII_BYTES):
+				warningSummary['UnicodeDecodeError{}'.format(len(warningSummary))] = \
+				'UnicodeDecodeError :( with character:\n\t{}'.format(badByte)
 #TODO for raw and hex output, outputBuffer makes no sense.
+		if outputFormat == "formatted":
+			outputBuffer = framer.pending
+
 	return output, outputBuffer, warningSummary
+
+class PortReader(threading.Thread):
+	""" Read a serial port in a background thread and hand the received bytes
+	over to another thread, e.g. the GUI, through a bounded queue.
+
+	The thread blocks on the port with a short timeout, so the bytes are taken
+	out of the OS buffer as soon as they arrive, no matter how busy the consumer
+	is. Every chunk is stamped with time.monotonic_ns() at the time it was read.
+
+	The consumer is notified with `onData` when new chunks are available. It's
+	called from the reader thread, so it should only schedule the processing,
+	e.g. with wx.CallAfter, and then call `getChunks`. It isn't called again
+	until the consumer has called `getChunks`, no matter how many chunks arrive.
+
+	If reading the port fails, the thread stores the exception in `error`,
+	calls `onData` and stops.
+
+	Arguments
+	---------
+		port (serial.Serial) - instance of a port interface. Its timeout is
+			changed to `readTimeout`.
+
+	Optional
+	---------
+		onData (callable, default None) - called without any arguments when
+			new chunks or an error are waiting for the consumer.
+		maxChunks (int, default 1024) - size of the queue. When it's full,
+			the reader stops reading until the consumer catches up and the
+			bytes wait in the OS buffer instead.
+		readTimeout (float, default 0.05) - how long to block on the port
+			waiting for data [s]. Also the longest time `stop` can take.
+	"""
+
+	def __init__(self, port, onData=None, maxChunks=1024, readTimeout=0.05):
+		threading.Thread.__init__(self, name='PortReader({})'.format(port.name))
+		self.daemon = True # Don't keep the application alive.
+		self.port = port
+		self.onData = onData
+		self.readTimeout = readTimeout
+		self.chunks = queue.Queue(maxChunks) # (monotonic_ns, bytes) tuples.
+		self.error = None # Exception that stopped the reader, if any.
+		# Only ever changed by the reader and the consumer thread, respectively.
+		self.bytesRead = 0
+		self.bytesTaken = 0
+		self._stopRequested = threading.Event()
+		self._notified = threading.Event() # Set until the consumer gets the chunks.
+
+	def run(self):
+		""" Keep reading the port until stopped or the port fails. """
+		try:
+			self.port.timeout = self.readTimeout
+			while not self._stopRequested.is_set():
+				# Block until at least one byte arrives, then take all there is.
+				dataStr = self.port.read(max(1, self.port.inWaiting()))
+				if dataStr:
+					self.bytesRead += len(dataStr)
+					self._put((time.monotonic_ns(), dataStr))
+		except (serial.SerialException, OSError, TypeError, ValueError) as err:
+			# TypeError and ValueError come out of pySerial when the port gets
+			# closed while a read is in progress.
+			if not self._stopRequested.is_set():
+				self.error = err
+				self._notify()
+
+	def _put(self, chunk):
+		""" Pass a chunk to the consumer, waiting for space in the queue. """
+		while not self._stopRequested.is_set():
+			try:
+				self.chunks.put(chunk, timeout=self.readTimeout)
+				self._notify()
+				return
+			except queue.Full:
+				pass
+
+	def _notify(self):
+		""" Tell the consumer there's something waiting, once per getChunks. """
+		if not self._notified.is_set():
+			self._notified.set()
+			if self.onData is not None:
+				self.onData()
+
+	def getChunks(self):
+		""" Take all the chunks read so far.
+
+		Returns
+		---------
+			(list) - (monotonic_ns, bytes) tuples with the time every chunk
+				was read at and its contents, oldest first.
+		"""
+		# Clear first, so that a chunk added while draining triggers onData.
+		self._notified.clear()
+		chunks = []
+		while True:
+			try:
+				chunks.append(self.chunks.get_nowait())
+			except queue.Empty:
+				self.bytesTaken += sum(len(dataStr) for timestamp, dataStr in chunks)
+				return chunks
+
+	def backlog(self):
+		""" Get the number of bytes waiting for the consumer: read but not
+		taken with `getChunks` yet, and still in the port's OS buffer.
+
+		Returns
+		---------
+			(int) - the bytes waiting.
+		"""
+		try:
+			waiting = self.port.inWaiting()
+		except (serial.SerialException, OSError, TypeError, ValueError): # E.g. closed.
+			waiting = 0
+		return self.bytesRead - self.bytesTaken + waiting
+
+	def stop(self):
+		""" Stop reading and wait for the thread to finish. Chunks that have
+		been read but not taken with `getChunks` are still available. """
+		self._stopRequested.set()
+		if self.is_alive() and threading.current_thread() is not self:
+			self.join()
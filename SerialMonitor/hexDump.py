@@ -0,0 +1,85 @@
+#!/bin/env/python3
+
+DEFAULT_COLOUR = (0,0,0) # Colour of the rows.
+
+# Printable ASCII stays as it is in the ASCII column, everything else is '.'.
+_ASCII_TABLE = bytes(c if 0x20 <= c < 0x7f else ord('.') for c in range(256))
+
+def formatHexDumpRow(dataStr, offset, bytesPerRow=16, skip=0):
+	""" Format bytes as one row of a classic hex dump, e.g.
+	'00000010  48 65 6c 6c 6f 0a                                 |Hello.|'
+
+	Arguments
+	---------
+		dataStr (bytes, bytearray or memoryview) - bytes in the row, at most
+			bytesPerRow - skip of them.
+		offset (int) - offset of the start of the row.
+
+	Optional
+	---------
+		bytesPerRow (int, default 16) - width of the row in bytes.
+		skip (int, default 0) - how many bytes at the start of the row are
+			missing, e.g. because they've been dropped. Blanks are shown
+			in their place to keep the columns aligned.
+
+	Returns
+	---------
+		(string) - the row, without an end of line character.
+	"""
+	hexCodes = '   '*skip + dataStr.hex(' ')
+	ascii = ' '*skip + bytes(dataStr).translate(_ASCII_TABLE).decode('ascii')
+	return '{:08x}  {:<{width}}  |{}|'.format(offset, hexCodes, ascii, width=3*bytesPerRow-1)
+
+class HexDump(object):
+	""" Rows of a hex dump of the bytes kept in a ByteStore, formatted only
+	when they're asked for. Nothing but the raw bytes is kept, so showing
+	a large capture costs no more than showing a small one.
+
+	The rows are read like the lines of a scrollback.Scrollback, so the same
+	views can show either of them.
+
+	Arguments
+	---------
+		store (byteStore.ByteStore) - where the bytes are kept.
+
+	Optional
+	---------
+		bytesPerRow (int, default 16) - how many bytes to show in every row.
+		colour (int tuple, len=3, default=(0,0,0)) - RGB colour of the rows.
+	"""
+
+	def __init__(self, store, bytesPerRow=16, colour=DEFAULT_COLOUR):
+		self.store = store
+		self.bytesPerRow = bytesPerRow
+		self.colour = colour
+
+	@property
+	def firstRow(self):
+		""" Index of the first row kept, counting from offset 0. """
+		return self.store.startOffset//self.bytesPerRow
+
+	@property
+	def dropped(self):
+		""" Number of rows dropped since the start or clear. """
+		return self.firstRow
+
+	def __len__(self):
+		if len(self.store) == 0:
+			return 0
+		return -(-self.store.endOffset//self.bytesPerRow) - self.firstRow
+
+	def __getitem__(self, index):
+		""" Get the row as a single (text, colour) run, 0 being the oldest row
+		kept. """
+		return ((self.getText(index), self.colour),)
+
+	def getText(self, index):
+		""" Get the text of a row. """
+		if index < 0:
+			index += len(self)
+		if not 0 <= index < len(self):
+			raise IndexError('Hex dump row index out of range.')
+		offset = (self.firstRow + index)*self.bytesPerRow
+		skip = max(self.store.startOffset - offset, 0)
+		return formatHexDumpRow(self.store.getBytes(offset, offset + self.bytesPerRow),
+			offset, self.bytesPerRow, skip)
@@ -0,0 +1,248 @@
+#!/bin/env/python3
+
+import collections, re
+
+DEFAULT_COLOUR = (0,0,0) # Colour of the text that no rule matches.
+
+# A highlighting rule: text matching the regex `pattern` is shown in `colour`,
+# an RGB int tuple, in bold if `bold`. If `line`, the whole line holding the
+# match is highlighted, not just the match.
+Rule = collections.namedtuple('Rule', ['pattern', 'colour', 'bold', 'line'])
+
+_GLOBAL_FLAGS = re.compile(r'\(\?([aiLmsux]+)\)') # E.g. (?i) at the start of a pattern.
+_BACKREFERENCE = re.compile(r'\\[1-9]|\(\?P=|\(\?\(') # \1, (?P=name) or (?(1)yes|no).
+
+class Style(collections.namedtuple('Style', ['red', 'green', 'blue', 'bold'])):
+	""" Colour of highlighted text, which can be used wherever an RGB tuple
+	can, with the font weight on top. """
+
+	@property
+	def colour(self):
+		""" RGB int tuple of the colour. """
+		return (self.red, self.green, self.blue)
+
+def parseRules(text):
+	""" Read highlighting rules, one per line, e.g.
+		#ff0000,bold ERROR
+		#808080,line ^heartbeat
+	i.e. the colour, optionally followed by ',bold' and/or ',line', a space,
+	and the regex. Empty lines and lines starting with '//' are skipped.
+
+	Arguments
+	---------
+		text (string) - the rules.
+
+	Returns
+	---------
+		(list) - the Rules.
+
+	Raises
+	---------
+		ValueError - when a line isn't a valid rule.
+	"""
+	rules = []
+	for lineNo, line in enumerate(text.splitlines()):
+		line = line.strip()
+		if not line or line.startswith('//'):
+			continue
+		options, _, pattern = line.partition(' ')
+		options = options.split(',')
+		colour = options[0]
+		if not re.fullmatch('#[0-9a-fA-F]{6}', colour) or not pattern.strip():
+			raise ValueError('Expected "#rrggbb[,bold][,line] regex" in line {}, got {!r}.'.format(
+				lineNo+1, line))
+		for option in options[1:]:
+			if option not in ['bold', 'line']:
+				raise ValueError('Unknown option {!r} in line {}.'.format(option, lineNo+1))
+		try:
+			re.compile(pattern.strip())
+		except re.error as reError:
+			raise ValueError('Invalid regex in line {}: {}.'.format(lineNo+1, reError))
+		rules.append(Rule(pattern.strip(), tuple(int(colour[i:i+2], 16) for i in (1, 3, 5)),
+			'bold' in options, 'line' in options))
+	try:
+		combinePatterns([rule.pattern for rule in rules])
+	except re.error as reError:
+		raise ValueError('The rules cannot be combined into one regex: {}.'.format(reError))
+	return rules
+
+def _scopeFlags(pattern):
+	""" Turn the global inline flags at the start of a pattern, e.g. (?i),
+	into a group that applies them to the pattern only, e.g. (?i:...), so
+	that the pattern can be put anywhere in a larger regex. """
+	flags = ''
+	pos = 0
+	match = _GLOBAL_FLAGS.match(pattern)
+	while match is not None:
+		flags += match.group(1)
+		pos = match.end()
+		match = _GLOBAL_FLAGS.match(pattern, pos)
+	if not flags:
+		return pattern
+	# A comment at the end of a verbose pattern would swallow the bracket.
+	return '(?{}:{}{})'.format(flags, pattern[pos:], '\n' if 'x' in flags else '')
+
+def combinePatterns(patterns):
+	""" Compile regexes into one that matches wherever any of them does, an
+	alternation of all of them, each in a group without a number.
+
+	Patterns that refer to their own groups can't be combined, because their
+	groups get other numbers in the alternation, and nor can those that use
+	the same group names.
+
+	Arguments
+	---------
+		patterns (list) - regex strings, each valid on its own.
+
+	Returns
+	---------
+		(re.Pattern) - the combined regex, compiled with re.MULTILINE, or None
+			if there are no patterns or they can't be combined.
+
+	Raises
+	---------
+		re.error - when the combined regex is invalid anyway.
+	"""
+	if not patterns:
+		return None
+	groupNames = set()
+	for pattern in patterns:
+		compiled = re.compile(pattern)
+		if compiled.groups > 0 and _BACKREFERENCE.search(pattern):
+			return None
+		if groupNames & compiled.groupindex.keys():
+			return None
+		groupNames.update(compiled.groupindex)
+	return re.compile('|'.join('(?:{})'.format(_scopeFlags(pattern)) for pattern in patterns),
+		re.MULTILINE)
+
+def formatRules(rules):
+	""" Write rules the way parseRules reads them. """
+	lines = []
+	for rule in rules:
+		options = '#{:02x}{:02x}{:02x}'.format(*rule.colour)
+		if rule.bold:
+			options += ',bold'
+		if rule.line:
+			options += ',line'
+		lines.append('{} {}'.format(options, rule.pattern))
+	return '\n'.join(lines)
+
+class Highlighter(object):
+	""" Split text into runs of the styles given by highlighting rules.
+
+	All the rules are compiled into one regex, an alternation of all their
+	patterns, so the text is scanned once however many rules there are. The
+	alternatives have no groups of their own, which would stop the regex
+	engine from skipping quickly to where a match can start. The rule that
+	matched is only worked out for the matches, which are few. Rules that
+	can't be combined, see combinePatterns, are all searched for one by one
+	instead.
+
+	Where several rules match, the one matching first in the text wins, and
+	the one listed first if they start at the same place. A line rule takes
+	over the whole line, also the matches of other rules earlier in it.
+
+	Optional
+	---------
+		rules (list, default empty) - Rules to apply, in order of priority.
+		colour (int tuple, len=3, default=(0,0,0)) - RGB colour of the text
+			that no rule matches.
+
+	Raises
+	---------
+		re.error - when a rule's pattern is not a valid regex.
+	"""
+
+	def __init__(self, rules=(), colour=DEFAULT_COLOUR):
+		self.rules = list(rules)
+		self.colour = colour
+		self.styles = [Style(*rule.colour, bold=rule.bold) for rule in self.rules]
+		self.patterns = [re.compile(rule.pattern, re.MULTILINE) for rule in self.rules]
+		self.regex = combinePatterns([rule.pattern for rule in self.rules])
+
+	def highlight(self, text):
+		""" Split text into runs of the same style.
+
+		Arguments
+		---------
+			text (string) - text to highlight, may hold any number of lines.
+
+		Returns
+		---------
+			(list) - (text, colour) tuples, colour being the default RGB tuple
+				or a Style of a rule.
+		"""
+		if not self.rules or not text:
+			return [(text, self.colour)] if text else []
+
+		highlighted = [] # (start, end, style) of the highlighted text.
+		# The next match of every rule, when they aren't combined.
+		nextMatches = None if self.regex is not None else [pattern.search(text) for pattern in self.patterns]
+		pos = 0
+		while True:
+			found = self._search(text, pos, nextMatches)
+			if found is None:
+				break
+			start, end, i = found
+			if start == end:
+				pos = end + 1 # Nothing to highlight in an empty match.
+				if pos > len(text):
+					break
+				continue
+
+			if self.rules[i].line:
+				start = text.rfind('\n', 0, start) + 1
+				end = text.find('\n', end - 1) + 1 or len(text)
+				while highlighted and highlighted[-1][0] >= start:
+					highlighted.pop()
+				if highlighted and highlighted[-1][1] > start:
+					highlighted[-1] = (highlighted[-1][0], start, highlighted[-1][2])
+			highlighted.append((start, end, self.styles[i]))
+			pos = end
+
+		runs = []
+		pos = 0
+		for start, end, style in highlighted:
+			if start > pos:
+				runs.append((text[pos:start], self.colour))
+			runs.append((text[start:end], style))
+			pos = end
+		if pos < len(text):
+			runs.append((text[pos:], self.colour))
+		return runs
+
+	def _search(self, text, pos, nextMatches):
+		""" Find the first match of any rule from `pos` on.
+
+		Arguments
+		---------
+			text (string) - text being highlighted.
+			pos (int) - where to start looking.
+			nextMatches (list) - the last match of every rule found in the
+				text, None where there are no more. Updated if found before
+				`pos`. Only used if the rules aren't combined.
+
+		Returns
+		---------
+			(tuple) - start and end of the match and the index of its rule,
+				or None if nothing matches.
+		"""
+		if self.regex is not None:
+			match = self.regex.search(text, pos)
+			if match is None:
+				return None
+			# The first rule that matches here is the one the alternation chose.
+			for i, pattern in enumerate(self.patterns):
+				if pattern.match(text, match.start()) is not None:
+					break
+			return match.start(), match.end(), i
+
+		found = None
+		for i, pattern in enumerate(self.patterns):
+			match = nextMatches[i]
+			if match is not None and match.start() < pos: # Overlapped by an earlier match.
+				match = nextMatches[i] = pattern.search(text, pos)
+			if match is not None and (found is None or match.start() < found[0]):
+				found = (match.start(), match.end(), i)
+		return found
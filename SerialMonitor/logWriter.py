@@ -0,0 +1,143 @@
+#!/bin/env/python3
+
+import logging
+import logging.handlers
+import queue
+import threading
+import time
+
+MIN_FLUSH_INTERVAL = 0.01 # Shortest flushInterval worth setting [s].
+
+class _DeferredFlushMixin(object):
+	""" Write records to the stream without flushing it after every one, the
+	BatchingQueueListener flushes it every so often instead. """
+
+	def emit(self, record):
+		try:
+			self.stream.write(self.format(record) + self.terminator)
+		except Exception:
+			self.handleError(record)
+
+class DeferredFlushStreamHandler(_DeferredFlushMixin, logging.StreamHandler):
+	""" logging.StreamHandler that leaves flushing to a BatchingQueueListener. """
+
+class DeferredFlushFileHandler(_DeferredFlushMixin, logging.FileHandler):
+	""" logging.FileHandler that leaves flushing to a BatchingQueueListener. """
+
+	def emit(self, record):
+		if self.stream is None: # The file is opened with the first record.
+			self.stream = self._open()
+		_DeferredFlushMixin.emit(self, record)
+
+class _HandlerRemoval(object):
+	""" Put in the queue by BatchingQueueListener.removeHandler, so that the
+	handler is only removed once the records before it have been handled. """
+
+	def __init__(self, handler):
+		self.handler = handler
+		self.done = threading.Event() # Set once the handler has been closed.
+
+class BatchingQueueListener(logging.handlers.QueueListener):
+	""" Take log records out of a queue in a background thread and pass them to
+	the handlers, so that formatting and writing the records doesn't hold up
+	the thread that logs them. A logging.handlers.QueueHandler should put the
+	records in the queue.
+
+	All the records waiting in the queue are handled in one go, and then the
+	handlers are flushed, at most once every `flushInterval`. While there's
+	nothing to flush the thread waits for the next record without a timeout,
+	so an idle listener doesn't wake up at all. Handlers that
+	flush after every record, e.g. logging.StreamHandler, still do that, so
+	use DeferredFlushStreamHandler and DeferredFlushFileHandler instead.
+
+	Handlers can be added and removed while the listener is running. A
+	handler that's removed still gets all the records logged before. When
+	stopped, the records still in the queue are handled and the handlers are
+	flushed before the thread finishes.
+
+	Arguments
+	---------
+		queue (queue.Queue or queue.SimpleQueue) - where the records are put.
+		handlers (logging.Handler) - where to pass the records. Their levels
+			are respected.
+
+	Optional
+	---------
+		flushInterval (float, default 1.) - longest time the records can wait
+			in the handlers before being flushed [s].
+	"""
+
+	def __init__(self, queue, *handlers, flushInterval=1.):
+		logging.handlers.QueueListener.__init__(self, queue, *handlers, respect_handler_level=True)
+		self.flushInterval = flushInterval
+		self.lock = threading.Lock() # Guards the handlers while records are handled.
+		self.lastFlush = time.monotonic()
+		self.unflushed = False # Whether records have been handled since the last flush.
+
+	def addHandler(self, handler):
+		""" Start passing the records to another handler. """
+		with self.lock:
+			self.handlers = self.handlers + (handler,)
+
+	def removeHandler(self, handler):
+		""" Stop passing the records to a handler, and flush and close it. Waits
+		for the records already in the queue to be handled first, so that the
+		handler gets all of them. """
+		removal = _HandlerRemoval(handler)
+		if self._thread is None: # Not running, nothing more will be handled.
+			self._removeHandler(removal)
+			return
+		self.queue.put(removal)
+		removal.done.wait()
+
+	def _removeHandler(self, removal):
+		""" Remove, flush and close the handler of a _HandlerRemoval. """
+		with self.lock:
+			self.handlers = tuple(h for h in self.handlers if h is not removal.handler)
+		removal.handler.flush()
+		removal.handler.close()
+		removal.done.set()
+
+	def flush(self):
+		""" Flush all the handlers. """
+		with self.lock:
+			for handler in self.handlers:
+				handler.flush()
+		self.lastFlush = time.monotonic()
+		self.unflushed = False
+
+	def _monitor(self):
+		""" Handle the records in batches until the sentinel arrives. """
+		while True:
+			records = []
+			try:
+				if self.unflushed: # Wake up when the flush is due.
+					timeout = max(self.lastFlush + self.flushInterval - time.monotonic(), 0.)
+					records.append(self.queue.get(timeout=timeout))
+				else:
+					records.append(self.queue.get())
+				while True: # Take all there is.
+					records.append(self.queue.get_nowait())
+			except queue.Empty:
+				pass
+
+			stop = False
+			removals = []
+			with self.lock:
+				for record in records:
+					if record is self._sentinel:
+						stop = True
+						break
+					if isinstance(record, _HandlerRemoval):
+						# Only this handler needs flushing, so leave the rest.
+						self.handlers = tuple(h for h in self.handlers if h is not record.handler)
+						removals.append(record)
+						continue
+					self.handle(record)
+					self.unflushed = True
+			for removal in removals:
+				self._removeHandler(removal)
+			if stop or (self.unflushed and time.monotonic() - self.lastFlush >= self.flushInterval):
+				self.flush()
+			if stop:
+				break
@@ -0,0 +1,139 @@
+#!/bin/env/python3
+
+import time
+
+STAGES = ['read', 'sanitise', 'render'] # Stages of the pipeline that are timed.
+
+class _StageTimer(object):
+	""" Context manager that adds the time spent in its block to a stage. """
+
+	def __init__(self, stats, stage):
+		self.stats = stats
+		self.stage = stage
+
+	def __enter__(self):
+		self.start = time.perf_counter_ns()
+
+	def __exit__(self, *excInfo):
+		self.stats.addTime(self.stage, time.perf_counter_ns() - self.start)
+
+class PipelineStats(object):
+	""" Counters of the data flowing through the monitor, to tell where it's
+	struggling when data seem to be dropped. Everything is a plain counter
+	updated in place, so they can be kept on all the time.
+
+	Data are counted when they're received from the port (in) and sent to
+	it (out). The time spent in every stage of the pipeline (see STAGES) is
+	added up, and the time spent in a tick, i.e. one pass of the pipeline
+	over the data received since the last one, is compared with the budget
+	the tick had. Ticks that took longer are counted as overruns.
+
+	Rates are worked out by `snapshot` over the time since the last call,
+	so call it regularly, e.g. once a second.
+
+	Counters should only be updated from one thread, e.g. the GUI thread.
+	"""
+
+	def __init__(self):
+		self.reset()
+
+	def reset(self):
+		""" Start counting again from zero. """
+		self.bytesIn = 0
+		self.linesIn = 0
+		self.bytesOut = 0
+		self.linesOut = 0
+		self.decodeErrors = 0
+		self.maxBacklog = 0 # Most bytes waiting at the start of a tick.
+		self.ticks = 0
+		self.overruns = 0
+		self.tickTime = 0 # Time spent in the current tick so far [ns].
+		self.maxTickTime = 0 # [ns]
+		self.stageTimes = dict((stage, 0) for stage in STAGES) # [ns]
+		self.stageCalls = dict((stage, 0) for stage in STAGES)
+		self.startTime = time.monotonic()
+		self._last = (self.startTime, 0, 0, 0, 0) # Time and counters at the last snapshot.
+
+	def addReceived(self, nBytes, nLines=0):
+		""" Count data received from the port. """
+		self.bytesIn += nBytes
+		self.linesIn += nLines
+
+	def addSent(self, nBytes, nLines=1):
+		""" Count data sent to the port. """
+		self.bytesOut += nBytes
+		self.linesOut += nLines
+
+	def addBacklog(self, nBytes):
+		""" Record how many bytes were waiting to be processed. """
+		if nBytes > self.maxBacklog:
+			self.maxBacklog = nBytes
+
+	def addDecodeErrors(self, count):
+		""" Count bytes that couldn't be decoded. """
+		self.decodeErrors += count
+
+	def addTime(self, stage, duration):
+		""" Add time spent in a stage [ns] to it and to the current tick. """
+		self.stageTimes[stage] += duration
+		self.stageCalls[stage] += 1
+		self.tickTime += duration
+
+	def time(self, stage):
+		""" Time a block of code as a stage, e.g.
+			with stats.time('sanitise'):
+				...
+		"""
+		return _StageTimer(self, stage)
+
+	def endTick(self, budget):
+		""" Finish the current tick, which overran if it took longer than the
+		budget [ns]. """
+		self.ticks += 1
+		if self.tickTime > budget:
+			self.overruns += 1
+		if self.tickTime > self.maxTickTime:
+			self.maxTickTime = self.tickTime
+		self.tickTime = 0
+
+	def snapshot(self):
+		""" Get all the statistics, with the rates since the last snapshot.
+
+		Returns
+		---------
+			(dict) - the counters, the rates [1/s] under the keys ending with
+				'PerS', the decode error rate [errors per byte received], and
+				the mean time per call of every stage under 'stageMs' [ms].
+		"""
+		now = time.monotonic()
+		lastTime, lastBytesIn, lastLinesIn, lastBytesOut, lastLinesOut = self._last
+		elapsed = max(now - lastTime, 1e-9)
+		self._last = (now, self.bytesIn, self.linesIn, self.bytesOut, self.linesOut)
+		return {
+			'uptimeS': now - self.startTime,
+			'bytesIn': self.bytesIn,
+			'linesIn': self.linesIn,
+			'bytesOut': self.bytesOut,
+			'linesOut': self.linesOut,
+			'bytesInPerS': (self.bytesIn - lastBytesIn)/elapsed,
+			'linesInPerS': (self.linesIn - lastLinesIn)/elapsed,
+			'bytesOutPerS': (self.bytesOut - lastBytesOut)/elapsed,
+			'linesOutPerS': (self.linesOut - lastLinesOut)/elapsed,
+			'maxBacklog': self.maxBacklog,
+			'decodeErrors': self.decodeErrors,
+			'decodeErrorRate': self.decodeErrors/self.bytesIn if self.bytesIn else 0.,
+			'ticks': self.ticks,
+			'overruns': self.overruns,
+			'maxTickMs': self.maxTickTime/1e6,
+			'stageMs': dict((stage, self.stageTimes[stage]/1e6/self.stageCalls[stage]
+				if self.stageCalls[stage] else 0.) for stage in STAGES),
+		}
+
+def describe(snapshot):
+	""" Format a snapshot as a few short lines of text, e.g. for a panel. """
+	return ('In: {bytesInPerS:.0f} B/s, {linesInPerS:.1f} lines/s, {bytesIn} B total\n'
+		'Out: {bytesOutPerS:.0f} B/s, {linesOutPerS:.1f} lines/s, {bytesOut} B total\n'
+		'Max backlog: {maxBacklog} B, decode errors: {decodeErrors} ({rate:.3f}%)\n'
+		'Per tick: read {read:.2f} ms, sanitise {sanitise:.2f} ms, render {render:.2f} ms\n'
+		'Ticks: {ticks}, overran: {overruns}, longest: {maxTickMs:.1f} ms').format(
+		rate=100.*snapshot['decodeErrorRate'], **dict(snapshot, **snapshot['stageMs']))
@@ -0,0 +1,100 @@
+#!/bin/env/python3
+
+import time
+
+class PollScheduler(object):
+	""" Decide how long to wait before reading the port again.
+
+	With the 'fixed' policy, the port is read every `maxDelay`, like it used
+	to be with a single read delay.
+
+	With the 'adaptive' policy, the delay follows the data. When bytes are
+	waiting, the rate at which they've been arriving is estimated from how
+	many there are and how long it's been since the last read. The next read
+	is then scheduled for when about `targetBytes` more will have arrived, and
+	always before the port's buffer could fill up at the baud rate. When no
+	bytes are waiting, the delay grows by a factor of `backoff`. Either way,
+	it stays between `minDelay` and `maxDelay`.
+
+	Optional
+	---------
+		minDelay (int, default 10) - shortest delay between reads [ms].
+		maxDelay (int, default 1000) - longest delay between reads [ms].
+		policy (string, default 'adaptive') - one of ['fixed', 'adaptive']
+		baudRate (int, default 19200) - baud rate of the port [bit/s].
+		bufferSize (int, default 4096) - size of the port's receive buffer
+			[bytes]. Reads are scheduled before half of it would be filled.
+		targetBytes (int, default 256) - how many bytes to aim to read at a time.
+		backoff (float, default 2.) - factor by which to grow the delay while
+			the line is idle.
+
+	Raises
+	---------
+		ValueError - when the policy isn't supported or the delays are wrong.
+	"""
+
+	def __init__(self, minDelay=10, maxDelay=1000, policy='adaptive', baudRate=19200,
+			bufferSize=4096, targetBytes=256, backoff=2.):
+		if policy not in ['fixed', 'adaptive']:
+			raise ValueError("Requested polling policy {} not supported.".format(policy))
+		self.policy = policy
+		self.baudRate = baudRate
+		self.bufferSize = bufferSize
+		self.targetBytes = targetBytes
+		self.backoff = backoff
+		self.setBounds(minDelay, maxDelay)
+		self.lastUpdate = None # time.monotonic() of the last read.
+
+	def setBounds(self, minDelay, maxDelay):
+		""" Change the bounds of the delay [ms] and start again from the shortest
+		delay, to catch up quickly if data are flowing.
+
+		Raises
+		---------
+			ValueError - when minDelay isn't positive or is above maxDelay.
+		"""
+		if minDelay < 1 or minDelay > maxDelay:
+			raise ValueError('Expected 1 <= minDelay <= maxDelay, got {} and {}.'.format(
+				minDelay, maxDelay))
+		self.minDelay = minDelay
+		self.maxDelay = maxDelay
+		self.delay = maxDelay if self.policy == 'fixed' else minDelay
+
+	def update(self, bytesWaiting, now=None):
+		""" Work out the delay until the next read after reading the port.
+
+		Arguments
+		---------
+			bytesWaiting (int) - number of bytes that were waiting in the port,
+				i.e. received since the last read.
+
+		Optional
+		---------
+			now (float, default None) - time of the read [s], time.monotonic()
+				if None.
+
+		Returns
+		---------
+			(int) - delay until the next read [ms].
+		"""
+		if now is None:
+			now = time.monotonic()
+		elapsed = self.delay if self.lastUpdate is None else 1000.*(now - self.lastUpdate)
+		self.lastUpdate = now
+
+		if self.policy == 'fixed':
+			self.delay = self.maxDelay
+			return self.delay
+
+		if bytesWaiting > 0:
+			bytesPerMs = bytesWaiting/max(elapsed, 1.)
+			delay = self.targetBytes/bytesPerMs
+			# 10 bits per byte with the start and stop bits.
+			lineBytesPerMs = self.baudRate/10./1000.
+			if lineBytesPerMs > 0:
+				delay = min(delay, self.bufferSize/2./lineBytesPerMs)
+		else:
+			delay = self.delay*self.backoff
+
+		self.delay = int(min(max(delay, self.minDelay), self.maxDelay))
+		return self.delay
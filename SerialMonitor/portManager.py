@@ -0,0 +1,310 @@
+#!/bin/env/python3
+
+import serial
+import selectors
+import threading
+import time
+
+import SerialMonitor.commsInterface as commsInterface
+
+class ManagedPort(object):
+	""" State of a single port held by a PortManager: the port itself, the
+	incomplete line, counters and the sinks that get its output.
+
+	Arguments
+	---------
+		name (string) - name the port is known by in the manager.
+		port (serial.SerialBase) - open instance of a port interface.
+		outputFormat (string) - formatting type, one of ['formatted', 'raw', 'hex']
+	"""
+
+	def __init__(self, name, port, outputFormat):
+		self.name = name
+		self.port = port
+		self.outputFormat = outputFormat
+		self.framer = commsInterface.LineFramer()
+		self.sinks = [] # Callables subscribed to this port only.
+		self.fd = None # Set when the port is watched by the selector.
+
+		# Counters.
+		self.bytesReceived = 0
+		self.chunksReceived = 0
+		self.decodeErrors = 0
+		self.lastReceived = None # time.monotonic_ns() of the last chunk.
+		self.error = None # Exception that stopped the port being read, if any.
+
+class PortManager(object):
+	""" Read many serial ports from a single background thread.
+
+	Ports with file descriptors (e.g. all the ports on Linux) are multiplexed
+	with the selectors module, i.e. epoll or the best the platform offers, so
+	an idle port costs nothing. Ports without one, e.g. loop:// or all the
+	ports on Windows, are polled every `pollInterval`.
+
+	Every port keeps its own LineFramer and counters. The received data are
+	formatted with commsInterface.formatPortOutput and passed to the sinks
+	subscribed to the port and to all the ports, as:
+		sink(name, timestamp, output, decodeErrors)
+	where timestamp is time.monotonic_ns() at the time the bytes were read.
+	Sinks are called from the reading thread, so a GUI should only schedule
+	the processing, e.g. with wx.CallAfter.
+
+	If reading a port fails, it's no longer read, its `error` is set and
+	`onError(name, error)` is called. It stays in the manager until removed.
+
+	Optional
+	---------
+		outputFormat (string, default 'formatted') - default formatting of
+			the ports, one of ['formatted', 'raw', 'hex']
+		pollInterval (float, default 0.05) - longest time to wait for data
+			before polling the ports without a file descriptor [s]. Also the
+			longest time `stop` can take.
+		onError (callable, default None) - called with the port name and the
+			exception when reading a port fails.
+	"""
+
+	def __init__(self, outputFormat='formatted', pollInterval=0.05, onError=None):
+		if outputFormat not in ['formatted', 'raw', 'hex']:
+			raise ValueError("Requested output format {} not supported.".format(outputFormat))
+
+		self.outputFormat = outputFormat
+		self.pollInterval = pollInterval
+		self.onError = onError
+		self.ports = {} # ManagedPort instances by name.
+		self.sinks = [] # Callables subscribed to all the ports.
+		self.selector = selectors.DefaultSelector()
+		self._lock = threading.RLock() # Guards ports and sinks.
+		self._thread = None
+		self._stopRequested = threading.Event()
+
+	def addPort(self, port, name=None, outputFormat=None, **kwargs):
+		""" Start reading a port.
+
+		Arguments
+		---------
+			port (serial.SerialBase or string) - open instance of a port
+				interface, or a port name or URL to open, e.g. /dev/ttyUSB0
+				or loop://. The port is switched to non-blocking reads.
+
+		Optional
+		---------
+			name (string, default None) - name to refer to the port by. The
+				port's own name is used if None.
+			outputFormat (string, default None) - formatting of this port, one
+				of ['formatted', 'raw', 'hex']. The manager's default if None.
+			kwargs - passed to serial.serial_for_url, e.g. baudrate, when
+				`port` is a string.
+
+		Returns
+		---------
+			(ManagedPort) - state of the added port.
+
+		Raises
+		---------
+			ValueError - when the name is taken or the format isn't supported.
+			TypeError - when `port` isn't a serial.SerialBase or a string.
+			serial.SerialException - when the port can't be opened.
+		"""
+		if outputFormat is None:
+			outputFormat = self.outputFormat
+		if outputFormat not in ['formatted', 'raw', 'hex']:
+			raise ValueError("Requested output format {} not supported.".format(outputFormat))
+
+		if isinstance(port,str):
+			port = serial.serial_for_url(port, **kwargs)
+		elif not isinstance(port,serial.SerialBase):
+			raise TypeError('Expected port of type serial.serialposix.Serial,\
+			 got {} instead.'.format(type(port)))
+
+		if name is None:
+			name = port.name
+
+		with self._lock:
+			if name in self.ports:
+				raise ValueError('Port {} is already managed.'.format(name))
+
+			port.timeout = 0 # Never block the other ports.
+			managedPort = ManagedPort(name, port, outputFormat)
+			try:
+				self.selector.register(port.fileno(), selectors.EVENT_READ, managedPort)
+				managedPort.fd = port.fileno()
+			except (AttributeError, NotImplementedError, OSError, ValueError):
+				pass # No fd (e.g. loop://) or one the selector can't watch - poll.
+			self.ports[name] = managedPort
+		return managedPort
+
+	def removePort(self, name, close=True):
+		""" Stop reading a port.
+
+		Arguments
+		---------
+			name (string) - name of the port.
+
+		Optional
+		---------
+			close (bool, default True) - whether to close the port too.
+
+		Returns
+		---------
+			(ManagedPort) - state of the removed port.
+
+		Raises
+		---------
+			KeyError - when there's no port with this name.
+		"""
+		with self._lock:
+			managedPort = self.ports.pop(name)
+			self._unwatch(managedPort)
+			if close:
+				managedPort.port.close()
+		return managedPort
+
+	def subscribe(self, sink, name=None):
+		""" Pass the output of one or all the ports to `sink`.
+
+		Arguments
+		---------
+			sink (callable) - called with (name, timestamp, output, decodeErrors)
+				for every chunk of data read.
+
+		Optional
+		---------
+			name (string, default None) - port to subscribe to. All the ports,
+				including the ones added later, if None.
+
+		Raises
+		---------
+			KeyError - when there's no port with this name.
+		"""
+		with self._lock:
+			if name is None:
+				self.sinks.append(sink)
+			else:
+				self.ports[name].sinks.append(sink)
+
+	def unsubscribe(self, sink, name=None):
+		""" Stop passing output to a sink added with `subscribe`.
+
+		Raises
+		---------
+			KeyError - when there's no port with this name.
+			ValueError - when the sink isn't subscribed.
+		"""
+		with self._lock:
+			if name is None:
+				self.sinks.remove(sink)
+			else:
+				self.ports[name].sinks.remove(sink)
+
+	def _unwatch(self, managedPort):
+		""" Remove the port from the selector, if it's there. """
+		if managedPort.fd is not None:
+			self.selector.unregister(managedPort.fd)
+			managedPort.fd = None
+
+	def poll(self, timeout=0):
+		""" Read all the ports that have received data and pass it to the
+		sinks. Called repeatedly by the background thread, but can also be
+		used directly without starting it.
+
+		Optional
+		---------
+			timeout (float, default 0) - longest time to wait for data [s].
+
+		Returns
+		---------
+			(int) - number of bytes read.
+		"""
+		with self._lock:
+			polled = [p for p in self.ports.values() if p.fd is None and p.error is None]
+			watched = len(self.ports) - len(polled)
+
+		ready = []
+		if watched:
+			# A polled port that already has data shouldn't wait for the others.
+			if any(self._inWaiting(p) for p in polled):
+				timeout = 0
+			ready = [key.data for key, events in self.selector.select(timeout)]
+		elif timeout > 0 and not any(self._inWaiting(p) for p in polled):
+			time.sleep(timeout)
+
+		bytesRead = 0
+		for managedPort in ready + polled:
+			bytesRead += self._read(managedPort)
+		return bytesRead
+
+	def _inWaiting(self, managedPort):
+		""" Whether a polled port has data, without raising. """
+		try:
+			return managedPort.port.inWaiting() > 0
+		except (serial.SerialException, OSError, TypeError, ValueError):
+			return True # Let _read find and report the error.
+
+	def _read(self, managedPort):
+		""" Read a port and pass the output to its sinks.
+
+		Returns
+		---------
+			(int) - number of bytes read.
+		"""
+		try:
+			dataStr = managedPort.port.read(max(1, managedPort.port.inWaiting()))
+		except (serial.SerialException, OSError, TypeError, ValueError) as err:
+			# TypeError and ValueError come out of pySerial when the port gets
+			# closed while a read is in progress.
+			with self._lock:
+				if self.ports.get(managedPort.name) is not managedPort:
+					return 0 # Removed in the meantime, not an error.
+				managedPort.error = err
+				self._unwatch(managedPort)
+			if self.onError is not None:
+				self.onError(managedPort.name, err)
+			return 0
+
+		if not dataStr:
+			return 0
+
+		timestamp = time.monotonic_ns()
+		output, decodeErrors = commsInterface.formatPortOutput(dataStr,
+			managedPort.framer, managedPort.outputFormat)
+
+		managedPort.bytesReceived += len(dataStr)
+		managedPort.chunksReceived += 1
+		managedPort.decodeErrors += len(decodeErrors)
+		managedPort.lastReceived = timestamp
+
+		with self._lock:
+			sinks = managedPort.sinks + self.sinks
+		for sink in sinks:
+			sink(managedPort.name, timestamp, output, decodeErrors)
+		return len(dataStr)
+
+	def start(self):
+		""" Start reading the ports in a background thread. """
+		if self._thread is not None and self._thread.is_alive():
+			return
+		self._stopRequested.clear()
+		self._thread = threading.Thread(target=self._run, name='PortManager')
+		self._thread.daemon = True # Don't keep the application alive.
+		self._thread.start()
+
+	def _run(self):
+		""" Keep reading the ports until stopped. """
+		while not self._stopRequested.is_set():
+			self.poll(self.pollInterval)
+
+	def stop(self):
+		""" Stop the background thread and wait for it to finish. The ports
+		are left open and can still be read with `poll`. """
+		self._stopRequested.set()
+		if self._thread is not None and self._thread is not threading.current_thread():
+			self._thread.join()
+		self._thread = None
+
+	def close(self):
+		""" Stop reading and close all the ports. """
+		self.stop()
+		with self._lock:
+			for name in list(self.ports):
+				self.removePort(name)
+		self.selector.close()
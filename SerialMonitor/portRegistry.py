@@ -0,0 +1,292 @@
+#!/bin/env/python3
+
+import os
+import sys
+import threading
+
+import SerialMonitor.commsInterface as commsInterface
+
+try:
+	import pyudev # Optional, only used to learn about hot-plugged ports sooner.
+except ImportError:
+	pyudev = None
+
+SYSFS_TTY = '/sys/class/tty' # Where Linux lists all the tty devices.
+
+class PortInfo(object):
+	""" Description of a serial port found by one of the enumerators. Only
+	`device` is always known, the other attributes are None if they couldn't
+	be found, e.g. for ports that aren't USB adapters.
+
+	Arguments
+	---------
+		device (string) - full name of the port, e.g. /dev/ttyUSB0 or COM3.
+
+	Optional
+	---------
+		driver (string) - name of the kernel driver, e.g. ftdi_sio.
+		vid (int) - USB vendor ID.
+		pid (int) - USB product ID.
+		serialNumber (string) - serial number of the USB device.
+		manufacturer (string) - manufacturer of the USB device.
+		product (string) - product name of the USB device.
+		usbPath (string) - location of the device on the USB bus, e.g. 1-1.2:1.0,
+			which stays the same when the device is plugged in the same socket.
+	"""
+
+	def __init__(self, device, driver=None, vid=None, pid=None, serialNumber=None,
+			manufacturer=None, product=None, usbPath=None):
+		self.device = device
+		self.driver = driver
+		self.vid = vid
+		self.pid = pid
+		self.serialNumber = serialNumber
+		self.manufacturer = manufacturer
+		self.product = product
+		self.usbPath = usbPath
+
+	def __eq__(self, other):
+		return isinstance(other,PortInfo) and vars(self) == vars(other)
+
+	def __repr__(self):
+		return 'PortInfo({})'.format(', '.join('{}={!r}'.format(key, value)
+			for key, value in vars(self).items() if value is not None))
+
+	def describe(self):
+		""" Return a short, human-readable description of the port. """
+		details = [detail for detail in [self.manufacturer, self.product] if detail]
+		if self.serialNumber:
+			details.append('SN {}'.format(self.serialNumber))
+		if self.vid is not None and self.pid is not None:
+			details.append('{:04x}:{:04x}'.format(self.vid, self.pid))
+		if not details:
+			return self.device
+		return '{} ({})'.format(self.device, ', '.join(details))
+
+def _readAttribute(path, name):
+	""" Read a sysfs attribute, return None if there isn't one. """
+	try:
+		with open(os.path.join(path, name)) as f:
+			return f.read().strip()
+	except (OSError, UnicodeDecodeError):
+		return None
+
+def _readHexAttribute(path, name):
+	""" Read a hexadecimal sysfs attribute, e.g. idVendor, return None if there isn't one. """
+	value = _readAttribute(path, name)
+	try:
+		return int(value, 16)
+	except (TypeError, ValueError):
+		return None
+
+def _sysfsPortInfo(name, sysfsRoot=SYSFS_TTY, devRoot='/dev'):
+	""" Describe a single tty from sysfs.
+
+	Returns
+	---------
+		(PortInfo) - description of the port, or None if it isn't backed by
+			serial hardware, e.g. a virtual console or a pseudo-terminal.
+	"""
+	# Virtual ttys have no device behind them.
+	devicePath = os.path.join(sysfsRoot, name, 'device')
+	if not os.path.exists(devicePath):
+		return None
+	devicePath = os.path.realpath(devicePath)
+
+	# Platform devices are the ttyS ports that exist whether there's a UART
+	# behind them or not - same check as pySerial's list_ports does.
+	subsystem = os.path.basename(os.path.realpath(os.path.join(devicePath, 'subsystem')))
+	if subsystem == 'platform':
+		return None
+
+	info = PortInfo(os.path.join(devRoot, name))
+	driverPath = os.path.join(devicePath, 'driver')
+	if os.path.exists(driverPath):
+		info.driver = os.path.basename(os.path.realpath(driverPath))
+
+	# USB adapters: usb-serial devices hang off the interface, ACM ones
+	# are the interface itself. The USB device is the interface's parent.
+	if subsystem == 'usb-serial':
+		interfacePath = os.path.dirname(devicePath)
+	elif subsystem == 'usb':
+		interfacePath = devicePath
+	else:
+		return info
+
+	usbDevicePath = os.path.dirname(interfacePath)
+	info.vid = _readHexAttribute(usbDevicePath, 'idVendor')
+	info.pid = _readHexAttribute(usbDevicePath, 'idProduct')
+	info.serialNumber = _readAttribute(usbDevicePath, 'serial')
+	info.manufacturer = _readAttribute(usbDevicePath, 'manufacturer')
+	info.product = _readAttribute(usbDevicePath, 'product')
+	info.usbPath = os.path.basename(interfacePath)
+	return info
+
+def enumerateSysfsPorts(sysfsRoot=SYSFS_TTY, devRoot='/dev'):
+	""" Find the serial ports backed by hardware from the Linux sysfs, without
+	opening any of them.
+
+	Optional
+	---------
+		sysfsRoot (string, default /sys/class/tty) - directory with the ttys.
+		devRoot (string, default /dev) - directory with the device files.
+
+	Returns
+	---------
+		(list) - PortInfo instances, sorted by the device name.
+	"""
+	ports = []
+	for name in sorted(os.listdir(sysfsRoot)):
+		info = _sysfsPortInfo(name, sysfsRoot, devRoot)
+		if info is not None:
+			ports.append(info)
+	return ports
+
+def enumerateOpenablePorts():
+	""" Find the serial ports by trying to open them, on any platform. See
+	commsInterface.getActivePorts.
+
+	Returns
+	---------
+		(list) - PortInfo instances with just the device names.
+	"""
+	return [PortInfo(port) for port in commsInterface.getActivePorts()]
+
+def haveSysfs(sysfsRoot=SYSFS_TTY):
+	""" Whether ports can be found from the sysfs on this machine. """
+	return sys.platform.startswith('linux') and os.path.isdir(sysfsRoot)
+
+class PortRegistry(object):
+	""" Cache of the serial ports present in the system, refreshed cheaply on
+	demand, every `pollInterval`, or when udev says a tty has come or gone.
+
+	With the sysfs enumerator, a refresh only lists /sys/class/tty and looks
+	up the ttys that have appeared since the last one, so it can be done
+	whenever the list of ports is needed.
+
+	Optional
+	---------
+		enumerator (callable, default None) - returns a list of PortInfo.
+			enumerateSysfsPorts where the sysfs is available, and
+			enumerateOpenablePorts otherwise, if None.
+		pollInterval (float, default 2.) - how often to refresh the ports
+			after `start` [s], if udev isn't available.
+		onChange (callable, default None) - called without any arguments when
+			a refresh finds that the ports have changed. Called from a
+			background thread after `start`.
+		sysfsRoot (string, default /sys/class/tty) - directory with the ttys,
+			used with the sysfs enumerator.
+		devRoot (string, default /dev) - directory with the device files,
+			used with the sysfs enumerator.
+	"""
+
+	def __init__(self, enumerator=None, pollInterval=2., onChange=None,
+			sysfsRoot=SYSFS_TTY, devRoot='/dev'):
+		if enumerator is None:
+			enumerator = enumerateSysfsPorts if haveSysfs() else enumerateOpenablePorts
+		self.enumerator = enumerator
+		self.pollInterval = pollInterval
+		self.onChange = onChange
+		self.sysfsRoot = sysfsRoot
+		self.devRoot = devRoot
+		self._ports = []
+		self._byEntry = {} # PortInfo (or None for ignored ttys) by (name, inode).
+		self._lock = threading.Lock() # Guards the cache.
+		self._refreshLock = threading.Lock() # One refresh at a time.
+		self._stopRequested = threading.Event()
+		self._thread = None
+		self._observer = None # pyudev.MonitorObserver, when used.
+
+	@property
+	def ports(self):
+		""" (list) - PortInfo instances of the ports found by the last refresh. """
+		with self._lock:
+			return list(self._ports)
+
+	def get(self, device):
+		""" Return the PortInfo of the device with the given name, or None. """
+		for info in self.ports:
+			if info.device == device:
+				return info
+		return None
+
+	def find(self, **criteria):
+		""" Find the ports whose attributes have the given values, e.g.
+		find(serialNumber='A50285BI') or find(vid=0x0403, pid=0x6001).
+
+		Returns
+		---------
+			(list) - matching PortInfo instances.
+		"""
+		return [info for info in self.ports
+			if all(getattr(info, key) == value for key, value in criteria.items())]
+
+	def refresh(self):
+		""" Update the cached ports.
+
+		Returns
+		---------
+			(bool) - whether the ports have changed.
+		"""
+		with self._refreshLock:
+			if self.enumerator is enumerateSysfsPorts:
+				ports = self._refreshSysfs()
+			else:
+				ports = self.enumerator()
+
+			with self._lock:
+				changed = ports != self._ports
+				self._ports = ports
+		if changed and self.onChange is not None:
+			self.onChange()
+		return changed
+
+	def _refreshSysfs(self):
+		""" Only look up the ttys that weren't there during the last refresh.
+		A tty that's been re-created, e.g. by plugging in another adapter that
+		got the same name, has a new inode, which listing the directory gives
+		for free. """
+		byEntry = {}
+		for entry in sorted(os.scandir(self.sysfsRoot), key=lambda entry: entry.name):
+			key = (entry.name, entry.inode())
+			if key in self._byEntry:
+				byEntry[key] = self._byEntry[key]
+			else:
+				byEntry[key] = _sysfsPortInfo(entry.name, self.sysfsRoot, self.devRoot)
+		self._byEntry = byEntry
+		return [info for info in byEntry.values() if info is not None]
+
+	def _onUdevEvent(self, device):
+		""" A tty has been added or removed. """
+		self.refresh()
+
+	def start(self):
+		""" Keep the cache up to date in the background, with udev if it's
+		available and by polling otherwise. """
+		self.refresh()
+		if pyudev is not None and self.enumerator is enumerateSysfsPorts:
+			monitor = pyudev.Monitor.from_netlink(pyudev.Context())
+			monitor.filter_by('tty')
+			self._observer = pyudev.MonitorObserver(monitor, callback=self._onUdevEvent,
+				name='PortRegistry')
+			self._observer.start()
+			return
+
+		self._stopRequested.clear()
+		self._thread = threading.Thread(target=self._run, name='PortRegistry', daemon=True)
+		self._thread.start()
+
+	def _run(self):
+		""" Refresh every pollInterval until stopped. """
+		while not self._stopRequested.wait(self.pollInterval):
+			self.refresh()
+
+	def stop(self):
+		""" Stop updating the cache in the background. """
+		if self._observer is not None:
+			self._observer.stop()
+			self._observer = None
+		self._stopRequested.set()
+		if self._thread is not None and self._thread is not threading.current_thread():
+			self._thread.join()
+		self._thread = None
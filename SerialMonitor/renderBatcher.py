@@ -0,0 +1,84 @@
+#!/bin/env/python3
+
+import time
+
+class RenderBatcher(object):
+	""" Gather the text to be shown in a text control and render it in batches,
+	at most `maxRate` times a second, instead of on every write.
+
+	Adjacent pieces of text with the same colour are merged into a single run,
+	so every batch needs one write per colour change rather than per message.
+	The GUI toolkit isn't used directly, so the batcher only needs to be told
+	how to schedule a call for later and how to render the runs.
+
+	Arguments
+	---------
+		render (callable) - called with a list of (text, colour) runs, oldest
+			first, to show them all at once.
+		schedule (callable) - called with a delay [s] and a callable, should
+			call the latter after the delay, e.g. with wx.CallLater.
+
+	Optional
+	---------
+		maxRate (float, default 30.) - most batches to render per second [Hz].
+		maxPendingChars (int, default 1 Mi) - render the batch straight away,
+			without waiting for the next frame, once it holds this many
+			characters, so that a flood of text doesn't build up a batch too
+			large to render in one go. Only the rate is limited if None.
+	"""
+
+	def __init__(self, render, schedule, maxRate=30., maxPendingChars=2**20):
+		self.render = render
+		self.schedule = schedule
+		self.interval = 1./maxRate # Shortest time between batches [s].
+		self.maxPendingChars = maxPendingChars
+		self.runs = [] # [colour, list of strings] not yet rendered.
+		self.pendingChars = 0 # Characters in the runs.
+		self.lastRender = None # time.monotonic() of the last batch.
+		self.scheduled = False # Whether a flush has been scheduled.
+
+	def add(self, text, colour=(0,0,0)):
+		""" Queue text to be shown in the next batch.
+
+		Arguments
+		---------
+			text (string) - text to show.
+
+		Optional
+		---------
+			colour (int tuple, len=3, default=(0,0,0)) - RGB colour of text
+		"""
+		if not text:
+			return
+
+		if self.runs and self.runs[-1][0] == colour:
+			self.runs[-1][1].append(text)
+		else:
+			self.runs.append([colour, [text]])
+		self.pendingChars += len(text)
+
+		if self.maxPendingChars is not None and self.pendingChars >= self.maxPendingChars:
+			self.flush() # A flush that's already been scheduled will do nothing.
+		elif not self.scheduled:
+			self.scheduled = True
+			delay = 0.
+			if self.lastRender is not None:
+				delay = max(0., self.lastRender + self.interval - time.monotonic())
+			self.schedule(delay, self.flush)
+
+	def flush(self):
+		""" Render all the queued text now. Called when the scheduled delay
+		has passed, but can be called directly too. """
+		self.scheduled = False
+		if not self.runs:
+			return
+		runs = [(''.join(texts), colour) for colour, texts in self.runs]
+		self.clear()
+		self.lastRender = time.monotonic()
+		self.render(runs)
+
+	def clear(self):
+		""" Discard the queued text. A flush that's already been scheduled
+		will do nothing. """
+		self.runs = []
+		self.pendingChars = 0
@@ -0,0 +1,157 @@
+#!/bin/env/python3
+
+import os, select, threading, time
+
+import SerialMonitor.captureFile as captureFile
+
+class PtyPort(object):
+	""" Pseudo-terminal pair to replay a capture through. Whatever is written
+	to it can be read from the port called `name`, e.g. by the monitor or a
+	commsInterface.PortReader that opened it with serial.Serial, as if it
+	came from a real device. Only available where os.openpty is, i.e. not on
+	Windows, use a loop:// port there.
+
+	Both ends are put in raw mode, so the bytes get through unchanged and
+	aren't echoed back. The port end is kept open, so that the port can be
+	opened and closed again while the replay runs. Writing waits while the
+	port is full, until the bytes are read or the write is cancelled.
+
+	Raises
+	---------
+		OSError - when pseudo-terminals aren't available.
+	"""
+
+	def __init__(self):
+		if not hasattr(os, 'openpty'):
+			raise OSError('Pseudo-terminals are not available on this platform.')
+		import tty # Needs termios, which Windows hasn't got.
+		self.master, self.slave = os.openpty()
+		tty.setraw(self.master)
+		tty.setraw(self.slave)
+		os.set_blocking(self.master, False)
+		self.name = os.ttyname(self.slave)
+		self.cancelled = False
+
+	def write(self, dataStr):
+		""" Write all of dataStr, waiting while the port is full.
+
+		Raises
+		---------
+			OSError - when the write has been cancelled.
+		"""
+		dataStr = memoryview(dataStr)
+		while len(dataStr) > 0:
+			if self.cancelled:
+				raise OSError('Writing to {} has been cancelled.'.format(self.name))
+			try:
+				dataStr = dataStr[os.write(self.master, dataStr):]
+			except BlockingIOError:
+				select.select([], [self.master], [], 0.1) # Check for cancelling every so often.
+
+	def cancelWrite(self):
+		""" Make the write in progress, and all the later ones, give up. """
+		self.cancelled = True
+
+	def close(self):
+		""" Close both ends. Cancel the writes in progress first. """
+		os.close(self.master)
+		os.close(self.slave)
+
+class CaptureReplayer(threading.Thread):
+	""" Write the bytes received in a capture file to a port in a background
+	thread, so that whatever reads the port gets them as if it were connected
+	to the device that sent them. E.g. write them to a loop:// port that the
+	monitor reads, or to a PtyPort that any serial.Serial can open.
+
+	The chunks are written at the times they were received at, as far as
+	the OS's timers allow, sped up `speed` times, or as fast as the port
+	takes them. Ports that can only hold so much, like loop://, hold up the
+	replay until the reader catches up, so it's as fast as the reader.
+
+	Progress is kept in plain counters, which can be read from any thread.
+	Chunks are never written late on purpose, so how late they were when
+	written, `maxLag`, tells if the reader holds up the replay.
+
+	Arguments
+	---------
+		reader (captureFile.CaptureReader) - the capture.
+		port (object with a write(bytes) method) - where to write the bytes,
+			e.g. a serial.Serial or a PtyPort.
+
+	Optional
+	---------
+		speed (float, default 1.) - how many times faster than recorded to
+			replay, None to replay as fast as possible.
+		portId (int, default None) - only replay the bytes received from this
+			port of the capture, see captureFile.CaptureReader.ports. All the
+			received bytes if None.
+		startTime (int, default None) - time.monotonic_ns() of the capture's
+			writer to start from, see captureFile.CaptureReader.seekTime.
+			From the beginning if None.
+		onFinished (callable, default None) - called without arguments from
+			the replay thread when the replay has finished or been stopped.
+
+	Raises
+	---------
+		ValueError - when the speed isn't positive.
+	"""
+
+	def __init__(self, reader, port, speed=1., portId=None, startTime=None, onFinished=None):
+		threading.Thread.__init__(self, name='CaptureReplayer')
+		self.daemon = True # Don't keep the application alive.
+		if speed is not None and speed <= 0:
+			raise ValueError('Replay speed must be positive, or None for as fast as possible.')
+		self.reader = reader
+		self.port = port
+		self.speed = speed
+		self.portId = portId
+		self.startTime = startTime
+		self.onFinished = onFinished
+		self.stopEvent = threading.Event()
+		self.chunksReplayed = 0
+		self.bytesReplayed = 0
+		self.maxLag = 0 # Longest time a chunk was written after it was due [ns].
+		self.error = None # Exception raised by the port, which stops the replay.
+
+	def stop(self, wait=True):
+		""" Stop replaying, and wait for the thread to finish if `wait`. Don't
+		wait while the port is full and nothing reads it, close it instead. """
+		self.stopEvent.set()
+		if wait and self.is_alive():
+			self.join()
+
+	def run(self):
+		try:
+			self._replay()
+		except Exception as err: # E.g. the port was closed.
+			self.error = err
+		finally:
+			if self.onFinished is not None:
+				self.onFinished()
+
+	def _replay(self):
+		""" Write the chunks to the port, each when it's due. """
+		start = 0 if self.startTime is None else self.reader.seekTime(self.startTime)
+		firstTimestamp = None
+		replayStart = time.monotonic_ns()
+		for record in self.reader.records(start):
+			if self.stopEvent.is_set():
+				return
+			if record.kind != captureFile.RECEIVED or (self.portId is not None and
+					record.portId != self.portId):
+				continue
+			if self.startTime is not None and record.timestamp < self.startTime:
+				continue
+
+			if self.speed is not None:
+				if firstTimestamp is None:
+					firstTimestamp = record.timestamp
+				due = replayStart + int((record.timestamp - firstTimestamp)/self.speed)
+				wait = due - time.monotonic_ns()
+				if wait > 0 and self.stopEvent.wait(wait/1e9):
+					return
+				self.maxLag = max(self.maxLag, time.monotonic_ns() - due)
+
+			self.port.write(record.data)
+			self.chunksReplayed += 1
+			self.bytesReplayed += record.length
@@ -0,0 +1,353 @@
+#!/bin/env/python3
+
+import glob, gzip, lzma, os, queue, shutil, threading, time
+
+import SerialMonitor.captureFile as captureFile
+import SerialMonitor.logWriter as logWriter
+
+# Extensions of the compressed segments and how to open them for writing.
+COMPRESSIONS = {
+	'gzip': ('.gz', lambda path: gzip.open(path, 'wb')),
+	'lzma': ('.xz', lambda path: lzma.open(path, 'wb')),
+}
+
+# Default keyword arguments of a Rotator: 64 MiB or 1 day long gzipped
+# segments, all of which are kept.
+DEFAULT_SETTINGS = {'maxBytes': 2**26, 'maxAge': 86400., 'compression': 'gzip',
+	'keepBytes': None, 'keepAge': None}
+
+# Settings of a Rotator as the user sees them: the keyword argument, its name
+# in the settings text, and the unit it's given in there, in bytes or seconds.
+# A limit of 0 in the text means no limit.
+_SETTINGS = [
+	('maxBytes', 'segmentMiB', 2**20),
+	('maxAge', 'segmentHours', 3600.),
+	('keepBytes', 'keepMiB', 2**20),
+	('keepAge', 'keepDays', 86400.),
+]
+
+def parseSettings(text):
+	""" Read the settings of a Rotator, one per line, e.g.
+		segmentMiB 64
+		segmentHours 24
+		compression gzip
+		keepMiB 1024
+		keepDays 0
+	where a limit of 0 means no limit and compression is gzip, lzma or none.
+	Settings that aren't given keep their defaults.
+
+	Arguments
+	---------
+		text (string) - the settings.
+
+	Returns
+	---------
+		(dict) - keyword arguments for a Rotator.
+
+	Raises
+	---------
+		ValueError - when a line isn't a valid setting.
+	"""
+	units = dict((name, (keyword, unit)) for keyword, name, unit in _SETTINGS)
+	settings = {}
+	for lineNo, line in enumerate(text.splitlines()):
+		fields = line.split()
+		if not fields:
+			continue
+		if len(fields) != 2:
+			raise ValueError('Expected "name value" in line {}, got {!r}.'.format(lineNo+1, line))
+		name, value = fields
+		if name == 'compression':
+			if value != 'none' and value not in COMPRESSIONS:
+				raise ValueError('Unknown compression {!r} in line {}.'.format(value, lineNo+1))
+			settings['compression'] = None if value == 'none' else value
+		elif name in units:
+			keyword, unit = units[name]
+			try:
+				value = float(value)
+			except ValueError:
+				raise ValueError('Expected a number in line {}, got {!r}.'.format(lineNo+1, value))
+			if value < 0:
+				raise ValueError('Expected a limit of at least 0 in line {}.'.format(lineNo+1))
+			settings[keyword] = None if value == 0 else type(unit)(value*unit)
+		else:
+			raise ValueError('Unknown setting {!r} in line {}.'.format(name, lineNo+1))
+	return settings
+
+def formatSettings(settings):
+	""" Write the settings of a Rotator the way parseSettings reads them,
+	filling in the defaults of the settings that aren't given. """
+	settings = dict(DEFAULT_SETTINGS, **settings)
+	lines = []
+	for keyword, name, unit in _SETTINGS:
+		value = settings[keyword]
+		lines.append('{} {:g}'.format(name, 0 if value is None else value/unit))
+		if keyword == 'maxAge':
+			lines.append('compression {}'.format(settings['compression'] or 'none'))
+	return '\n'.join(lines)
+
+class SegmentCompressor(threading.Thread):
+	""" Compress the closed segments of rotating sinks and apply their
+	retention policies in a background thread, so that neither holds up the
+	thread that writes the segments.
+
+	A segment is compressed into a '.part' file first, which is renamed and
+	replaces the segment once complete, so an interrupted compression never
+	leaves a segment that looks complete but isn't.
+	"""
+
+	def __init__(self):
+		threading.Thread.__init__(self, name='SegmentCompressor')
+		self.daemon = True # Don't keep the application alive.
+		self.jobs = queue.SimpleQueue() # (Rotator, paths) tuples, None to stop.
+		self.error = None # The last exception raised by a job, if any.
+
+	def submit(self, rotator, paths):
+		""" Compress the paths as the rotator says and then apply its retention. """
+		self.jobs.put((rotator, paths))
+
+	def stop(self, wait=True):
+		""" Stop once the jobs submitted so far are done, waiting for that if
+		`wait`. Otherwise, the thread is abandoned when the program exits. """
+		self.jobs.put(None)
+		if wait and self.is_alive():
+			self.join()
+
+	def run(self):
+		while True:
+			job = self.jobs.get()
+			if job is None:
+				return
+			rotator, paths = job
+			try:
+				if rotator.compression is not None:
+					for path in paths:
+						compressFile(path, rotator.compression)
+				rotator.applyRetention()
+			except OSError as err:
+				self.error = err
+
+def compressFile(path, compression):
+	""" Compress a file and remove it.
+
+	Arguments
+	---------
+		path (string) - the file.
+		compression (string) - one of COMPRESSIONS.
+
+	Returns
+	---------
+		(string) - path of the compressed file.
+	"""
+	extension, openCompressed = COMPRESSIONS[compression]
+	partPath = path + extension + '.part'
+	with open(path, 'rb') as source, openCompressed(partPath) as target:
+		shutil.copyfileobj(source, target, 2**20)
+	os.replace(partPath, path + extension)
+	os.remove(path)
+	return path + extension
+
+class Rotator(object):
+	""" Decide when a sink should start a new segment, what to call it, and
+	what to do with the closed ones.
+
+	Segments are named after the base path and the time they were started
+	at, e.g. base.20240131-120000.log for base.log. A new segment is started
+	once the current one holds `maxBytes` or is `maxAge` old. Closed segments
+	are compressed by a SegmentCompressor, and the oldest ones are deleted
+	while all the segments take more than `keepBytes` or are older than
+	`keepAge`. The current segment is never deleted.
+
+	Arguments
+	---------
+		basePath (string) - path the segments are named after.
+
+	Optional
+	---------
+		maxBytes (int, default 64 MiB) - most bytes in a segment, None for
+			no limit.
+		maxAge (float, default 1 day) - longest time to write to a segment
+			[s], None for no limit.
+		compression (string, default 'gzip') - one of COMPRESSIONS, or None
+			not to compress the closed segments.
+		keepBytes (int, default None) - most bytes all the segments can take,
+			None for no limit.
+		keepAge (float, default None) - delete the segments last written
+			longer ago than this [s], None for no limit.
+		compressor (SegmentCompressor, default None) - thread to compress the
+			segments in. One is started if None.
+
+	Raises
+	---------
+		ValueError - when the compression isn't supported.
+	"""
+
+	def __init__(self, basePath, maxBytes=DEFAULT_SETTINGS['maxBytes'],
+			maxAge=DEFAULT_SETTINGS['maxAge'], compression=DEFAULT_SETTINGS['compression'],
+			keepBytes=DEFAULT_SETTINGS['keepBytes'], keepAge=DEFAULT_SETTINGS['keepAge'],
+			compressor=None):
+		if compression is not None and compression not in COMPRESSIONS:
+			raise ValueError("Requested compression {} not supported.".format(compression))
+		self.stem, self.extension = os.path.splitext(os.path.abspath(basePath))
+		self.maxBytes = maxBytes
+		self.maxAge = maxAge
+		self.compression = compression
+		self.keepBytes = keepBytes
+		self.keepAge = keepAge
+		if compressor is None:
+			compressor = SegmentCompressor()
+			compressor.start()
+		self.compressor = compressor
+		self.currentPaths = [] # Paths of the current segment, never deleted.
+		self.segmentStart = None # time.monotonic() the current segment was started at.
+
+	def newSegmentPath(self):
+		""" Name a new segment, started now, which becomes the current one. """
+		name = '{}.{}'.format(self.stem, time.strftime('%Y%m%d-%H%M%S'))
+		path = name + self.extension
+		i = 1
+		while glob.glob(glob.escape(path) + '*'): # Started within the same second.
+			path = '{}-{}{}'.format(name, i, self.extension)
+			i += 1
+		self.segmentStart = time.monotonic()
+		return path
+
+	def shouldRotate(self, size):
+		""" Check if the current segment, holding `size` bytes, is full. """
+		return ((self.maxBytes is not None and size >= self.maxBytes) or
+			(self.maxAge is not None and time.monotonic() - self.segmentStart >= self.maxAge))
+
+	def segmentClosed(self, paths):
+		""" Hand the files of a closed segment over to the compressor. """
+		self.compressor.submit(self, paths)
+
+	def segments(self):
+		""" Get the paths of all the files of all the segments, oldest first. """
+		pattern = glob.escape(self.stem) + '.[0-9]*' + glob.escape(self.extension) + '*'
+		def startTime(path):
+			""" Time the segment was started at and the number of the segments
+			started within the same second before it, e.g. 20240131-120000-1. """
+			fields = path[len(self.stem)+1:].split('.')[0].split('-') + ['0']
+			return (fields[0], fields[1], int(fields[2]), path)
+		return sorted((path for path in glob.glob(pattern) if not path.endswith('.part')), key=startTime)
+
+	def applyRetention(self):
+		""" Delete the oldest segments until the rest are within the limits. """
+		if self.keepBytes is None and self.keepAge is None:
+			return
+		paths = [path for path in self.segments() if path not in self.currentPaths]
+		sizes = dict((path, os.path.getsize(path)) for path in paths)
+		total = sum(sizes.values()) + sum(os.path.getsize(path)
+			for path in self.currentPaths if os.path.exists(path))
+		now = time.time()
+		for path in paths:
+			tooBig = self.keepBytes is not None and total > self.keepBytes
+			tooOld = self.keepAge is not None and now - os.path.getmtime(path) > self.keepAge
+			if not (tooBig or tooOld):
+				break
+			os.remove(path)
+			total -= sizes[path]
+
+class RotatingLogFileHandler(logWriter.DeferredFlushFileHandler):
+	""" Log file handler that writes the log to segments named and rotated
+	by a Rotator. Meant to be used with a BatchingQueueListener, so that the
+	rotation happens in the listener's thread.
+
+	Arguments
+	---------
+		rotator (Rotator) - decides when to rotate.
+	"""
+
+	def __init__(self, rotator, encoding=None):
+		self.rotator = rotator
+		logWriter.DeferredFlushFileHandler.__init__(self, rotator.newSegmentPath(), encoding=encoding)
+		self.rotator.currentPaths = [self.baseFilename]
+
+	def emit(self, record):
+		if self.stream is not None and self.rotator.shouldRotate(self.stream.tell()):
+			self.doRollover()
+		logWriter.DeferredFlushFileHandler.emit(self, record)
+
+	def doRollover(self):
+		""" Close the current segment and start a new one. """
+		closedPath = self.baseFilename
+		self.stream.close()
+		self.baseFilename = os.path.abspath(self.rotator.newSegmentPath())
+		self.rotator.currentPaths = [self.baseFilename]
+		self.stream = self._open()
+		self.rotator.segmentClosed([closedPath])
+
+	def close(self):
+		""" Close the current segment and hand it over to the compressor. """
+		closedPath = self.baseFilename if self.stream is not None else None
+		logWriter.DeferredFlushFileHandler.close(self)
+		if closedPath is not None:
+			self.rotator.currentPaths = []
+			self.rotator.segmentClosed([closedPath])
+
+class RotatingCaptureWriter(object):
+	""" captureFile.CaptureWriter that writes to segments named and rotated by
+	a Rotator. Every segment is a complete capture file with its own index,
+	and records the names of the ports again.
+
+	Arguments
+	---------
+		rotator (Rotator) - decides when to rotate.
+
+	Optional
+	---------
+		blockSize (int, default 64 KiB) - see captureFile.CaptureWriter.
+		mergeInterval (int, default captureFile.DEFAULT_MERGE_INTERVAL) - see
+			captureFile.CaptureWriter.
+	"""
+
+	def __init__(self, rotator, blockSize=2**16, mergeInterval=captureFile.DEFAULT_MERGE_INTERVAL):
+		self.rotator = rotator
+		self.blockSize = blockSize
+		self.mergeInterval = mergeInterval
+		self.portNames = [] # Names of the ports by id, to record in every segment.
+		self._open()
+
+	@property
+	def path(self):
+		""" Path of the current segment. """
+		return self.writer.path
+
+	def _open(self):
+		""" Start a new segment. """
+		self.writer = captureFile.CaptureWriter(self.rotator.newSegmentPath(), self.blockSize,
+			self.mergeInterval)
+		self.rotator.currentPaths = [self.writer.path, self.writer.path + captureFile.INDEX_SUFFIX]
+		for name in self.portNames:
+			self.writer.addPort(name)
+
+	def addPort(self, name):
+		""" See captureFile.CaptureWriter.addPort. """
+		if name not in self.portNames:
+			self.portNames.append(name)
+		return self.writer.addPort(name)
+
+	def write(self, dataStr, kind=captureFile.RECEIVED, portId=0, timestamp=None):
+		""" See captureFile.CaptureWriter.write. Starts a new segment first if
+		the current one is full. """
+		if self.rotator.shouldRotate(self.writer.size):
+			self.rotate()
+		self.writer.write(dataStr, kind, portId, timestamp)
+
+	def rotate(self):
+		""" Close the current segment and start a new one. """
+		closedPaths = self.rotator.currentPaths
+		self.writer.close()
+		self._open()
+		self.rotator.segmentClosed(closedPaths)
+
+	def flush(self):
+		""" See captureFile.CaptureWriter.flush. """
+		self.writer.flush()
+
+	def close(self):
+		""" Close the current segment and hand it over to the compressor. """
+		closedPaths = self.rotator.currentPaths
+		self.writer.close()
+		self.rotator.currentPaths = []
+		self.rotator.segmentClosed(closedPaths)
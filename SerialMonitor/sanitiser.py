@@ -0,0 +1,103 @@
+#!/bin/env/python3
+
+import re
+import unicodedata
+
+# The output of the port, in every format, only ever holds characters below
+# 256: ASCII when formatted or in hex, and Latin-1 when raw. These are the
+# control characters among them, i.e. unicodedata.category(ch)[0] == 'C'.
+_ASCII_CONTROL = [chr(i) for i in range(0x20)] + ['\x7f']
+_LATIN1_CONTROL = _ASCII_CONTROL + [chr(i) for i in range(0x80, 0xa0)] + ['\xad']
+
+def _escape(ch):
+	""" Escape a character the way Python string literals do, e.g. \\x07. """
+	codePoint = ord(ch)
+	if codePoint < 0x100:
+		return '\\x{:02x}'.format(codePoint)
+	elif codePoint < 0x10000:
+		return '\\u{:04x}'.format(codePoint)
+	else:
+		return '\\U{:08x}'.format(codePoint)
+
+def _characterClass(characters):
+	""" Compile a regex matching any one of the characters, or nothing if
+	there are none. """
+	if not characters:
+		return re.compile('(?!)') # '[]' isn't a valid regex.
+	return re.compile('[{}]'.format(''.join(re.escape(ch) for ch in characters)))
+
+class Sanitiser(object):
+	""" Replace control characters in the output before it's shown or logged.
+	Otherwise, they could mess up or stall the display.
+
+	Control characters are those that unicodedata puts in one of the 'C'
+	categories. Text in which all the characters are below 256, i.e. all the
+	output of the port, is handled by a compiled regex matching just those
+	control characters, with a shortcut for printable ASCII. Other text goes
+	through unicodedata one character at a time.
+
+	Optional
+	---------
+		policy (string, default 'replace') - what to do with the control
+			characters, one of:
+			'replace' - replace them with `replacement`,
+			'escape' - show them as escape sequences, e.g. \\x07.
+		keep (string, default '') - control characters to leave alone, e.g.
+			'\\t\\r\\n'. None are kept by default.
+		replacement (string, default U+FFFD) - what to replace the control
+			characters with under the 'replace' policy.
+
+	Raises
+	---------
+		ValueError - when the policy isn't supported or `keep` has characters
+			that aren't control characters.
+	"""
+
+	def __init__(self, policy='replace', keep='', replacement=chr(0xFFFD)):
+		if policy not in ['replace', 'escape']:
+			raise ValueError("Requested sanitising policy {} not supported.".format(policy))
+		for ch in keep:
+			if unicodedata.category(ch)[0] != 'C':
+				raise ValueError("Can only keep control characters, not {!r}.".format(ch))
+
+		self.policy = policy
+		self.keep = keep
+		self.replacement = replacement
+
+		self._asciiRegex = _characterClass([ch for ch in _ASCII_CONTROL if ch not in keep])
+		self._latin1Regex = _characterClass([ch for ch in _LATIN1_CONTROL if ch not in keep])
+		if policy == 'replace':
+			self._substitute = replacement.replace('\\', '\\\\') # No group references.
+		else:
+			self._substitute = lambda match: _escape(match.group())
+
+	def sanitise(self, text):
+		""" Return the text with the control characters dealt with according
+		to the policy.
+
+		Arguments
+		---------
+			text (string) - text to sanitise.
+
+		Returns
+		---------
+			(string) - sanitised text.
+		"""
+		if text.isascii():
+			if text.isprintable():
+				return text # Nothing to do, the most common case.
+			return self._asciiRegex.sub(self._substitute, text)
+
+		try:
+			text.encode('latin-1') # Cheap check that all characters are below 256.
+		except UnicodeEncodeError:
+			# Any character could be a control one, look each one up.
+			category = unicodedata.category
+			keep = self.keep
+			if self.policy == 'replace':
+				replacement = self.replacement
+				return ''.join([ch if category(ch)[0] != 'C' or ch in keep else replacement
+					for ch in text])
+			return ''.join([ch if category(ch)[0] != 'C' or ch in keep else _escape(ch)
+				for ch in text])
+		return self._latin1Regex.sub(self._substitute, text)
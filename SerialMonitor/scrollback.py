@@ -0,0 +1,190 @@
+#!/bin/env/python3
+
+DEFAULT_COLOUR = (0,0,0) # Colour of the text that hasn't been given one.
+
+class Scrollback(object):
+	""" Store of the most recent lines shown in the output window, backed by a
+	ring buffer so that memory use stays bounded however long a session runs.
+
+	Every line is a tuple of (text, colour) runs, without the end of line
+	character. Runs of the same colour are merged, so most lines have just
+	one. The last line stays open until an end of line arrives. Its text is
+	kept in pieces, which are only joined when it's read or closed, so that
+	a line received a few characters at a time isn't copied again with every
+	one of them.
+
+	When there are more than `maxLines` lines, or the text takes more than
+	`maxChars` characters, the oldest lines are dropped. A line that reaches
+	`maxChars` characters is wrapped, so that a stream without any ends of
+	lines can't grow past the limit either.
+
+	Optional
+	---------
+		maxLines (int, default 100000) - most lines to keep.
+		maxChars (int, default None) - most characters to keep in all the
+			lines, and in one line. Only the number of lines is limited if None.
+
+	Raises
+	---------
+		ValueError - when the limits aren't positive.
+	"""
+
+	def __init__(self, maxLines=100000, maxChars=None):
+		self.lines = [] # Ring buffer of the complete lines, allocated when setting limits.
+		self.head = 0 # Index of the oldest line in the ring.
+		self.count = 0 # Number of lines in the ring.
+		self.chars = 0 # Number of characters in all the lines, the open one too.
+		self.dropped = 0 # Number of lines dropped since the start or clear.
+		self.lineOpen = False # Whether the last line can still be appended to.
+		self.openRuns = [] # [pieces, colour] runs of the open line, kept out of the ring.
+		self.openChars = 0 # Number of characters in the open line.
+		self.wrapped = False # Whether the last line was wrapped and nothing has come since.
+		self.setLimits(maxLines, maxChars)
+
+	def __len__(self):
+		return self.count + self.lineOpen
+
+	def __getitem__(self, index):
+		""" Get the runs of a line, 0 being the oldest line kept. """
+		if index < 0:
+			index += len(self)
+		if not 0 <= index < len(self):
+			raise IndexError('Scrollback line index out of range.')
+		if index == self.count:
+			return self._joinOpenLine()
+		return self.lines[(self.head + index) % self.maxLines]
+
+	def getText(self, index):
+		""" Get the text of a line, without the colours. """
+		return ''.join(text for text, colour in self[index])
+
+	def setLimits(self, maxLines=100000, maxChars=None):
+		""" Change the limits, dropping the oldest lines if need be. See the
+		class description for the arguments. """
+		if maxLines < 1 or (maxChars is not None and maxChars < 1):
+			raise ValueError('Scrollback limits must be positive.')
+
+		# Keep the newest lines that fit in the new ring, next to the open line.
+		keep = min(self.count, maxLines - self.lineOpen)
+		kept = [self.lines[(self.head + i) % self.maxLines] for i in range(self.count - keep, self.count)]
+		self.dropped += self.count - len(kept)
+		self.maxLines = maxLines
+		self.maxChars = maxChars
+		self.lines = kept + [None]*(maxLines - len(kept))
+		self.head = 0
+		self.count = len(kept)
+		self.chars = sum(len(text) for line in kept for text, colour in line) + self.openChars
+		self._enforceCharLimit()
+
+	def clear(self):
+		""" Drop all the lines. """
+		self.lines = [None]*self.maxLines
+		self.head = 0
+		self.count = 0
+		self.chars = 0
+		self.dropped = 0
+		self.lineOpen = False
+		self.openRuns = []
+		self.openChars = 0
+		self.wrapped = False
+
+	def append(self, text, colour=DEFAULT_COLOUR):
+		""" Add text, which may hold any number of lines.
+
+		Arguments
+		---------
+			text (string) - text to add. Ends of lines are marked with '\n'.
+
+		Optional
+		---------
+			colour (int tuple, len=3, default=(0,0,0)) - RGB colour of text
+		"""
+		pieces = text.split('\n')
+		# The last piece is what follows the last EOL, it's left open.
+		lastPiece = pieces.pop()
+		for piece in pieces:
+			if (piece and not self.lineOpen and not self.wrapped and
+					(self.maxChars is None or len(piece) <= self.maxChars)):
+				self._appendLine(((piece, colour),)) # A whole line, the usual case.
+				continue
+			if piece:
+				self._extendOpenLine(piece, colour)
+			# The EOL closes the open line, or ends a line that's just been
+			# wrapped, or makes an empty line.
+			if self.lineOpen:
+				self._closeLine()
+			elif not self.wrapped:
+				self._appendLine(())
+			self.wrapped = False
+		if lastPiece:
+			self._extendOpenLine(lastPiece, colour)
+		self._enforceCharLimit()
+
+	def _appendLine(self, line):
+		""" Add a complete line to the ring, dropping the oldest one if full. """
+		if self.count + self.lineOpen == self.maxLines:
+			self._dropOldest()
+		self.lines[(self.head + self.count) % self.maxLines] = line
+		self.count += 1
+		self.chars += sum(len(text) for text, colour in line)
+
+	def _extendOpenLine(self, text, colour):
+		""" Add text without EOLs to the open line, opening one if need be.
+		Wrap it whenever it reaches maxChars. """
+		while text:
+			if not self.lineOpen:
+				if self.count == self.maxLines: # Make room for the line once closed.
+					self._dropOldest()
+				self.lineOpen = True
+			self.wrapped = False
+			piece = text
+			if self.maxChars is not None:
+				room = max(self.maxChars - self.openChars, 0)
+				piece, text = text[:room], text[room:]
+			else:
+				text = ''
+			if piece:
+				if self.openRuns and self.openRuns[-1][1] == colour:
+					self.openRuns[-1][0].append(piece)
+				else:
+					self.openRuns.append([[piece], colour])
+				self.openChars += len(piece)
+				self.chars += len(piece)
+			if self.maxChars is not None and self.openChars >= self.maxChars:
+				self._closeLine()
+				self.wrapped = True
+
+	def _joinOpenLine(self):
+		""" Get the runs of the open line, joining the pieces of every run into
+		one so that they aren't joined again the next time. """
+		for run in self.openRuns:
+			if len(run[0]) > 1:
+				run[0] = [''.join(run[0])]
+		return tuple((pieces[0], colour) for pieces, colour in self.openRuns)
+
+	def _closeLine(self):
+		""" Move the open line into the ring. """
+		line = self._joinOpenLine()
+		self.chars -= self.openChars
+		self.lineOpen = False
+		self.openRuns = []
+		self.openChars = 0
+		self._appendLine(line)
+
+	def _dropOldest(self):
+		""" Remove the oldest complete line. """
+		line = self.lines[self.head]
+		self.lines[self.head] = None
+		self.head = (self.head + 1) % self.maxLines
+		self.count -= 1
+		self.chars -= sum(len(text) for text, colour in line)
+		self.dropped += 1
+
+	def _enforceCharLimit(self):
+		""" Drop the oldest lines until the text fits in maxChars. The newest
+		line is always kept, even if it's longer than that on its own, which
+		it only is when the limit has just been lowered. """
+		if self.maxChars is None:
+			return
+		while self.chars > self.maxChars and self.count > 0 and len(self) > 1:
+			self._dropOldest()
@@ -0,0 +1,170 @@
+#!/bin/env/python3
+
+import bisect, re, threading
+
+class _Block(object):
+	""" A sealed block of consecutive complete lines, kept as one string so
+	that it can be searched in one call, together with the trigrams in it.
+	The trigrams are only collected by the first search that needs them, so
+	that sealing a block costs next to nothing in the thread that updates
+	the index, and blocks that are never searched never cost anything. """
+
+	def __init__(self, firstLine, lines):
+		self.firstLine = firstLine # Line number of the first line.
+		self.text = '\n'.join(lines) + '\n'
+		self.lineStarts = [] # Offset of every line in text.
+		start = 0
+		for line in lines:
+			self.lineStarts.append(start)
+			start += len(line) + 1
+		self._grams = None
+
+	@property
+	def grams(self):
+		""" Set of the lower case trigrams in the block. """
+		if self._grams is None:
+			self._grams = _trigrams(self.text.lower())
+		return self._grams
+
+	@property
+	def endLine(self):
+		""" Line number after the last line. """
+		return self.firstLine + len(self.lineStarts)
+
+def _trigrams(text):
+	""" Get the set of all the three character substrings of text. """
+	return set(map(''.join, zip(text, text[1:], text[2:])))
+
+class SearchIndex(object):
+	""" Index of the lines in a scrollback.Scrollback that finds substrings or
+	regular expressions in all of them quickly.
+
+	The complete lines are kept in blocks of `blockLines` lines, each one a
+	single string, which a substring or a regex can be found in with one call
+	that runs in C. Every block also has the set of the (lower case) trigrams
+	in it, so that blocks that can't hold a substring are skipped altogether.
+
+	The index is kept up to date incrementally: `update` only indexes the lines
+	that have been completed since the last call, and forgets the blocks whose
+	lines have all been dropped from the scrollback. Lines are identified by
+	their number, i.e. the number of lines before them since the scrollback was
+	created or cleared, so `lineNumber - scrollback.dropped` is their index in
+	the scrollback.
+
+	`search` only reads a snapshot of the blocks, so it can be run in a
+	background thread while `update` carries on in another. It also collects
+	the trigrams of the blocks the first time, so `update` stays cheap enough
+	to be called on the GUI thread.
+
+	Optional
+	---------
+		blockLines (int, default 1024) - how many lines to put in every block.
+	"""
+
+	def __init__(self, blockLines=1024):
+		self.blockLines = blockLines
+		self.lock = threading.Lock() # Guards the blocks and the open lines.
+		self.clear()
+
+	def clear(self):
+		""" Forget all the lines, e.g. when the scrollback has been cleared. """
+		with self.lock:
+			self.blocks = [] # Sealed _Blocks, oldest first.
+			self.openLines = [] # Complete lines not in a block yet.
+			self.openFirstLine = 0 # Line number of openLines[0].
+
+	@property
+	def endLine(self):
+		""" Line number after the last line indexed. """
+		return self.openFirstLine + len(self.openLines)
+
+	def update(self, lines):
+		""" Index the lines completed in the scrollback since the last update.
+		The last line isn't indexed until an end of line arrives, see search.
+
+		Arguments
+		---------
+			lines (scrollback.Scrollback) - the lines to index.
+		"""
+		completeLines = len(lines) - (1 if lines.lineOpen else 0)
+		endLine = lines.dropped + completeLines
+		if endLine < self.endLine:
+			self.clear() # The scrollback has been cleared since the last update.
+
+		with self.lock:
+			# Lines dropped before they've been indexed are skipped.
+			if lines.dropped > self.endLine:
+				self._sealOpenLines()
+				self.openFirstLine = lines.dropped
+			for lineNumber in range(self.endLine, endLine):
+				self.openLines.append(lines.getText(lineNumber - lines.dropped))
+				if len(self.openLines) >= self.blockLines:
+					self._sealOpenLines()
+
+			# Forget the blocks that have been dropped from the scrollback.
+			dropBlocks = 0
+			while dropBlocks < len(self.blocks) and self.blocks[dropBlocks].endLine <= lines.dropped:
+				dropBlocks += 1
+			if dropBlocks > 0:
+				self.blocks = self.blocks[dropBlocks:]
+
+	def _sealOpenLines(self):
+		""" Put the open lines in a new block. Call with the lock held. """
+		if self.openLines:
+			self.blocks.append(_Block(self.openFirstLine, self.openLines))
+			self.openFirstLine += len(self.openLines)
+			self.openLines = []
+
+	def search(self, query, regex=False, matchCase=True, lastLine=None, maxMatches=100000):
+		""" Find all the occurrences of a substring or a regex in the lines.
+
+		Arguments
+		---------
+			query (string) - substring or regular expression to find.
+
+		Optional
+		---------
+			regex (bool, default False) - whether query is a regular expression.
+			matchCase (bool, default True) - whether the case has to match.
+			lastLine (string, default None) - text of the last, incomplete line
+				of the scrollback, to search it too. It's numbered endLine.
+			maxMatches (int, default 100000) - stop after this many matches.
+
+		Returns
+		---------
+			(list) - (lineNumber, column, length) tuples of the matches in the
+				order of the lines.
+
+		Raises
+		---------
+			re.error - when query is not a valid regular expression.
+		"""
+		if not query:
+			return []
+
+		flags = re.MULTILINE if matchCase else re.MULTILINE|re.IGNORECASE
+		pattern = re.compile(query if regex else re.escape(query), flags)
+		# All the trigrams of a substring have to be in a block that holds it.
+		grams = set() if regex else _trigrams(query.lower())
+
+		with self.lock:
+			blocks = list(self.blocks)
+			openFirstLine, openLines = self.openFirstLine, list(self.openLines)
+		if openLines:
+			blocks.append(_Block(openFirstLine, openLines))
+		if lastLine:
+			blocks.append(_Block(openFirstLine + len(openLines), [lastLine]))
+
+		matches = []
+		for block in blocks:
+			if grams and not grams <= block.grams:
+				continue
+			for match in pattern.finditer(block.text):
+				start, end = match.span()
+				if start == end and start == len(block.text):
+					continue # Empty match after the last line.
+				index = bisect.bisect_right(block.lineStarts, start) - 1
+				matches.append((block.firstLine + index, start - block.lineStarts[index], end - start))
+				if len(matches) >= maxMatches:
+					return matches
+		return matches
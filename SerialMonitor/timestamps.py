@@ -0,0 +1,71 @@
+#!/bin/env/python3
+
+import logging, time
+
+# Difference between the wall clock and time.monotonic_ns(), taken once, so
+# that the receive times of the chunks keep their order even if the wall
+# clock gets adjusted while the program runs.
+_WALL_CLOCK_OFFSET_NS = time.time_ns() - time.monotonic_ns()
+
+def toWallClock(timestamp):
+	""" Convert a time.monotonic_ns() to the time.time() it corresponds to [s]. """
+	return (timestamp + _WALL_CLOCK_OFFSET_NS)/1e9
+
+def formatTimestamp(timestamp, wallClockOffset=None):
+	""" Format a time.monotonic_ns() as a wall clock time with milliseconds,
+	e.g. '14:03:27.512'.
+
+	Optional
+	---------
+		wallClockOffset (int, default None) - difference between the wall
+			clock and the time.monotonic_ns() the timestamp was taken with
+			[ns], e.g. captureFile.CaptureReader.wallClockOffset for a time
+			read from a capture file. That of this program if None.
+	"""
+	if wallClockOffset is None:
+		wallClock = toWallClock(timestamp)
+	else:
+		wallClock = (timestamp + wallClockOffset)/1e9
+	return '{}.{:03d}'.format(time.strftime('%H:%M:%S', time.localtime(wallClock)),
+		int(wallClock*1000) % 1000)
+
+def stampLines(text, stamp, atLineStart=True):
+	""" Put a stamp in front of every line of text.
+
+	Arguments
+	---------
+		text (string) - text to stamp, may hold any number of lines.
+		stamp (string) - what to put in front of the lines.
+
+	Optional
+	---------
+		atLineStart (bool, default True) - whether text starts a new line. If
+			not, its first line continues one that has already been stamped.
+
+	Returns
+	---------
+		(string) - the stamped text. An empty last line isn't stamped, it's
+			stamped when its text arrives.
+	"""
+	lines = text.split('\n')
+	for i, line in enumerate(lines):
+		if line and (i > 0 or atLineStart):
+			lines[i] = stamp + line
+	return '\n'.join(lines)
+
+class ReceiveTimeFormatter(logging.Formatter):
+	""" Log formatter whose asctime is the time the data were received at, for
+	records that were logged with extra={'received': time.monotonic_ns()},
+	and the time of logging for the others. """
+
+	def formatTime(self, record, datefmt=None):
+		received = getattr(record, 'received', None)
+		if received is None:
+			return logging.Formatter.formatTime(self, record, datefmt)
+		# The same as logging.Formatter does with record.created.
+		wallClock = toWallClock(received)
+		timeTuple = self.converter(wallClock)
+		if datefmt:
+			return time.strftime(datefmt, timeTuple)
+		return self.default_msec_format % (time.strftime(self.default_time_format, timeTuple),
+			int(wallClock*1000) % 1000)
@@ -49,6 +49,7 @@ setup(
     extras_require={
         'dev': ['pdb'],
         'test': ['unittest'],
+        'udev': ['pyudev'],
     },
 
     package_data={
@@ -0,0 +1,168 @@
+#!/usr/bin/python3
+""" Benchmark SerialMonitor.commsInterface.grabPortOutput without using actual
+hardware. Compare the current implementation with the reference, byte-at-a-time
+implementation it replaced and report the cost in ns per received byte.
+The formatting is also timed on its own, without any port, in MB/s.
+
+This is not a test and isn't picked up by runAllTests - run it by hand, e.g.
+	python3 benchmarkGrabPortOutput.py
+
+.. module:: SerialMonitor
+   :platform: Unix, Windows
+   :synopsis: Timing of the message passing through a serial port.
+
+.. moduleauthor:: Alek, Artur
+
+"""
+import time, os
+import SerialMonitor as sm
+
+TEST_PORT = 'loop://' # Type of the test port. This one is a simple RX <-> TX
+	# type to be used for unit testing.
+	# https://pyserial.readthedocs.io/en/latest/url_handlers.html#loop
+
+# loop:// sleeps for as long as it'd take to send the data at the given baud
+# rate, so make that negligible.
+BAUD_RATE = 1000000000
+
+CHUNK_SIZES = [256, 1024, 4096] # Bytes written into the port before every read.
+	# loop:// holds at most 4096 bytes, writing more would block.
+REPEATS = 50 # How many times to time every case; the best result is reported.
+
+BLOCK_SIZE = 1024*1024 # Bytes formatted at a time when not reading any port.
+
+def legacyGrabFormatted(port, outputBuffer):
+	""" Reference implementation of the 'formatted' branch of grabPortOutput,
+	which goes through the received bytes one by one. Only used to check the
+	results and timings of the current implementation. """
+	if (port.inWaiting() > 0):
+		return legacyFormatFormatted(port.read(port.inWaiting()), outputBuffer)
+	return "", outputBuffer, {}
+
+def legacyFormatFormatted(dataStr, outputBuffer):
+	""" The formatting done by legacyGrabFormatted, without reading a port. """
+	warningSummary = {}
+	output = ""
+	for i in range(len(dataStr)):
+		try:
+			if dataStr[i] < 128:
+				outputBuffer += chr(dataStr[i])
+			else:
+				raise UnicodeDecodeError('SM',dataStr,i,i+1,'Outside of ASCII range, i.e. >=128.')
+		except UnicodeDecodeError as uderr:
+			warningSummary['UnicodeDecodeError{}'.format(len(warningSummary))] = \
+			'UnicodeDecodeError :( with character:\n\t{}'.format(dataStr[i])
+	lines = outputBuffer.rpartition("\n")
+	if lines[0]:
+		for line in lines[0].split("\n"):
+			output += "{}\n".format(line)
+		outputBuffer = lines[2]
+	return output, outputBuffer, warningSummary
+
+def legacyFormatHex(dataStr):
+	""" Reference implementation of the 'hex' formatting, which goes through
+	the received bytes one by one. """
+	return ':'.join('0x'+c.to_bytes(1,'big',signed=False).hex() for c in dataStr)
+
+def legacyFormatRaw(dataStr):
+	""" Reference implementation of the 'raw' formatting, which goes through
+	the received bytes one by one. """
+	output = ""
+	for c in dataStr:
+		output += chr(c)
+	return output
+
+def readOnly(port, outputBuffer):
+	""" Only read the bytes from the port, to show the cost of the port itself. """
+	if (port.inWaiting() > 0):
+		port.read(port.inWaiting())
+	return "", outputBuffer, {}
+
+def makePayload(size, invalidEvery=None):
+	""" Make `size` bytes of 60-character lines terminated with '\n', ending
+	with an incomplete line. Optionally replace every `invalidEvery`th byte
+	with one that isn't valid ASCII. """
+	line = b'T=12345678 ms; ADC=[0123, 0456, 0789, 1011]; state=RUNNING\n'
+	payload = bytearray((line*(size//len(line)+1))[:size])
+	if invalidEvery:
+		payload[::invalidEvery] = b'\xff'*len(payload[::invalidEvery])
+	return bytes(payload)
+
+def timeGrab(port, grab, payload):
+	""" Return the best time per byte [ns] of grab(port, outputBuffer) and the
+	result of the last call. """
+	best = None
+	for i in range(REPEATS):
+		port.write(payload)
+		start = time.perf_counter_ns()
+		result = grab(port, 'DummyBuff')
+		elapsed = time.perf_counter_ns() - start
+		if best is None or elapsed < best:
+			best = elapsed
+	return best/len(payload), result
+
+def timeFormat(formatter, dataStr):
+	""" Return the best throughput [MB/s] of formatter(dataStr) and its result. """
+	best = None
+	for i in range(REPEATS//10):
+		start = time.perf_counter_ns()
+		result = formatter(dataStr)
+		elapsed = time.perf_counter_ns() - start
+		if best is None or elapsed < best:
+			best = elapsed
+	return len(dataStr)/1e6/(best*1e-9), result
+
+def main():
+	port = sm.serial.serial_for_url(url=TEST_PORT, baudrate=BAUD_RATE, timeout=2)
+
+	# Reading loop:// costs about as much as the processing, so also show the
+	# time spent in the processing alone, i.e. after subtracting the read time.
+	print("{:>22s} {:>6s} {:>11s} {:>13s} {:>14s} {:>17s} {:>18s}".format("case", "bytes",
+		"read [ns/B]", "legacy [ns/B]", "current [ns/B]", "legacy proc [ns/B]", "current proc [ns/B]"))
+	for name, invalidEvery in [("formatted, ASCII", None), ("formatted, 1% invalid", 100)]:
+		for size in CHUNK_SIZES:
+			payload = makePayload(size, invalidEvery)
+			tRead, notNeeded = timeGrab(port, readOnly, payload)
+			tLegacy, legacyResult = timeGrab(port, legacyGrabFormatted, payload)
+			tCurrent, currentResult = timeGrab(port, lambda p, b:
+				sm.commsInterface.grabPortOutput(p, b, 'formatted'), payload)
+			if legacyResult != currentResult:
+				raise RuntimeError('Current implementation returned different results for {}.'.format(name))
+			print("{:>22s} {:6d} {:11.1f} {:13.1f} {:14.1f} {:17.1f} {:18.1f}".format(name, size,
+				tRead, tLegacy, tCurrent, max(tLegacy-tRead, 0.), max(tCurrent-tRead, 0.)))
+
+	port.close()
+
+	# Formatting on its own, for chunks that are much larger than loop:// can hold.
+	print()
+	print("{:>22s} {:>9s} {:>16s} {:>17s}".format("case", "bytes",
+		"legacy [MB/s]", "current [MB/s]"))
+	for name, invalidEvery in [("formatted, ASCII", None), ("formatted, 1% invalid", 100)]:
+		dataStr = makePayload(BLOCK_SIZE, invalidEvery)
+		mbLegacy, legacyResult = timeFormat(lambda d: legacyFormatFormatted(d, "")[0], dataStr)
+		mbCurrent, currentResult = timeFormat(lambda d: sm.commsInterface.formatPortOutput(d,
+			sm.commsInterface.LineFramer(), 'formatted')[0], dataStr)
+		if legacyResult != currentResult:
+			raise RuntimeError('Current implementation returned different results for {}.'.format(name))
+		print("{:>22s} {:9d} {:16.1f} {:17.1f}".format(name, BLOCK_SIZE, mbLegacy, mbCurrent))
+		mbCurrent, notNeeded = timeFormat(lambda d: sm.commsInterface.LineFramer().feed(d), dataStr)
+		print("{:>22s} {:9d} {:>16s} {:17.1f}".format("LineFramer" + name[len("formatted"):],
+			BLOCK_SIZE, "-", mbCurrent))
+	dataStr = os.urandom(BLOCK_SIZE)
+	mbLegacy, legacyResult = timeFormat(legacyFormatHex, dataStr)
+	mbCurrent, currentResult = timeFormat(sm.commsInterface.formatHex, dataStr)
+	if legacyResult != currentResult:
+		raise RuntimeError('Current implementation returned different results for hex.')
+	print("{:>22s} {:9d} {:16.1f} {:17.1f}".format("hex", BLOCK_SIZE, mbLegacy, mbCurrent))
+	mbLegacy, legacyResult = timeFormat(legacyFormatRaw, dataStr)
+	mbCurrent, currentResult = timeFormat(lambda d: sm.commsInterface.formatPortOutput(d,
+		None, 'raw')[0], dataStr)
+	if legacyResult != currentResult:
+		raise RuntimeError('Current implementation returned different results for raw.')
+	print("{:>22s} {:9d} {:16.1f} {:17.1f}".format("raw", BLOCK_SIZE, mbLegacy, mbCurrent))
+	mbCurrent, notNeeded = timeFormat(lambda d: sm.commsInterface.formatHex(d,
+		bytesPerLine=16, startOffset=0), dataStr)
+	print("{:>22s} {:9d} {:>16s} {:17.1f}".format("hex, 16 B/line+offset", BLOCK_SIZE, "-", mbCurrent))
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,60 @@
+#!/usr/bin/python3
+""" Benchmark SerialMonitor.sanitiser against the unicodedata expression it
+replaced and report the cost in ns per character.
+
+This is not a test and isn't picked up by runAllTests - run it by hand, e.g.
+	python3 benchmarkSanitiser.py
+
+.. module:: SerialMonitor
+   :platform: Unix, Windows
+   :synopsis: Timing of the clean-up of the received text.
+
+.. moduleauthor:: Alek, Artur
+
+"""
+import time, unicodedata
+import SerialMonitor as sm
+
+REPEATS = 20 # How many times to time every case; the best result is reported.
+
+SIZE = 1024*1024 # Characters in every test text.
+
+def legacySanitise(text):
+	""" Reference implementation, which looks every character up in unicodedata. """
+	return ''.join(ch if unicodedata.category(ch)[0]!='C' else chr(0xFFFD) for ch in text)
+
+def makeText(pattern):
+	""" Repeat the pattern to get SIZE characters. """
+	return (pattern*(SIZE//len(pattern)+1))[:SIZE]
+
+def timeSanitise(sanitise, text):
+	""" Return the best time per character [ns] of sanitise(text) and its result. """
+	best = None
+	for i in range(REPEATS):
+		start = time.perf_counter()
+		result = sanitise(text)
+		elapsed = time.perf_counter() - start
+		if best is None or elapsed < best:
+			best = elapsed
+	return best/len(text)*1e9, result
+
+def main():
+	cases = [
+		('printable ASCII', makeText('Temperature: 23.5 C, humidity: 45 %. ')),
+		('ASCII lines', makeText('Temperature: 23.5 C, humidity: 45 %\r\n')),
+		('raw Latin-1', makeText(bytes(range(256)).decode('latin-1'))),
+		('other Unicode', makeText('Zażółć gęślą jaźń\n')),
+	]
+	sanitiser = sm.sanitiser.Sanitiser()
+
+	print('{:>16s} {:>14s} {:>14s} {:>8s}'.format('text', 'legacy [ns/ch]', 'current [ns/ch]', 'speed-up'))
+	for name, text in cases:
+		legacyTime, legacyResult = timeSanitise(legacySanitise, text)
+		currentTime, currentResult = timeSanitise(sanitiser.sanitise, text)
+		if currentResult != legacyResult:
+			raise RuntimeError('Different results for {}.'.format(name))
+		print('{:>16s} {:14.2f} {:14.2f} {:8.1f}'.format(name, legacyTime, currentTime,
+			legacyTime/currentTime))
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,66 @@
+#!/usr/bin/python3
+""" Test finding the open ports with SerialMonitor.commsInterface.iterActivePorts
+and getActivePorts. Uses pseudo-terminals, where available, instead of hardware.
+
+.. module:: SerialMonitor
+   :platform: Unix, Windows
+   :synopsis: Trial automated testing of the detection of open serial ports.
+
+.. moduleauthor:: Alek, Artur
+
+"""
+import unittest, os, sys, time
+from unittest import mock
+import SerialMonitor as sm
+
+@unittest.skipIf(sys.platform.startswith('win'), 'Needs pseudo-terminals.')
+class Tests(unittest.TestCase):
+
+	def setUp(self):
+		""" Prepare resources for testing. """
+		self.fds = []
+		self.openPorts = []
+		for i in range(4):
+			master, slave = os.openpty()
+			self.fds += [master, slave]
+			self.openPorts.append(os.ttyname(slave))
+		self.candidatePorts = ['/dev/ttyDoesNotExist{}'.format(i) for i in range(4)]
+		self.candidatePorts[1:1] = self.openPorts
+
+	def tearDown(self):
+		""" Done testing, get rid of the test resources."""
+		for fd in self.fds:
+			os.close(fd)
+
+	def testGetActivePorts(self):
+		""" Only the open ports should be returned, in the order of the candidates. """
+		self.assertEqual(sm.commsInterface.getActivePorts(self.candidatePorts),self.openPorts,
+			msg='Expected the pseudo-terminals only.')
+
+	def testIterActivePorts(self):
+		""" All the open ports should be yielded once. """
+		self.assertEqual(sorted(sm.commsInterface.iterActivePorts(self.candidatePorts,maxWorkers=3)),
+			sorted(self.openPorts),msg='Expected the pseudo-terminals only.')
+
+	def testNoCandidates(self):
+		""" No candidates should give no ports straight away. """
+		self.assertEqual(sm.commsInterface.getActivePorts([]),[],msg='Expected no ports.')
+
+	def testHangingPort(self):
+		""" A port that hangs shouldn't hold up the others. """
+		realSerial = sm.serial.Serial
+		def slowSerial(port):
+			if port == self.openPorts[0]:
+				time.sleep(2) # Adapter that takes ages to respond.
+			return realSerial(port)
+
+		start = time.monotonic()
+		with mock.patch.object(sm.commsInterface.serial, 'Serial', slowSerial):
+			ports = sm.commsInterface.iterActivePorts(self.candidatePorts,timeout=0.2,maxWorkers=1)
+			# Other ports should still be found with the only worker stuck.
+			self.assertEqual(sorted(ports),sorted(self.openPorts[1:]),
+				msg='Expected all but the hanging port.')
+		self.assertLess(time.monotonic()-start,1.5,msg='Expected not to wait for the hanging port.')
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,154 @@
+#!/usr/bin/python3
+""" Test the SerialMonitor.asyncCommsInterface without using actual hardware.
+Uses pseudo-terminal pairs, where available, and loop:// ports.
+
+.. module:: SerialMonitor
+   :platform: Unix, Windows
+   :synopsis: Trial automated testing of the message passing through a serial port.
+
+.. moduleauthor:: Alek, Artur
+
+"""
+import unittest, os, sys, asyncio
+import SerialMonitor as sm
+import SerialMonitor.asyncCommsInterface # Not used by the GUI, so not imported with it.
+
+TEST_PORT = 'loop://' # Type of the test port. This one is a simple RX <-> TX
+	# type to be used for unit testing.
+	# https://pyserial.readthedocs.io/en/latest/url_handlers.html#loop
+
+@unittest.skipIf(sys.platform.startswith('win'), 'Needs pseudo-terminals.')
+class PtyTests(unittest.IsolatedAsyncioTestCase):
+
+	async def asyncSetUp(self):
+		""" Prepare resources for testing. """
+		self.ports = []
+		self.masters = []
+		for i in range(2):
+			# Write to the master end of the pair to "receive" bytes in the port.
+			master, slave = os.openpty()
+			self.masters.append(master)
+			self.ports.append(await sm.asyncCommsInterface.AsyncSerialPort.open(
+				os.ttyname(slave), baudrate=9600))
+			os.close(slave)
+
+	async def asyncTearDown(self):
+		""" Done testing, get rid of the test resources."""
+		for port in self.ports:
+			port.close()
+		for master in self.masters:
+			os.close(master)
+
+	async def testUsesFileDescriptor(self):
+		""" Ports with file descriptors shouldn't be polled. """
+		self.assertIsNotNone(self.ports[0].fd,msg='Expected a file descriptor.')
+
+	async def testRead(self):
+		""" Read should wait for the data and return all of it. """
+		reading = asyncio.ensure_future(self.ports[0].read())
+		await asyncio.sleep(0.1)
+		self.assertFalse(reading.done(),msg='Expected read to wait for data.')
+		os.write(self.masters[0], b'HelloWorld')
+		self.assertEqual(await asyncio.wait_for(reading, 2),b'HelloWorld',msg='Expected HelloWorld.')
+
+	async def testReadline(self):
+		""" Readline should return one complete line at a time. """
+		os.write(self.masters[0], b'Hello')
+		reading = asyncio.ensure_future(self.ports[0].readline())
+		await asyncio.sleep(0.1)
+		self.assertFalse(reading.done(),msg='Expected readline to wait for the EOL.')
+		os.write(self.masters[0], b'World\nNext\n')
+		self.assertEqual(await asyncio.wait_for(reading, 2),b'HelloWorld\n',msg='Expected HelloWorld\\n.')
+		self.assertEqual(await asyncio.wait_for(self.ports[0].readline(), 2),b'Next\n',msg='Expected Next\\n.')
+
+	async def testWrite(self):
+		""" Written bytes should come out of the other end. """
+		await self.ports[0].write(b'HelloWorld')
+		await asyncio.sleep(0.1)
+		self.assertEqual(os.read(self.masters[0], 100),b'HelloWorld',msg='Expected HelloWorld.')
+
+	async def testManyPortsOneLoop(self):
+		""" All ports should be read concurrently from one event loop. """
+		framers = [sm.commsInterface.LineFramer() for port in self.ports]
+		reading = asyncio.gather(*[port.readOutput(framer, 'formatted')
+			for port, framer in zip(self.ports, framers)])
+		await asyncio.sleep(0.1)
+		os.write(self.masters[1], b'Second\n')
+		os.write(self.masters[0], b'First\n')
+		results = await asyncio.wait_for(reading, 2)
+		self.assertEqual([output for output, decodeErrors in results],['First\n','Second\n'],
+			msg='Expected one line from every port.')
+
+	async def testDisconnected(self):
+		""" Read should raise SerialException once the other end goes away. """
+		os.close(self.masters[0])
+		self.masters[0] = os.open(os.devnull, os.O_RDONLY) # Closed in tearDown.
+		with self.assertRaises(sm.serial.SerialException):
+			await asyncio.wait_for(self.ports[0].read(), 2)
+
+	async def testCloseWhileReading(self):
+		""" Closing should stop watching the port and fail the pending read. """
+		port = self.ports[0]
+		fd = port.fd
+		reading = asyncio.ensure_future(port.read())
+		await asyncio.sleep(0.1)
+		port.close()
+		with self.assertRaises(sm.serial.SerialException):
+			await asyncio.wait_for(reading, 2)
+		self.assertFalse(port.loop.remove_reader(fd),msg='Expected the fd not watched any more.')
+		with self.assertRaises(sm.serial.SerialException):
+			await asyncio.wait_for(port.read(), 2)
+
+class LoopTests(unittest.IsolatedAsyncioTestCase):
+
+	async def asyncSetUp(self):
+		""" Prepare resources for testing. """
+		self.port = await sm.asyncCommsInterface.AsyncSerialPort.open(TEST_PORT, baudrate=9600)
+
+	async def asyncTearDown(self):
+		""" Done testing, get rid of the test resources."""
+		self.port.close()
+
+	async def testPolled(self):
+		""" loop:// has no file descriptor and should be polled. """
+		self.assertIsNone(self.port.fd,msg='Expected no file descriptor.')
+
+	async def testCloseWhileReading(self):
+		""" A polled read should fail once the port is closed. """
+		reading = asyncio.ensure_future(self.port.read())
+		await asyncio.sleep(0.1)
+		self.port.close()
+		with self.assertRaises(sm.serial.SerialException):
+			await asyncio.wait_for(reading, 2)
+
+	async def testReadOutput(self):
+		""" Formatted output should only be returned for complete lines. """
+		framer = sm.commsInterface.LineFramer()
+		await self.port.write(b'Hello')
+		output, decodeErrors = await asyncio.wait_for(self.port.readOutput(framer, 'formatted'), 2)
+		self.assertEqual(output,'',msg='Expected empty output for an incomplete line.')
+		await self.port.write(b'World\n\x80')
+		output, decodeErrors = await asyncio.wait_for(self.port.readOutput(framer, 'formatted'), 2)
+		self.assertEqual(output,'HelloWorld\n',msg='Expected HelloWorld\\n.')
+		self.assertEqual(len(decodeErrors),1,msg='Expected one error.')
+
+	async def testReadOutputRaiseErrors(self):
+		""" Should raise VE for invalid outputFormat and TE for wrong argument types. """
+		with self.assertRaises(ValueError):
+			await self.port.readOutput(sm.commsInterface.LineFramer(), 'invalidFormat')
+		with self.assertRaises(TypeError):
+			await self.port.readOutput('DummyBuff', 'formatted')
+		self.assertRaises(TypeError,sm.asyncCommsInterface.AsyncSerialPort,'not a port')
+
+	def testNoRunningLoop(self):
+		""" A port should only be made without a loop from a coroutine. """
+		port = sm.serial.serial_for_url(TEST_PORT)
+		self.assertRaises(RuntimeError,sm.asyncCommsInterface.AsyncSerialPort,port)
+		loop = asyncio.new_event_loop()
+		self.assertIs(sm.asyncCommsInterface.AsyncSerialPort(port, loop=loop).loop,loop,
+			msg='Expected the given loop.')
+		loop.close()
+		port.close()
+
+if __name__ == '__main__':
+	unittest.main()
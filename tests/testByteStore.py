@@ -0,0 +1,80 @@
+#!/usr/bin/python3
+""" Test the SerialMonitor.byteStore and SerialMonitor.hexDump without using the GUI.
+
+.. module:: SerialMonitor
+   :platform: Unix, Windows
+   :synopsis: Trial automated testing of keeping the raw bytes and showing them as a hex dump.
+
+.. moduleauthor:: Alek, Artur
+
+"""
+import unittest
+import SerialMonitor as sm
+
+class Tests(unittest.TestCase):
+
+	def testOffsets(self):
+		""" Offsets should stay the same when the oldest bytes are dropped. """
+		store = sm.byteStore.ByteStore(maxBytes=64, dropBlock=32)
+		store.append(bytes(range(50)))
+		store.append(bytes(range(50,100)))
+		self.assertEqual(store.startOffset,48,msg='Expected a 32 byte block dropped, rounded up to 16.')
+		self.assertEqual(len(store),52,msg='Expected 52 bytes kept.')
+		self.assertEqual(store.endOffset,100,msg='Expected to end at offset 100.')
+		self.assertEqual(store.getBytes(60,63),bytes([60,61,62]),msg='Expected bytes 60-62.')
+		self.assertEqual(store.getBytes(0,50),bytes([48,49]),msg='Expected dropped bytes clipped.')
+		store.clear()
+		self.assertEqual(store.endOffset,0,msg='Expected offsets from 0 after clear.')
+		self.assertRaises(ValueError,store.setLimits,0)
+
+	def testTimestamps(self):
+		""" Every chunk should keep the time it was received at. """
+		store = sm.byteStore.ByteStore(maxBytes=64, dropBlock=16)
+		self.assertIsNone(store.lastTimestamp,msg='Expected no timestamp without bytes.')
+		store.append(b'A'*30, 100)
+		store.append(b'', 150)
+		store.append(b'B'*30, 200)
+		store.append(b'C'*10, 300)
+		self.assertEqual(store.lastTimestamp,300,msg='Expected the time of the last chunk.')
+		self.assertEqual([store.timestampAt(offset) for offset in [29, 30, 65, 70]],[100, 200, 300, None],
+			msg='Expected the times of the chunks holding the bytes.')
+		self.assertEqual(store.getChunks(25,65),[(25,100,b'A'*5), (30,200,b'B'*30), (60,300,b'C'*5)],
+			msg='Expected three chunks clipped to the offsets.')
+		store.append(b'D'*10, 400)
+		self.assertEqual(store.startOffset,16,msg='Expected 16 bytes dropped.')
+		self.assertEqual(len(store.chunkTimes),4,msg='Expected the first chunk still kept.')
+		self.assertEqual(store.timestampAt(10),None,msg='Expected no time for a dropped byte.')
+		self.assertEqual(store.timestampAt(16),100,msg='Expected the time of the first chunk.')
+		store.append(b'E'*40, 500)
+		self.assertEqual(list(store.chunkTimes),[300, 400, 500],msg='Expected the chunks dropped.')
+
+	def testRows(self):
+		""" Rows should show the offset, 16 hex codes and the printable ASCII. """
+		store = sm.byteStore.ByteStore()
+		rows = sm.hexDump.HexDump(store)
+		self.assertEqual(len(rows),0,msg='Expected no rows without bytes.')
+		store.append(b'Hello world\n\x00\x01\xff\x7fSerial')
+		self.assertEqual(len(rows),2,msg='Expected two rows.')
+		self.assertEqual(rows.getText(0),
+			'00000000  48 65 6c 6c 6f 20 77 6f 72 6c 64 0a 00 01 ff 7f  |Hello world.....|',
+			msg='Expected a full row.')
+		self.assertEqual(rows[-1],(('00000010  53 65 72 69 61 6c'+' '*30+'  |Serial|',(0,0,0)),),
+			msg='Expected a padded last row.')
+		self.assertRaises(IndexError,lambda: rows[2])
+
+	def testDroppedRows(self):
+		""" Rows should be counted from the oldest byte kept. """
+		store = sm.byteStore.ByteStore(maxBytes=40, dropBlock=1)
+		rows = sm.hexDump.HexDump(store)
+		store.append(b'A'*50)
+		self.assertEqual(rows.dropped,1,msg='Expected one row dropped.')
+		self.assertEqual(len(rows),3,msg='Expected three rows kept.')
+		self.assertTrue(rows.getText(0).startswith('00000010  41'),msg='Expected the row at 0x10 first.')
+
+	def testSkip(self):
+		""" Missing bytes at the start of a row should be left blank. """
+		self.assertEqual(sm.hexDump.formatHexDumpRow(b'AB',0x20,bytesPerRow=4,skip=2),
+			'00000020        41 42  |  AB|',msg='Expected two blanks.')
+
+if __name__ == '__main__':
+	unittest.main()
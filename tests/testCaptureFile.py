@@ -0,0 +1,147 @@
+#!/usr/bin/python3
+""" Test the SerialMonitor.captureFile without using the GUI.
+
+.. module:: SerialMonitor
+   :platform: Unix, Windows
+   :synopsis: Trial automated testing of capturing the raw bytes to a file.
+
+.. moduleauthor:: Alek, Artur
+
+"""
+import unittest, os, shutil, tempfile, time
+import SerialMonitor as sm
+
+class Tests(unittest.TestCase):
+
+	def setUp(self):
+		""" Prepare resources for testing. """
+		self.directory = tempfile.mkdtemp()
+		self.path = os.path.join(self.directory, 'test.smcap')
+		# 1000 received chunks of 100 bytes, 10 ms apart, and a sent one.
+		writer = sm.captureFile.CaptureWriter(self.path, blockSize=4096, mergeInterval=0)
+		self.portId = writer.addPort('/dev/ttyUSB0')
+		writer.write(b'Hello\n', sm.captureFile.SENT, self.portId, 0)
+		for i in range(1000):
+			writer.write(bytes([i % 256])*100, sm.captureFile.RECEIVED, self.portId, (i+1)*10000000)
+		writer.close()
+
+	def tearDown(self):
+		""" Clean up after testing. """
+		shutil.rmtree(self.directory)
+
+	def testRecords(self):
+		""" The records should be read back as they were written. """
+		reader = sm.captureFile.CaptureReader(self.path)
+		self.assertEqual(reader.ports,{self.portId: '/dev/ttyUSB0'},msg='Expected the port name.')
+		records = [record for record in reader.records() if record.kind != sm.captureFile.PORT]
+		self.assertEqual(len(records),1001,msg='Expected all the chunks.')
+		self.assertEqual(records[0][:4],(sm.captureFile.SENT,self.portId,0,b'Hello\n'),
+			msg='Expected the sent chunk first.')
+		self.assertEqual(records[-1][:4],(sm.captureFile.RECEIVED,self.portId,10000000000,bytes([999 % 256])*100),
+			msg='Expected the last received chunk.')
+		self.assertEqual(records[-1].receivedOffset,99900,msg='Expected 999 chunks received before.')
+		self.assertAlmostEqual(reader.toWallClock(time.monotonic_ns()),time.time(),delta=1.,
+			msg='Expected the wall clock time.')
+		# 15 bytes per record on top of the data.
+		self.assertLess(os.path.getsize(self.path),100006*1.16,msg='Expected little overhead.')
+		reader.close()
+
+	def testSeek(self):
+		""" Seeking should start reading just before the time or offset. """
+		reader = sm.captureFile.CaptureReader(self.path)
+		self.assertGreater(len(reader.indexTimes),20,msg='Expected an index entry per 4 KiB.')
+		start = reader.seekTime(5000000000)
+		record = next(reader.records(start))
+		self.assertLessEqual(record.timestamp,5000000000,msg='Expected to start before 5 s.')
+		self.assertGreater(record.timestamp,4500000000,msg='Expected to start near 5 s.')
+		start = reader.seekOffset(50050)
+		record = next(reader.records(start))
+		self.assertLessEqual(record.receivedOffset,50050,msg='Expected to start before the byte.')
+		self.assertGreater(record.receivedOffset,45000,msg='Expected to start near the byte.')
+		reader.close()
+
+	def testReceivedBytes(self):
+		""" Received bytes should be read by their offset, like from a ByteStore. """
+		reader = sm.captureFile.CaptureReader(self.path)
+		self.assertEqual(len(reader),100000,msg='Expected only the received bytes counted.')
+		self.assertEqual(reader.lastTimestamp,10000000000,msg='Expected the time of the last chunk.')
+		self.assertEqual(reader.getBytes(50050,50250),bytes([500 % 256])*50+bytes([501 % 256])*100+bytes([502 % 256])*50,
+			msg='Expected bytes across three chunks.')
+		self.assertEqual(reader.getBytes(99990,100100),bytes([999 % 256])*10,msg='Expected bytes up to the end.')
+		self.assertEqual(reader.timestampAt(50099),501*10000000,msg='Expected the time of the chunk.')
+		self.assertIsNone(reader.timestampAt(100000),msg='Expected no time past the end.')
+		self.assertEqual(sm.hexDump.HexDump(reader).getText(0)[:18],'00000000  00 00 00',
+			msg='Expected a hex dump of the capture.')
+		reader.close()
+
+	def testMerging(self):
+		""" Chunks of a slow port should be merged, so that the record headers
+		don't take more space than the data, when asked to. """
+		path = os.path.join(self.directory, 'merged.smcap')
+		writer = sm.captureFile.CaptureWriter(path, mergeInterval=250000000)
+		portId = writer.addPort('/dev/ttyUSB0')
+		# A byte every 0.1 ms, as at 115200 baud, with a sent chunk in the middle.
+		for i in range(10000):
+			if i == 5000:
+				writer.write(b'Hello\n', sm.captureFile.SENT, portId, i*100000)
+			writer.write(bytes([i % 256]), sm.captureFile.RECEIVED, portId, i*100000)
+		size = writer.size
+		writer.close()
+		self.assertEqual(os.path.getsize(path),size,msg='Expected the size to count the record being merged.')
+		overhead = os.path.getsize(path)/10006. - 1
+		self.assertLess(overhead,0.05,msg='Expected a few percent overhead, not {:.0%}.'.format(overhead))
+
+		reader = sm.captureFile.CaptureReader(path)
+		records = [record for record in reader.records() if record.kind != sm.captureFile.PORT]
+		self.assertEqual([record.timestamp for record in records[:2]],[0,250000000],
+			msg='Expected a record every 250 ms, with the time of its first chunk.')
+		self.assertEqual(records[2][:4],(sm.captureFile.SENT,portId,500000000,b'Hello\n'),
+			msg='Expected the sent chunk on its own.')
+		self.assertEqual(reader.getBytes(0, 10000),bytes(i % 256 for i in range(10000)),
+			msg='Expected all the received bytes in order.')
+		reader.close()
+
+	def testDefaultMerging(self):
+		""" By default, only chunks a few ms apart should be merged, so that
+		their times are kept well enough to replay them. """
+		path = os.path.join(self.directory, 'default.smcap')
+		writer = sm.captureFile.CaptureWriter(path)
+		for i in range(10): # Two chunks 1 ms apart every 10 ms.
+			writer.write(b'a', sm.captureFile.RECEIVED, 0, i*10000000)
+			writer.write(b'b', sm.captureFile.RECEIVED, 0, i*10000000 + 1000000)
+		writer.close()
+		reader = sm.captureFile.CaptureReader(path)
+		self.assertEqual([(record.timestamp, record.data) for record in reader.records()],
+			[(i*10000000, b'ab') for i in range(10)],msg='Expected every pair in a record of its own.')
+		reader.close()
+
+	def testSentLast(self):
+		""" The received bytes should be counted when the last block of the
+		index starts with a sent record, e.g. a command typed at the end. """
+		path = os.path.join(self.directory, 'sent.smcap')
+		writer = sm.captureFile.CaptureWriter(path, blockSize=16, mergeInterval=0)
+		writer.write(b'x'*120, sm.captureFile.RECEIVED, 0, 0)
+		writer.write(b'Stop\n', sm.captureFile.SENT, 0, 1)
+		writer.close()
+		reader = sm.captureFile.CaptureReader(path)
+		self.assertEqual(reader.indexTimes[-1],1,msg='Expected the sent record indexed last.')
+		self.assertEqual(len(reader),120,msg='Expected the received bytes counted.')
+		self.assertEqual(reader.getBytes(100, 120),b'x'*20,msg='Expected the received bytes read.')
+		self.assertEqual(reader.lastTimestamp,1,msg='Expected the time of the sent record.')
+		reader.close()
+
+	def testNoIndex(self):
+		""" The index should be rebuilt if missing, and a cut record ignored. """
+		os.remove(self.path + sm.captureFile.INDEX_SUFFIX)
+		with open(self.path, 'ab') as captureFile:
+			captureFile.write(b'\x10\x00\x00\x00\x00')
+		reader = sm.captureFile.CaptureReader(self.path)
+		self.assertEqual(len(reader.indexTimes),2,msg='Expected the index rebuilt with 64 KiB blocks.')
+		self.assertEqual(len(list(reader.records())),1002,msg='Expected the cut record ignored.')
+		reader.close()
+		with open(self.path, 'wb') as captureFile:
+			captureFile.write(b'Not a capture file.')
+		self.assertRaises(ValueError,sm.captureFile.CaptureReader,self.path)
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,75 @@
+#!/usr/bin/python3
+""" Test the SerialMonitor.captureView without using the GUI.
+
+.. module:: SerialMonitor
+   :platform: Unix, Windows
+   :synopsis: Trial automated testing of showing the lines of capture files.
+
+.. moduleauthor:: Alek, Artur
+
+"""
+import unittest, os, shutil, tempfile
+import SerialMonitor as sm
+
+class Tests(unittest.TestCase):
+
+	def setUp(self):
+		""" Prepare resources for testing. """
+		self.directory = tempfile.mkdtemp()
+		self.path = os.path.join(self.directory, 'test.smcap')
+		# 2000 lines split across chunks of 7 bytes, with sent chunks between.
+		self.lines = [('Line {} \xe9'.format(i)).encode('latin-1') for i in range(2000)]
+		dataStr = b'\n'.join(self.lines) + b'\n' + b'Unfinished'
+		writer = sm.captureFile.CaptureWriter(self.path, blockSize=1024)
+		for i in range(0, len(dataStr), 7):
+			writer.write(dataStr[i:i+7], sm.captureFile.RECEIVED, 0, i)
+			if i % 700 == 0:
+				writer.write(b'Sent\n', sm.captureFile.SENT, 0, i)
+		writer.close()
+		self.reader = sm.captureFile.CaptureReader(self.path)
+
+	def tearDown(self):
+		""" Clean up after testing. """
+		self.reader.close()
+		shutil.rmtree(self.directory)
+
+	def testLines(self):
+		""" Lines should be found once counted and decoded when read. """
+		lines = sm.captureView.CaptureLines(self.reader)
+		self.assertEqual(len(lines),0,msg='Expected no lines before counting.')
+		lines.start()
+		lines.thread.join()
+		self.assertEqual(lines.counted,1.,msg='Expected everything counted.')
+		self.assertEqual(len(lines),2001,msg='Expected the unfinished line, too.')
+		self.assertEqual(lines.getText(0),'Line 0 ',msg='Expected non-ASCII bytes dropped.')
+		self.assertEqual(lines.getText(1234),'Line 1234 ',msg='Expected the line in the middle.')
+		self.assertEqual(lines[-1],[('Unfinished',sm.highlighter.DEFAULT_COLOUR)],msg='Expected the last line.')
+		self.assertEqual([lines.getBytes(i) for i in range(2000)],self.lines,msg='Expected all the lines.')
+		self.assertRaises(IndexError,lines.getText,2001)
+		lines.outputFormat = 'raw'
+		self.assertEqual(lines.getText(5),'Line 5 \xe9',msg='Expected a character per byte.')
+
+	def testLineAt(self):
+		""" The line holding a byte should be found. """
+		lines = sm.captureView.CaptureLines(self.reader, cachedBlocks=2)
+		lines.start()
+		lines.thread.join()
+		for i in [0, 1, 500, 1999]:
+			offset = lines.lineStart(i)
+			self.assertEqual(lines.lineAt(offset),i,msg='Expected line {} at its start.'.format(i))
+			self.assertEqual(lines.lineAt(offset + 5),i,msg='Expected line {} in the middle.'.format(i))
+		self.assertLessEqual(len(lines.blockCache),2,msg='Expected the cache limited.')
+
+	def testHighlighting(self):
+		""" Lines should be cleaned and highlighted like the live output. """
+		rules = sm.highlighter.parseRules('#ff0000 Line 7\\b')
+		lines = sm.captureView.CaptureLines(self.reader, 'raw', sm.sanitiser.Sanitiser(),
+			sm.highlighter.Highlighter(rules))
+		lines.start()
+		lines.thread.join()
+		self.assertEqual([text for text, colour in lines[7]],['Line 7',' \xe9'],
+			msg='Expected the match highlighted.')
+		self.assertEqual(lines[7][0][1].colour,(255,0,0),msg='Expected the colour of the rule.')
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,56 @@
+#!/usr/bin/python3
+""" Test the SerialMonitor.commsInterface.DecodeErrorSummary without using
+actual hardware.
+
+.. module:: SerialMonitor
+   :platform: Unix, Windows
+   :synopsis: Trial automated testing of the reporting of decoding errors.
+
+.. moduleauthor:: Alek, Artur
+
+"""
+import unittest
+import SerialMonitor as sm
+
+class Tests(unittest.TestCase):
+
+	def testEmpty(self):
+		""" New summary should have no errors and evaluate to False. """
+		decodeErrors = sm.commsInterface.DecodeErrorSummary()
+		self.assertFalse(decodeErrors,msg='Expected empty summary to be False.')
+		self.assertEqual(len(decodeErrors),0,msg='Expected no errors.')
+		self.assertEqual(decodeErrors.rate,0.,msg='Expected zero error rate.')
+
+	def testSamplesAreLimited(self):
+		""" Only the first maxSamples errors should be kept, but all counted. """
+		framer = sm.commsInterface.LineFramer()
+		notNeeded, decodeErrors = framer.feed(b'\xff'*1000+b'A\n')
+		self.assertTrue(decodeErrors,msg='Expected non-empty summary to be True.')
+		self.assertEqual(len(decodeErrors),1000,msg='Expected 1000 errors.')
+		self.assertEqual(decodeErrors.offsets,list(range(decodeErrors.maxSamples)),
+			msg='Expected only the first offsets.')
+		self.assertEqual(decodeErrors.samples,b'\xff'*decodeErrors.maxSamples,
+			msg='Expected only the first samples.')
+		self.assertAlmostEqual(decodeErrors.rate,1000./1002,msg='Expected 1000 of 1002 bytes to be invalid.')
+
+	def testMerge(self):
+		""" Merging should add up the counts and keep the earliest samples. """
+		framer = sm.commsInterface.LineFramer()
+		notNeeded, decodeErrors = framer.feed(b'\x80A\x81')
+		notNeeded, moreErrors = framer.feed(b'B\x82')
+		decodeErrors.merge(moreErrors)
+		self.assertEqual(decodeErrors.counts,{'UnicodeDecodeError':3},msg='Expected three errors.')
+		self.assertEqual(decodeErrors.offsets,[0,2,4],msg='Expected errors at offsets 0, 2 and 4.')
+		self.assertEqual(decodeErrors.samples,b'\x80\x81\x82',msg='Expected 0x80, 0x81 and 0x82 samples.')
+		self.assertEqual(decodeErrors.bytesChecked,5,msg='Expected five bytes checked.')
+
+	def testDescribe(self):
+		""" All errors should be described in a single line. """
+		framer = sm.commsInterface.LineFramer()
+		notNeeded, decodeErrors = framer.feed(b'\x80ABC\xff')
+		self.assertEqual(decodeErrors.describe(),
+			'UnicodeDecodeError x2 (40.00% of 5 bytes), first at offsets 0,4 with bytes 0x80:0xff',
+			msg='Expected a one-line description.')
+
+if __name__ == '__main__':
+	unittest.main()
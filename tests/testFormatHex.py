@@ -0,0 +1,60 @@
+#!/usr/bin/python3
+""" Test the SerialMonitor.commsInterface.formatHex without using actual hardware.
+
+.. module:: SerialMonitor
+   :platform: Unix, Windows
+   :synopsis: Trial automated testing of the formatting of the received bytes.
+
+.. moduleauthor:: Alek, Artur
+
+"""
+import unittest
+import SerialMonitor as sm
+
+class Tests(unittest.TestCase):
+
+	def testEmpty(self):
+		""" No bytes should give an empty string in every mode. """
+		self.assertEqual(sm.commsInterface.formatHex(b''),'',msg='Expected empty string.')
+		self.assertEqual(sm.commsInterface.formatHex(b'',bytesPerLine=16),'',msg='Expected empty string.')
+		self.assertEqual(sm.commsInterface.formatHex(b'',startOffset=0),'',msg='Expected empty string.')
+
+	def testCompatibleAllBytes(self):
+		""" Default mode should match the old, one byte at a time formatting for
+		every possible byte. """
+		sentBytes = bytes(range(256))*2
+		expected = ':'.join('0x'+c.to_bytes(1,'big',signed=False).hex() for c in sentBytes)
+		self.assertEqual(sm.commsInterface.formatHex(sentBytes),expected,
+			msg='Expected the same output as the old hex formatting.')
+
+	def testSingleByte(self):
+		""" A single byte shouldn't have any separators. """
+		self.assertEqual(sm.commsInterface.formatHex(b'\x00'),'0x00',msg='Expected 0x00.')
+		self.assertEqual(sm.commsInterface.formatHex(b'\x0a'),'0x0a',msg='Expected 0x0a.')
+		self.assertEqual(sm.commsInterface.formatHex(b'\xff'),'0xff',msg='Expected 0xff.')
+
+	def testBytesLikeInput(self):
+		""" bytearray and memoryview should be formatted the same as bytes. """
+		sentBytes = b'\x00\x01\x0aA\xff'
+		expected = '0x00:0x01:0x0a:0x41:0xff'
+		self.assertEqual(sm.commsInterface.formatHex(bytearray(sentBytes)),expected,
+			msg='Expected {} for bytearray.'.format(expected))
+		self.assertEqual(sm.commsInterface.formatHex(memoryview(sentBytes)),expected,
+			msg='Expected {} for memoryview.'.format(expected))
+
+	def testBytesPerLine(self):
+		""" Bytes should be split into lines of the requested length. """
+		self.assertEqual(sm.commsInterface.formatHex(b'\x00\x01\x02\x03\x04',bytesPerLine=2),
+			'0x00:0x01\n0x02:0x03\n0x04\n',msg='Expected three lines.')
+		self.assertEqual(sm.commsInterface.formatHex(b'\x00\x01',bytesPerLine=2),
+			'0x00:0x01\n',msg='Expected one line.')
+
+	def testOffsets(self):
+		""" Every line should start with the offset of its first byte. """
+		self.assertEqual(sm.commsInterface.formatHex(b'\x00\x01\x02',bytesPerLine=2,startOffset=30),
+			'0000001e: 0x00:0x01\n00000020: 0x02\n',msg='Expected two lines with offsets.')
+		self.assertEqual(sm.commsInterface.formatHex(b'\x00\x01\x02',startOffset=0),
+			'00000000: 0x00:0x01:0x02\n',msg='Expected one line with an offset.')
+
+if __name__ == '__main__':
+	unittest.main()
@@ -457,6 +457,25 @@ class Tests(unittest.TestCase):
 		# The port should be empty now.
 		self.assertEqual(self.fixture.read(1),b'',msg='Expected empty buffer after the test.')
 
+	def testFormattedManyLinesValidInvalidASCII(self):
+		""" Send many lines with invalid ASCII bytes scattered around in one go. """
+		self.fixture.write(b'\x80Line1\n\x81Li\xffne2\n\nLine\xfe3')
+		time.sleep(0.1) # In case there's a delay (to be expected on Windows).
+		formattedOutput=sm.commsInterface.grabPortOutput(self.fixture,'DummyBuff','formatted')
+		# All the complete lines go to output in one go, without the invalid bytes.
+		self.assertEqual(formattedOutput[0],'DummyBuffLine1\nLine2\n\n',
+			msg='Expected DummyBuffLine1\\nLine2\\n\\n in output.')
+		# Incomplete line goes to the outputBuffer, also without the invalid byte.
+		self.assertEqual(formattedOutput[1],'Line3',msg='Expected Line3 in outputBuffer.')
+		# Should have one warning per invalid byte, in the order they were sent.
+		self.assertEqual(len(formattedOutput[2]),4,msg='Expected four warnings in the dict.')
+		for i, badByte in enumerate([0x80, 0x81, 0xff, 0xfe]):
+			self.assertEqual(formattedOutput[2]['UnicodeDecodeError{}'.format(i)],
+				'UnicodeDecodeError :( with character:\n\t{}'.format(badByte),
+				msg='Expected warning about {} under UnicodeDecodeError{}.'.format(badByte, i))
+		# The port should be empty now.
+		self.assertEqual(self.fixture.read(1),b'',msg='Expected empty buffer after the test.')
+
 	# port.inWaiting==0, should return the input outputBuffer - (empty dataStr)     DONE
 	# test formatted output with:
 		# 1) valid ASCII characters,                                                DONE
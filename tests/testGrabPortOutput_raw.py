@@ -331,6 +331,33 @@ class Tests(unittest.TestCase):
 			# The port should be empty now.
 			self.assertEqual(self.fixture.read(1),b'',msg='Expected empty buffer after the test.')
 
+	def testRaw_BytesLikeInput(self):
+		""" Raw formatting of bytes, bytearray and memoryview should be the same
+		as converting one byte at a time, for every possible byte. """
+		sentBytes=bytes(range(256))
+		goodAns=''.join(chr(c) for c in sentBytes)
+		framer=sm.commsInterface.LineFramer()
+		for dataStr in [sentBytes,bytearray(sentBytes),memoryview(sentBytes)]:
+			rawOutput=sm.commsInterface.formatPortOutput(dataStr,framer,'raw')
+			self.assertEqual(rawOutput[0],goodAns,msg='Expected all 256 characters for {}.'.format(type(dataStr)))
+			# Should have no errors.
+			self.assertEqual(len(rawOutput[1]),0,msg='Expected no errors.')
+
+	def testRaw_ReadBuffer(self):
+		""" Raw message read into a preallocated buffer. """
+		readBuffer=bytearray(4)
+		framer=sm.commsInterface.LineFramer()
+		self.fixture.write(b'\x00A\xff\x00BC')
+		time.sleep(0.1) # In case there's a delay (to be expected on Windows).
+		# Only as many bytes as fit in the buffer should be read at a time.
+		rawOutput=sm.commsInterface.readPortOutput(self.fixture,framer,'raw',readBuffer)
+		self.assertEqual(rawOutput[0],'\x00A\xff\x00',msg='Expected \\x00A\\xff\\x00.')
+		rawOutput=sm.commsInterface.readPortOutput(self.fixture,framer,'raw',readBuffer)
+		self.assertEqual(rawOutput[0],'BC',msg='Expected BC.')
+		self.assertEqual(len(rawOutput[1]),0,msg='Expected no errors.')
+		# The port should be empty now.
+		self.assertEqual(self.fixture.read(1),b'',msg='Expected empty buffer after the test.')
+
 	# port.inWaiting==0, should return the input outputBuffer - (empty dataStr)     DONE
 	# Test raw output with:
 		# 1) valid and invalid ASCII characters,                                    DONE
@@ -0,0 +1,76 @@
+#!/usr/bin/python3
+""" Test the SerialMonitor.highlighter without using the GUI.
+
+.. module:: SerialMonitor
+   :platform: Unix, Windows
+   :synopsis: Trial automated testing of colouring the output shown in the GUI.
+
+.. moduleauthor:: Alek, Artur
+
+"""
+import unittest
+import SerialMonitor as sm
+
+BLACK = (0,0,0)
+RED = sm.highlighter.Style(255,0,0,True)
+GREY = sm.highlighter.Style(128,128,128,False)
+
+class Tests(unittest.TestCase):
+
+	def setUp(self):
+		""" Prepare resources for testing. """
+		self.rules = sm.highlighter.parseRules('#ff0000,bold ERROR\n\n// Comment\n#808080,line ^heartbeat')
+
+	def testParse(self):
+		""" Rules should be read and written in the same format. """
+		self.assertEqual(self.rules,[sm.highlighter.Rule('ERROR',(255,0,0),True,False),
+			sm.highlighter.Rule('^heartbeat',(128,128,128),False,True)],msg='Expected two rules.')
+		self.assertEqual(sm.highlighter.parseRules(sm.highlighter.formatRules(self.rules)),self.rules,
+			msg='Expected the same rules after formatting.')
+		for text in ['red ERROR', '#ff0000', '#ff0000,italic ERROR', '#ff0000 (']:
+			self.assertRaises(ValueError,sm.highlighter.parseRules,text)
+
+	def testHighlight(self):
+		""" Matches should get the style of their rule, whole lines for line rules. """
+		highlighter = sm.highlighter.Highlighter(self.rules)
+		self.assertEqual(highlighter.highlight('ok\nheartbeat 1 ERROR\nan ERROR here\n'),
+			[('ok\n',BLACK), ('heartbeat 1 ERROR\n',GREY), ('an ',BLACK), ('ERROR',RED), (' here\n',BLACK)],
+			msg='Expected the heartbeat line grey and the other ERROR red.')
+		self.assertEqual(RED.colour,(255,0,0),msg='Expected the RGB colour.')
+
+	def testLineRule(self):
+		""" A line rule should take over the matches earlier in its line. """
+		highlighter = sm.highlighter.Highlighter(sm.highlighter.parseRules('#ff0000,bold ERROR\n#808080,line beat'))
+		self.assertEqual(highlighter.highlight('ERROR\nERROR heartbeat\nbeat'),
+			[('ERROR',RED), ('\n',BLACK), ('ERROR heartbeat\n',GREY), ('beat',GREY)],
+			msg='Expected the whole second line grey.')
+
+	def testGlobalFlags(self):
+		""" A rule starting with global flags should only apply them to itself. """
+		rules = sm.highlighter.parseRules('#ff0000,bold ERROR\n#808080 (?i)warn')
+		highlighter = sm.highlighter.Highlighter(rules)
+		self.assertIsNotNone(highlighter.regex,msg='Expected the rules combined.')
+		self.assertEqual(highlighter.highlight('WARN error ERROR'),
+			[('WARN',GREY), (' error ',BLACK), ('ERROR',RED)],msg='Expected only warn to ignore case.')
+		rules = sm.highlighter.parseRules('#808080 (?x) warn # Comment\n#ff0000,bold ERROR')
+		self.assertEqual(sm.highlighter.Highlighter(rules).highlight('warn ERROR'),
+			[('warn',GREY), (' ',BLACK), ('ERROR',RED)],msg='Expected the comment to end with its rule.')
+
+	def testBackreferences(self):
+		""" Rules referring to their own groups should match as they would on
+		their own. """
+		rules = sm.highlighter.parseRules('#ff0000,bold (a)x\n#808080 (b)\\1\n#808080 (?P<c>c)(?P=c)')
+		highlighter = sm.highlighter.Highlighter(rules)
+		self.assertIsNone(highlighter.regex,msg='Expected the rules searched for one by one.')
+		self.assertEqual(highlighter.highlight('ax bb b cc ax'),
+			[('ax',RED), (' ',BLACK), ('bb',GREY), (' b ',BLACK), ('cc',GREY), (' ',BLACK), ('ax',RED)],
+			msg='Expected every rule to match.')
+
+	def testNoRules(self):
+		""" Without rules, all the text should be in the default colour. """
+		highlighter = sm.highlighter.Highlighter()
+		self.assertEqual(highlighter.highlight('A\nB'),[('A\nB',BLACK)],msg='Expected one run.')
+		self.assertEqual(highlighter.highlight(''),[],msg='Expected no runs.')
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,143 @@
+#!/usr/bin/python3
+""" Test the SerialMonitor.commsInterface.LineFramer and readPortOutput without
+using actual hardware.
+
+.. module:: SerialMonitor
+   :platform: Unix, Windows
+   :synopsis: Trial automated testing of the message passing through a serial port.
+
+.. moduleauthor:: Alek, Artur
+
+"""
+import unittest, time
+import SerialMonitor as sm
+
+TEST_PORT = 'loop://' # Type of the test port. This one is a simple RX <-> TX
+	# type to be used for unit testing.
+	# https://pyserial.readthedocs.io/en/latest/url_handlers.html#loop
+
+class Tests(unittest.TestCase):
+
+	def setUp(self):
+		""" Prepare resources for testing. """
+		# Test port settings. Default and representative of what the SM does.
+		self.BaudRate = 9600
+		self.currentStopBits = sm.serial.STOPBITS_ONE
+		self.currentParity = sm.serial.PARITY_EVEN
+		self.currentByteSize = sm.serial.EIGHTBITS
+
+		# Create a port that we'll write test messages into and see if the sm
+		# responds correctly.
+		self.fixture = sm.serial.serial_for_url(url=TEST_PORT,
+												 baudrate=self.BaudRate,
+												 timeout=2,
+												 stopbits=self.currentStopBits,
+												 parity=self.currentParity,
+												 bytesize=self.currentByteSize
+											 	)
+
+	def tearDown(self):
+		""" Done testing, get rid of the test resources."""
+		del self.fixture
+
+	def testEmptyFramer(self):
+		""" New framer should hold nothing and return nothing for no bytes. """
+		framer = sm.commsInterface.LineFramer()
+		self.assertEqual(framer.pending,'',msg='Expected nothing pending.')
+		output, decodeErrors = framer.feed(b'')
+		self.assertEqual(output,'',msg='Expected empty output.')
+		self.assertEqual(len(decodeErrors),0,msg='Expected no errors.')
+		self.assertEqual(framer.pending,'',msg='Expected nothing pending.')
+
+	def testLineInChunks(self):
+		""" A line sent in many chunks should only be returned once complete. """
+		framer = sm.commsInterface.LineFramer()
+		for chunk in [b'Hel', b'lo', b'Wor', b'ld']:
+			self.assertEqual(framer.feed(chunk)[0],'',msg='Expected empty output for an incomplete line.')
+		self.assertEqual(framer.pending,'HelloWorld',msg='Expected HelloWorld pending.')
+		# Only the new bytes should have been searched for EOLs.
+		self.assertEqual(framer.scanned,len(b'HelloWorld'),msg='Expected all bytes to be scanned.')
+		self.assertEqual(framer.feed(b'!\nNext')[0],'HelloWorld!\n',msg='Expected HelloWorld!\\n in output.')
+		self.assertEqual(framer.pending,'Next',msg='Expected Next pending.')
+
+	def testManyLinesInOneChunk(self):
+		""" All complete lines should be returned in one go. """
+		framer = sm.commsInterface.LineFramer('DummyBuff')
+		self.assertEqual(framer.feed(b'1\n2\n\n3')[0],'DummyBuff1\n2\n\n',
+			msg='Expected DummyBuff1\\n2\\n\\n in output.')
+		self.assertEqual(framer.pending,'3',msg='Expected 3 pending.')
+
+	def testInitialBufferWithEOL(self):
+		""" Complete lines in the initial buffer should be returned on the first feed. """
+		framer = sm.commsInterface.LineFramer('Dummy\nBuff')
+		self.assertEqual(framer.pending,'Dummy\nBuff',msg='Expected unchanged initial buffer.')
+		self.assertEqual(framer.feed(b'X')[0],'Dummy\n',msg='Expected Dummy\\n in output.')
+		self.assertEqual(framer.pending,'BuffX',msg='Expected BuffX pending.')
+
+	def testLeadingEOL(self):
+		""" A lone EOL at the start of the buffer is held until another line is
+		completed, same as grabPortOutput does. """
+		framer = sm.commsInterface.LineFramer()
+		self.assertEqual(framer.feed(b'\n')[0],'',msg='Expected empty output.')
+		self.assertEqual(framer.feed(b'abc\n')[0],'\nabc\n',msg='Expected \\nabc\\n in output.')
+		self.assertEqual(framer.pending,'',msg='Expected nothing pending.')
+
+	def testInvalidBytes(self):
+		""" Invalid ASCII bytes should be discarded and reported. """
+		framer = sm.commsInterface.LineFramer()
+		framer.feed(b'AB')
+		output, decodeErrors = framer.feed(b'\x80A\n\xffB')
+		self.assertEqual(output,'ABA\n',msg='Expected ABA\\n in output.')
+		self.assertEqual(framer.pending,'B',msg='Expected B pending.')
+		# Offsets should be counted from the first byte fed to the framer.
+		self.assertEqual(decodeErrors.counts,{'UnicodeDecodeError':2},msg='Expected two errors.')
+		self.assertEqual(decodeErrors.offsets,[2,5],msg='Expected errors at offsets 2 and 5.')
+		self.assertEqual(decodeErrors.samples,b'\x80\xff',msg='Expected 0x80 and 0xff samples.')
+		self.assertEqual(decodeErrors.bytesChecked,5,msg='Expected five bytes checked.')
+
+	def testClear(self):
+		""" Clearing should discard the incomplete line. """
+		framer = sm.commsInterface.LineFramer('DummyBuff')
+		framer.clear()
+		self.assertEqual(framer.pending,'',msg='Expected nothing pending.')
+		self.assertEqual(framer.feed(b'A\n')[0],'A\n',msg='Expected A\\n in output.')
+
+	def testReadPortOutput(self):
+		""" Read a message from the port in two parts with the same framer. """
+		framer = sm.commsInterface.LineFramer()
+		self.fixture.write(b'Hello')
+		time.sleep(0.1) # In case there's a delay (to be expected on Windows).
+		self.assertEqual(sm.commsInterface.readPortOutput(self.fixture,framer,'formatted')[0],
+			'',msg='Expected empty output for an incomplete line.')
+		self.fixture.write(b'World\n')
+		time.sleep(0.1) # In case there's a delay (to be expected on Windows).
+		self.assertEqual(sm.commsInterface.readPortOutput(self.fixture,framer,'formatted')[0],
+			'HelloWorld\n',msg='Expected HelloWorld\\n in output.')
+		# Empty port should give empty output.
+		self.assertEqual(sm.commsInterface.readPortOutput(self.fixture,framer,'formatted')[0],
+			'',msg='Expected empty output for an empty port.')
+		# The port should be empty now.
+		self.assertEqual(self.fixture.read(1),b'',msg='Expected empty buffer after the test.')
+
+	def testReadPortOutputStore(self):
+		""" The raw bytes should be kept in the store, whatever the format. """
+		framer = sm.commsInterface.LineFramer()
+		store = sm.byteStore.ByteStore()
+		self.fixture.write(b'Hello\x00\n')
+		time.sleep(0.1) # In case there's a delay (to be expected on Windows).
+		self.assertEqual(sm.commsInterface.readPortOutput(self.fixture,framer,'hex',store=store)[0],
+			'0x48:0x65:0x6c:0x6c:0x6f:0x00:0x0a',msg='Expected hex codes in output.')
+		self.assertEqual(store.getBytes(0,store.endOffset),b'Hello\x00\n',msg='Expected the raw bytes stored.')
+
+	def testReadPortOutputRaiseErrors(self):
+		""" Should raise VE for invalid outputFormat and TE for wrong argument types. """
+		framer = sm.commsInterface.LineFramer()
+		self.assertRaises(ValueError,sm.commsInterface.readPortOutput,
+			self.fixture,framer,"invalidFormat")
+		self.assertRaises(TypeError,sm.commsInterface.readPortOutput,
+			'not a port',framer,'formatted')
+		self.assertRaises(TypeError,sm.commsInterface.readPortOutput,
+			self.fixture,'DummyBuff','formatted')
+
+if __name__ == '__main__':
+	unittest.main()
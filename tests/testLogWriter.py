@@ -0,0 +1,119 @@
+#!/usr/bin/python3
+""" Test the SerialMonitor.logWriter without using the GUI.
+
+.. module:: SerialMonitor
+   :platform: Unix, Windows
+   :synopsis: Trial automated testing of writing the log in a background thread.
+
+.. moduleauthor:: Alek, Artur
+
+"""
+import unittest, logging, logging.handlers, queue, io, os, tempfile, threading, time
+import SerialMonitor as sm
+
+class Tests(unittest.TestCase):
+
+	def setUp(self):
+		""" Prepare resources for testing. """
+		self.stream = io.StringIO()
+		self.handler = sm.logWriter.DeferredFlushStreamHandler(self.stream)
+		self.handler.setFormatter(logging.Formatter('%(levelname)s %(message)s'))
+		self.queue = queue.SimpleQueue()
+		self.logger = logging.getLogger('testLogWriter')
+		self.logger.setLevel(logging.DEBUG)
+		self.logger.propagate = False
+		self.queueHandler = logging.handlers.QueueHandler(self.queue)
+		self.logger.addHandler(self.queueHandler)
+		self.listener = sm.logWriter.BatchingQueueListener(self.queue, self.handler, flushInterval=0.05)
+
+	def tearDown(self):
+		""" Clean up after testing. """
+		self.logger.removeHandler(self.queueHandler)
+
+	def testWrittenInBackground(self):
+		""" Records should be formatted in the listener's thread. """
+		threads = []
+		class Recorder(logging.Formatter):
+			def format(self, record):
+				threads.append(threading.current_thread())
+				return logging.Formatter.format(self, record)
+		self.handler.setFormatter(Recorder('%(message)s'))
+		self.listener.start()
+		self.logger.info('Hello')
+		self.listener.stop()
+		self.assertEqual(self.stream.getvalue(),'Hello\n',msg='Expected the record written.')
+		self.assertEqual(len(threads),1,msg='Expected one record formatted.')
+		self.assertIsNot(threads[0],threading.current_thread(),msg='Expected a background thread.')
+
+	def testDrainOnStop(self):
+		""" All the records should be written when stopping, and levels respected. """
+		self.handler.setLevel(logging.INFO)
+		for i in range(1000):
+			self.logger.debug('Debug {}'.format(i))
+			self.logger.info('Info {}'.format(i))
+		self.listener.start()
+		self.listener.stop()
+		lines = self.stream.getvalue().splitlines()
+		self.assertEqual(len(lines),1000,msg='Expected all the INFO records.')
+		self.assertEqual(lines[-1],'INFO Info 999',msg='Expected the records in order.')
+
+	def testIdle(self):
+		""" An idle listener should wait for records without using the CPU,
+		even when flushing as often as possible. """
+		self.listener.flushInterval = 0.
+		self.listener.start()
+		self.logger.info('Hello')
+		start = time.process_time()
+		time.sleep(0.2)
+		self.assertLess(time.process_time() - start,0.02,msg='Expected the listener to block.')
+		self.assertEqual(self.stream.getvalue(),'INFO Hello\n',msg='Expected the record written.')
+		self.listener.stop()
+
+	def testFileHandler(self):
+		""" A file handler can be added and removed while running. """
+		fd, path = tempfile.mkstemp()
+		os.close(fd)
+		try:
+			fileHandler = sm.logWriter.DeferredFlushFileHandler(path)
+			self.listener.start()
+			self.logger.info('Before')
+			time.sleep(0.2) # Wait for the record to be handled.
+			self.listener.addHandler(fileHandler)
+			self.logger.info('During')
+			time.sleep(0.2) # Wait for the flush.
+			with open(path) as logFile:
+				self.assertEqual(logFile.read(),'During\n',msg='Expected the record flushed to the file.')
+			self.listener.removeHandler(fileHandler)
+			self.logger.info('After')
+			self.listener.stop()
+			with open(path) as logFile:
+				self.assertEqual(logFile.read(),'During\n',msg='Expected nothing more in the file.')
+			self.assertEqual(self.stream.getvalue(),'INFO Before\nINFO During\nINFO After\n',
+				msg='Expected all the records in the stream.')
+		finally:
+			os.remove(path)
+
+	def testRemoveHandlerDrains(self):
+		""" A removed handler should get all the records logged before it was
+		removed, even those still in the queue. """
+		fd, path = tempfile.mkstemp()
+		os.close(fd)
+		try:
+			fileHandler = sm.logWriter.DeferredFlushFileHandler(path)
+			fileHandler.setFormatter(logging.Formatter('%(message)s'))
+			self.listener.addHandler(fileHandler)
+			self.listener.start()
+			for i in range(1000):
+				self.logger.info('Record {}'.format(i))
+			self.listener.removeHandler(fileHandler)
+			self.logger.info('After')
+			self.listener.stop()
+			with open(path) as logFile:
+				self.assertEqual(logFile.read().splitlines(),['Record {}'.format(i) for i in range(1000)],
+					msg='Expected all the records logged before the removal in the file.')
+			self.assertTrue(self.stream.getvalue().endswith('INFO After\n'),msg='Expected After in the stream.')
+		finally:
+			os.remove(path)
+
+if __name__ == '__main__':
+	unittest.main()
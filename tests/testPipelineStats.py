@@ -0,0 +1,56 @@
+#!/usr/bin/python3
+""" Test the SerialMonitor.pipelineStats without using the GUI.
+
+.. module:: SerialMonitor
+   :platform: Unix, Windows
+   :synopsis: Trial automated testing of the statistics of the received data.
+
+.. moduleauthor:: Alek, Artur
+
+"""
+import unittest, time
+import SerialMonitor as sm
+
+class Tests(unittest.TestCase):
+
+	def setUp(self):
+		""" Prepare resources for testing. """
+		self.stats = sm.pipelineStats.PipelineStats()
+
+	def testCounters(self):
+		""" Totals, rates and the largest backlog should be in the snapshot. """
+		self.stats.snapshot()
+		self.stats.addReceived(1000, 10)
+		self.stats.addSent(5)
+		self.stats.addBacklog(300)
+		self.stats.addBacklog(200)
+		self.stats.addDecodeErrors(10)
+		time.sleep(0.1)
+		snapshot = self.stats.snapshot()
+		self.assertEqual((snapshot['bytesIn'],snapshot['linesIn'],snapshot['bytesOut'],snapshot['linesOut']),
+			(1000,10,5,1),msg='Expected the totals.')
+		self.assertGreater(snapshot['bytesInPerS'],5000,msg='Expected about 10000 B/s.')
+		self.assertLess(snapshot['bytesInPerS'],10001,msg='Expected about 10000 B/s.')
+		self.assertEqual(snapshot['maxBacklog'],300,msg='Expected the largest backlog.')
+		self.assertAlmostEqual(snapshot['decodeErrorRate'],0.01,msg='Expected 1% of bytes invalid.')
+		self.assertEqual(self.stats.snapshot()['bytesInPerS'],0.,msg='Expected no new bytes since.')
+		self.assertIn('decode errors: 10 (1.000%)',sm.pipelineStats.describe(snapshot),msg='Expected the errors described.')
+
+	def testTicks(self):
+		""" Ticks longer than their budget should be counted as overruns. """
+		with self.stats.time('read'):
+			time.sleep(0.01)
+		self.stats.addTime('sanitise', 2000000)
+		self.stats.endTick(5000000)
+		self.stats.addTime('render', 1000000)
+		self.stats.endTick(5000000)
+		snapshot = self.stats.snapshot()
+		self.assertEqual((snapshot['ticks'],snapshot['overruns']),(2,1),msg='Expected the first tick to overrun.')
+		self.assertGreater(snapshot['maxTickMs'],12.,msg='Expected the first tick to take over 12 ms.')
+		self.assertGreater(snapshot['stageMs']['read'],10.,msg='Expected read to take over 10 ms.')
+		self.assertEqual(snapshot['stageMs']['sanitise'],2.,msg='Expected sanitise to take 2 ms.')
+		self.stats.reset()
+		self.assertEqual(self.stats.snapshot()['ticks'],0,msg='Expected no ticks after reset.')
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,58 @@
+#!/usr/bin/python3
+""" Test the SerialMonitor.pollScheduler without using the GUI.
+
+.. module:: SerialMonitor
+   :platform: Unix, Windows
+   :synopsis: Trial automated testing of choosing the delay between port reads.
+
+.. moduleauthor:: Alek, Artur
+
+"""
+import unittest
+import SerialMonitor as sm
+
+class Tests(unittest.TestCase):
+
+	def testFixed(self):
+		""" The fixed policy should always use the max delay. """
+		scheduler = sm.pollScheduler.PollScheduler(10, 500, policy='fixed')
+		self.assertEqual(scheduler.delay,500,msg='Expected to start with the max delay.')
+		self.assertEqual(scheduler.update(4000, now=0.),500,msg='Expected the max delay with data.')
+		self.assertEqual(scheduler.update(0, now=1.),500,msg='Expected the max delay without data.')
+
+	def testBackoff(self):
+		""" The delay should double while the line is idle, up to the max delay. """
+		scheduler = sm.pollScheduler.PollScheduler(10, 100)
+		self.assertEqual(scheduler.delay,10,msg='Expected to start with the min delay.')
+		delays = [scheduler.update(0, now=0.01*i) for i in range(5)]
+		self.assertEqual(delays,[20,40,80,100,100],msg='Expected exponential back-off.')
+
+	def testDataRate(self):
+		""" With data flowing, the delay should aim for targetBytes per read. """
+		scheduler = sm.pollScheduler.PollScheduler(1, 1000, baudRate=9600, targetBytes=100)
+		scheduler.update(0, now=0.)
+		# 50 bytes in 100 ms, so 100 bytes in 200 ms.
+		self.assertEqual(scheduler.update(50, now=0.1),200,msg='Expected to wait for 100 bytes.')
+		# A burst should bring the delay down to the min one.
+		self.assertEqual(scheduler.update(100000, now=0.3),1,msg='Expected the min delay.')
+
+	def testBaudRate(self):
+		""" The port buffer should never get more than half full at the baud rate. """
+		scheduler = sm.pollScheduler.PollScheduler(1, 1000, baudRate=9600,
+			bufferSize=96, targetBytes=1000)
+		scheduler.update(0, now=0.)
+		# 960 bytes/s, so 48 bytes take 50 ms.
+		self.assertEqual(scheduler.update(1, now=1.),50,msg='Expected to read before the buffer fills.')
+
+	def testBounds(self):
+		""" Wrong bounds and policies should be refused. """
+		self.assertRaises(ValueError,sm.pollScheduler.PollScheduler,0,100)
+		self.assertRaises(ValueError,sm.pollScheduler.PollScheduler,200,100)
+		self.assertRaises(ValueError,sm.pollScheduler.PollScheduler,10,100,'sometimes')
+		scheduler = sm.pollScheduler.PollScheduler(10, 100)
+		scheduler.update(0, now=0.)
+		scheduler.setBounds(5, 50)
+		self.assertEqual(scheduler.delay,5,msg='Expected to start again from the min delay.')
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,149 @@
+#!/usr/bin/python3
+""" Test the SerialMonitor.portManager without using actual hardware. Uses
+pseudo-terminal pairs, where available, and loop:// ports.
+
+.. module:: SerialMonitor
+   :platform: Unix, Windows
+   :synopsis: Trial automated testing of reading many serial ports at once.
+
+.. moduleauthor:: Alek, Artur
+
+"""
+import unittest, os, sys, time, threading
+import SerialMonitor as sm
+import SerialMonitor.portManager # Not used by the GUI, so not imported with it.
+
+TEST_PORT = 'loop://' # Type of the test port. This one is a simple RX <-> TX
+	# type to be used for unit testing.
+	# https://pyserial.readthedocs.io/en/latest/url_handlers.html#loop
+
+class Tests(unittest.TestCase):
+
+	def setUp(self):
+		""" Prepare resources for testing. """
+		self.manager = sm.portManager.PortManager(pollInterval=0.01)
+		self.outputs = [] # (name, output) tuples passed to the sink.
+		self.manager.subscribe(lambda name, timestamp, output, decodeErrors:
+			self.outputs.append((name, output)))
+
+	def tearDown(self):
+		""" Done testing, get rid of the test resources."""
+		self.manager.close()
+
+	def testLoopPorts(self):
+		""" Ports without file descriptors should be polled, each with its own
+		incomplete line. """
+		for name in ['A', 'B']:
+			self.manager.addPort(TEST_PORT, name=name, baudrate=9600)
+		self.manager.ports['A'].port.write(b'Hel')
+		self.manager.ports['B'].port.write(b'Second\n')
+		time.sleep(0.1)
+		self.manager.poll()
+		self.manager.ports['A'].port.write(b'lo\n')
+		time.sleep(0.1)
+		self.manager.poll()
+		self.assertEqual(sorted(self.outputs),[('A',''),('A','Hello\n'),('B','Second\n')],
+			msg='Expected one line from every port.')
+		self.assertEqual(self.manager.ports['A'].bytesReceived,6,msg='Expected 6 bytes from A.')
+		self.assertEqual(self.manager.ports['A'].chunksReceived,2,msg='Expected 2 chunks from A.')
+
+	def testPortSinksAndFormats(self):
+		""" Port sinks should only get their port's output, in its format. """
+		self.manager.addPort(TEST_PORT, name='A')
+		self.manager.addPort(TEST_PORT, name='B', outputFormat='hex')
+		portOutputs = []
+		self.manager.subscribe(lambda name, timestamp, output, decodeErrors:
+			portOutputs.append(output), name='B')
+		for name in ['A', 'B']:
+			self.manager.ports[name].port.write(b'\x80A\n')
+		time.sleep(0.1)
+		self.manager.poll()
+		self.assertEqual(portOutputs,['0x80:0x41:0x0a'],msg='Expected hex output of B.')
+		self.assertEqual(self.manager.ports['A'].decodeErrors,1,msg='Expected one error in A.')
+		self.assertEqual(self.manager.ports['B'].decodeErrors,0,msg='Expected no errors in B.')
+
+	def testRemovePort(self):
+		""" Removed ports shouldn't be read and their names should be free. """
+		port = self.manager.addPort(TEST_PORT, name='A').port
+		self.assertRaises(ValueError,self.manager.addPort,TEST_PORT,name='A')
+		self.manager.removePort('A', close=False)
+		port.write(b'Hello\n')
+		time.sleep(0.1)
+		self.manager.poll()
+		self.assertEqual(self.outputs,[],msg='Expected no output.')
+		self.assertTrue(port.is_open,msg='Expected the port to be left open.')
+		self.manager.addPort(port, name='A')
+		self.assertRaises(KeyError,self.manager.removePort,'B')
+
+	def testRaiseErrors(self):
+		""" Should raise VE for invalid outputFormat and TE for wrong port types. """
+		self.assertRaises(ValueError,sm.portManager.PortManager,'invalidFormat')
+		self.assertRaises(ValueError,self.manager.addPort,TEST_PORT,outputFormat='invalidFormat')
+		self.assertRaises(TypeError,self.manager.addPort,123)
+
+	def testPortError(self):
+		""" A failing port should be reported and not read any more. """
+		errors = []
+		self.manager.onError = lambda name, error: errors.append(name)
+		self.manager.addPort(TEST_PORT, name='A').port.close()
+		self.manager.poll()
+		self.manager.poll()
+		self.assertEqual(errors,['A'],msg='Expected one error from A.')
+		self.assertIsNotNone(self.manager.ports['A'].error,msg='Expected the error to be kept.')
+
+@unittest.skipIf(sys.platform.startswith('win'), 'Needs pseudo-terminals.')
+class PtyTests(unittest.TestCase):
+
+	def setUp(self):
+		""" Prepare resources for testing. """
+		self.manager = sm.portManager.PortManager(pollInterval=0.01)
+		self.received = threading.Event()
+		self.outputs = []
+		self.manager.subscribe(self.sink)
+		self.masters = []
+		for i in range(8):
+			# Write to the master end of the pair to "receive" bytes in the port.
+			master, slave = os.openpty()
+			self.masters.append(master)
+			self.manager.addPort(os.ttyname(slave), name=str(i), baudrate=9600)
+			os.close(slave)
+
+	def tearDown(self):
+		""" Done testing, get rid of the test resources."""
+		self.manager.close()
+		for master in self.masters:
+			os.close(master)
+
+	def sink(self, name, timestamp, output, decodeErrors):
+		""" Collect the output of all the ports. """
+		self.outputs.append((name, output))
+		self.received.set()
+
+	def testUsesSelector(self):
+		""" Ports with file descriptors shouldn't be polled. """
+		for managedPort in self.manager.ports.values():
+			self.assertIsNotNone(managedPort.fd,msg='Expected a file descriptor.')
+
+	def testManyPortsOneThread(self):
+		""" All ports should be read by the background thread. """
+		self.manager.start()
+		for i, master in enumerate(self.masters):
+			os.write(master, 'Port{}\n'.format(i).encode())
+		deadline = time.monotonic() + 2
+		while len(self.outputs) < len(self.masters) and time.monotonic() < deadline:
+			time.sleep(0.01)
+		self.manager.stop()
+		self.assertEqual(sorted(self.outputs),[(str(i), 'Port{}\n'.format(i))
+			for i in range(len(self.masters))],msg='Expected one line from every port.')
+
+	def testIdlePortsWait(self):
+		""" Poll should wait for data when all the ports are idle. """
+		start = time.monotonic()
+		self.assertEqual(self.manager.poll(0.2),0,msg='Expected nothing read.')
+		self.assertGreaterEqual(time.monotonic()-start,0.15,msg='Expected poll to wait.')
+		os.write(self.masters[3], b'Hello\n')
+		self.assertEqual(self.manager.poll(2),6,msg='Expected 6 bytes read.')
+		self.assertEqual(self.outputs,[('3','Hello\n')],msg='Expected Hello\\n from port 3.')
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,121 @@
+#!/usr/bin/python3
+""" Test the SerialMonitor.commsInterface.PortReader without using actual hardware.
+
+.. module:: SerialMonitor
+   :platform: Unix, Windows
+   :synopsis: Trial automated testing of reading a serial port in the background.
+
+.. moduleauthor:: Alek, Artur
+
+"""
+import unittest, time, threading
+import SerialMonitor as sm
+
+TEST_PORT = 'loop://' # Type of the test port. This one is a simple RX <-> TX
+	# type to be used for unit testing.
+	# https://pyserial.readthedocs.io/en/latest/url_handlers.html#loop
+
+class Tests(unittest.TestCase):
+
+	def setUp(self):
+		""" Prepare resources for testing. """
+		# Test port settings. Default and representative of what the SM does.
+		self.BaudRate = 9600
+		self.currentStopBits = sm.serial.STOPBITS_ONE
+		self.currentParity = sm.serial.PARITY_EVEN
+		self.currentByteSize = sm.serial.EIGHTBITS
+
+		# Create a port that we'll write test messages into and see if the sm
+		# responds correctly.
+		self.fixture = sm.serial.serial_for_url(url=TEST_PORT,
+												 baudrate=self.BaudRate,
+												 timeout=2,
+												 stopbits=self.currentStopBits,
+												 parity=self.currentParity,
+												 bytesize=self.currentByteSize
+											 	)
+
+		# Gets set whenever the reader says it has new data.
+		self.dataReady = threading.Event()
+		self.reader = sm.commsInterface.PortReader(self.fixture, onData=self.dataReady.set)
+
+	def tearDown(self):
+		""" Done testing, get rid of the test resources."""
+		self.reader.stop()
+		del self.fixture
+
+	def testNoData(self):
+		""" Reader shouldn't report anything for an empty port. """
+		self.reader.start()
+		self.assertFalse(self.dataReady.wait(0.5),msg='Expected no notification.')
+		self.assertEqual(self.reader.getChunks(),[],msg='Expected no chunks.')
+
+	def testReadMessage(self):
+		""" Reader should pass on a message with the time it was read at. """
+		self.reader.start()
+		start = time.monotonic_ns()
+		self.fixture.write(b'HelloWorld\n')
+		self.assertTrue(self.dataReady.wait(2),msg='Expected a notification.')
+		time.sleep(0.1) # Let the reader get the rest of the message, if it's split.
+		chunks = self.reader.getChunks()
+		self.assertEqual(b''.join(dataStr for timestamp, dataStr in chunks),b'HelloWorld\n',
+			msg='Expected HelloWorld\\n.')
+		for timestamp, dataStr in chunks:
+			self.assertGreaterEqual(timestamp,start,msg='Expected chunk read after it was sent.')
+		self.assertIsNone(self.reader.error,msg='Expected no error.')
+
+	def testNotifiedOncePerGetChunks(self):
+		""" Reader should only notify again after the chunks have been taken. """
+		notifications = []
+		self.reader.onData = lambda: notifications.append(1)
+		self.reader.start()
+		for i in range(3):
+			self.fixture.write(b'A')
+			time.sleep(0.2)
+		self.assertEqual(len(notifications),1,msg='Expected one notification.')
+		self.assertEqual(len(self.reader.getChunks()),3,msg='Expected three chunks.')
+		self.fixture.write(b'B')
+		time.sleep(0.2)
+		self.assertEqual(len(notifications),2,msg='Expected another notification.')
+
+	def testBacklog(self):
+		""" Bytes read but not taken, and those left in the port, should be
+		counted as the backlog. """
+		self.reader = sm.commsInterface.PortReader(self.fixture, maxChunks=1)
+		self.reader.start()
+		for dataStr in [b'A', b'BB', b'CCC']:
+			self.fixture.write(dataStr)
+			time.sleep(0.2)
+		# A is queued, BB waits for room in the queue and CCC in the port.
+		self.assertEqual(self.reader.backlog(),6,msg='Expected all the bytes waiting.')
+		received = b''
+		for i in range(10): # Every getChunks lets one more chunk into the queue.
+			received += b''.join(dataStr for timestamp, dataStr in self.reader.getChunks())
+			time.sleep(0.1)
+		self.assertEqual(received,b'ABBCCC',msg='Expected all the bytes taken.')
+		self.assertEqual(self.reader.backlog(),0,msg='Expected nothing waiting once taken.')
+
+	def testStop(self):
+		""" Reader should stop quickly and keep the chunks it has read. """
+		self.reader.start()
+		self.fixture.write(b'Hello')
+		self.assertTrue(self.dataReady.wait(2),msg='Expected a notification.')
+		time.sleep(0.1) # Let the reader get the rest of the message, if it's split.
+		self.reader.stop()
+		self.assertFalse(self.reader.is_alive(),msg='Expected the reader to stop.')
+		self.assertEqual(b''.join(dataStr for timestamp, dataStr in self.reader.getChunks()),
+			b'Hello',msg='Expected Hello.')
+
+	def testPortClosed(self):
+		""" Reader should report an error and stop when the port goes away. """
+		self.reader.start()
+		time.sleep(0.1)
+		self.fixture.close()
+		self.assertTrue(self.dataReady.wait(2),msg='Expected a notification.')
+		self.reader.join(2)
+		self.assertFalse(self.reader.is_alive(),msg='Expected the reader to stop.')
+		self.assertIsInstance(self.reader.error,sm.serial.SerialException,
+			msg='Expected a SerialException.')
+
+if __name__ == '__main__':
+	unittest.main()
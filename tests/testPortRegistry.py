@@ -0,0 +1,114 @@
+#!/usr/bin/python3
+""" Test the SerialMonitor.portRegistry on a fake sysfs tree, without using
+actual hardware.
+
+.. module:: SerialMonitor
+   :platform: Unix, Windows
+   :synopsis: Trial automated testing of finding serial ports from the sysfs.
+
+.. moduleauthor:: Alek, Artur
+
+"""
+import unittest, os, shutil, sys, tempfile
+import SerialMonitor as sm
+
+@unittest.skipIf(sys.platform.startswith('win'), 'Needs symbolic links.')
+class Tests(unittest.TestCase):
+
+	def setUp(self):
+		""" Prepare resources for testing. """
+		# Lay out the directories the way Linux does.
+		self.root = tempfile.mkdtemp()
+		self.sysfsRoot = os.path.join(self.root, 'class', 'tty')
+		os.makedirs(self.sysfsRoot)
+		for subsystem in ['usb', 'usb-serial', 'platform', 'pnp']:
+			os.makedirs(os.path.join(self.root, 'bus', subsystem))
+
+		# Virtual console - no device.
+		self.addTty('tty0', None)
+		# Legacy UART placeholder.
+		self.addTty('ttyS1', os.path.join('devices', 'platform', 'serial8250'), 'platform')
+		# Real UART.
+		self.addTty('ttyS0', os.path.join('devices', 'pnp0', '00:05'), 'pnp', 'serial')
+		# FTDI adapter, usb-serial device under the USB interface.
+		self.addUsbDevice('1-1.2', 0x0403, 0x6001, 'A50285BI', 'FTDI', 'FT232R USB UART')
+		self.addTty('ttyUSB0', os.path.join('devices', 'usb1', '1-1.2', '1-1.2:1.0', 'ttyUSB0'),
+			'usb-serial', 'ftdi_sio')
+		# CDC ACM adapter, the USB interface itself.
+		self.addUsbDevice('1-1.3', 0x2341, 0x0043, '75735', 'Arduino', 'Uno')
+		self.addTty('ttyACM0', os.path.join('devices', 'usb1', '1-1.3', '1-1.3:1.0'),
+			'usb', 'cdc_acm')
+
+	def tearDown(self):
+		""" Done testing, get rid of the test resources."""
+		shutil.rmtree(self.root)
+
+	def addUsbDevice(self, name, vid, pid, serialNumber, manufacturer, product):
+		""" Create a USB device directory with its attributes. """
+		path = os.path.join(self.root, 'devices', 'usb1', name)
+		os.makedirs(path)
+		for attribute, value in [('idVendor', '{:04x}'.format(vid)), ('idProduct', '{:04x}'.format(pid)),
+				('serial', serialNumber), ('manufacturer', manufacturer), ('product', product)]:
+			with open(os.path.join(path, attribute), 'w') as f:
+				f.write(value + '\n')
+
+	def addTty(self, name, device, subsystem=None, driver=None):
+		""" Create a tty entry, with a device directory if given. """
+		ttyPath = os.path.join(self.root, 'devices', 'virtual', 'tty', name)
+		if device is not None:
+			devicePath = os.path.join(self.root, device)
+			os.makedirs(devicePath, exist_ok=True)
+			os.symlink(os.path.join(self.root, 'bus', subsystem), os.path.join(devicePath, 'subsystem'))
+			if driver is not None:
+				driverPath = os.path.join(self.root, 'bus', subsystem, 'drivers', driver)
+				os.makedirs(driverPath, exist_ok=True)
+				os.symlink(driverPath, os.path.join(devicePath, 'driver'))
+			ttyPath = os.path.join(devicePath, 'tty', name)
+		os.makedirs(ttyPath)
+		if device is not None:
+			os.symlink(devicePath, os.path.join(ttyPath, 'device'))
+		os.symlink(ttyPath, os.path.join(self.sysfsRoot, name))
+
+	def testEnumerate(self):
+		""" Only the hardware ports should be found, with the USB details. """
+		ports = sm.portRegistry.enumerateSysfsPorts(self.sysfsRoot, '/dev')
+		self.assertEqual([info.device for info in ports],['/dev/ttyACM0','/dev/ttyS0','/dev/ttyUSB0'],
+			msg='Expected the hardware ports only.')
+		self.assertEqual(ports[0],sm.portRegistry.PortInfo('/dev/ttyACM0', driver='cdc_acm',
+			vid=0x2341, pid=0x0043, serialNumber='75735', manufacturer='Arduino', product='Uno',
+			usbPath='1-1.3:1.0'),msg='Expected the ACM adapter details.')
+		self.assertEqual(ports[1],sm.portRegistry.PortInfo('/dev/ttyS0', driver='serial'),
+			msg='Expected the UART without USB details.')
+		self.assertEqual(ports[2].serialNumber,'A50285BI',msg='Expected the FTDI serial number.')
+		self.assertEqual(ports[2].usbPath,'1-1.2:1.0',msg='Expected the FTDI USB path.')
+		self.assertEqual(ports[2].describe(),
+			'/dev/ttyUSB0 (FTDI, FT232R USB UART, SN A50285BI, 0403:6001)',msg='Expected a description.')
+
+	def testRegistry(self):
+		""" Registry should cache the ports and report changes. """
+		changes = []
+		registry = sm.portRegistry.PortRegistry(sm.portRegistry.enumerateSysfsPorts,
+			onChange=lambda: changes.append(1), sysfsRoot=self.sysfsRoot)
+		self.assertEqual(registry.ports,[],msg='Expected no ports before a refresh.')
+		self.assertTrue(registry.refresh(),msg='Expected the first refresh to find ports.')
+		self.assertFalse(registry.refresh(),msg='Expected nothing to change.')
+		self.assertEqual(len(changes),1,msg='Expected one change.')
+		self.assertEqual([info.device for info in registry.find(serialNumber='A50285BI')],
+			['/dev/ttyUSB0'],msg='Expected to find the FTDI by serial number.')
+		self.assertEqual(registry.get('/dev/ttyS0').driver,'serial',msg='Expected the UART driver.')
+		self.assertIsNone(registry.get('/dev/ttyS1'),msg='Expected no placeholder UART.')
+
+		# Unplug the FTDI.
+		os.remove(os.path.join(self.sysfsRoot, 'ttyUSB0'))
+		self.assertTrue(registry.refresh(),msg='Expected the ports to change.')
+		self.assertEqual(registry.find(serialNumber='A50285BI'),[],msg='Expected the FTDI to be gone.')
+
+	def testOtherEnumerator(self):
+		""" Any enumerator should be usable in the registry. """
+		registry = sm.portRegistry.PortRegistry(lambda: [sm.portRegistry.PortInfo('COM3')])
+		registry.refresh()
+		self.assertEqual(registry.ports,[sm.portRegistry.PortInfo('COM3')],msg='Expected COM3.')
+		self.assertEqual(registry.ports[0].describe(),'COM3',msg='Expected just the name.')
+
+if __name__ == '__main__':
+	unittest.main()
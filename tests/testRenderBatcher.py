@@ -0,0 +1,75 @@
+#!/usr/bin/python3
+""" Test the SerialMonitor.renderBatcher without using the GUI.
+
+.. module:: SerialMonitor
+   :platform: Unix, Windows
+   :synopsis: Trial automated testing of batching the text shown in the GUI.
+
+.. moduleauthor:: Alek, Artur
+
+"""
+import unittest, time
+import SerialMonitor as sm
+
+class Tests(unittest.TestCase):
+
+	def setUp(self):
+		""" Prepare resources for testing. """
+		self.batches = [] # Lists of runs passed to render.
+		self.scheduled = [] # (delay, callback) tuples passed to schedule.
+		self.batcher = sm.renderBatcher.RenderBatcher(self.batches.append,
+			lambda delay, callback: self.scheduled.append((delay, callback)), maxRate=10.)
+
+	def testBatch(self):
+		""" All the text added before the flush should be rendered in one batch,
+		with runs of the same colour merged. """
+		for text, colour in [('A\n',(0,0,0)), ('B\n',(0,0,0)), ('C\n',(255,0,0)),
+				('D\n',(255,0,0)), ('E\n',(0,0,0)), ('',(0,0,255))]:
+			self.batcher.add(text, colour)
+		self.assertEqual(len(self.scheduled),1,msg='Expected one flush to be scheduled.')
+		self.assertEqual(self.scheduled[0][0],0.,msg='Expected the first batch straight away.')
+		self.assertEqual(self.batcher.pendingChars,10,msg='Expected 10 characters pending.')
+		self.assertEqual(self.batches,[],msg='Expected nothing rendered before the flush.')
+
+		self.scheduled[0][1]()
+		self.assertEqual(self.batches,[[('A\nB\n',(0,0,0)), ('C\nD\n',(255,0,0)), ('E\n',(0,0,0))]],
+			msg='Expected one batch of three runs.')
+		self.assertEqual(self.batcher.pendingChars,0,msg='Expected nothing pending.')
+
+	def testRateLimit(self):
+		""" The next batch should wait for the rest of the frame. """
+		self.batcher.add('A')
+		self.scheduled.pop()[1]()
+		self.batcher.add('B')
+		delay, flush = self.scheduled.pop()
+		self.assertGreater(delay,0.05,msg='Expected to wait for the next frame.')
+		self.assertLessEqual(delay,0.1,msg='Expected to wait at most one frame.')
+		time.sleep(0.1)
+		self.batcher.add('C')
+		self.assertEqual(self.scheduled,[],msg='Expected no more flushes scheduled.')
+		flush()
+		self.assertEqual(self.batches,[[('A',(0,0,0))], [('BC',(0,0,0))]],msg='Expected two batches.')
+
+	def testSizeLimit(self):
+		""" A large batch should be rendered without waiting for the flush. """
+		self.batcher.maxPendingChars = 5
+		self.batcher.add('AB')
+		self.batcher.add('CD')
+		self.assertEqual(self.batches,[],msg='Expected nothing rendered before the limit.')
+		self.batcher.add('EF')
+		self.assertEqual(self.batches,[[('ABCDEF',(0,0,0))]],msg='Expected the batch rendered at the limit.')
+		self.assertEqual(self.batcher.pendingChars,0,msg='Expected nothing pending.')
+		self.scheduled.pop()[1]()
+		self.assertEqual(len(self.batches),1,msg='Expected the scheduled flush to do nothing.')
+
+	def testClear(self):
+		""" Cleared text should never be rendered. """
+		self.batcher.add('A')
+		self.batcher.clear()
+		self.scheduled.pop()[1]()
+		self.assertEqual(self.batches,[],msg='Expected nothing rendered.')
+		self.batcher.add('B')
+		self.assertEqual(len(self.scheduled),1,msg='Expected another flush to be scheduled.')
+
+if __name__ == '__main__':
+	unittest.main()
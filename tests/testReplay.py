@@ -0,0 +1,115 @@
+#!/usr/bin/python3
+""" Test the SerialMonitor.replay without using actual hardware.
+
+.. module:: SerialMonitor
+   :platform: Unix, Windows
+   :synopsis: Trial automated testing of replaying capture files into ports.
+
+.. moduleauthor:: Alek, Artur
+
+"""
+import unittest, os, shutil, sys, tempfile, threading, time
+import SerialMonitor as sm
+
+TEST_PORT = 'loop://' # Type of the test port. This one is a simple RX <-> TX
+	# type to be used for unit testing.
+	# https://pyserial.readthedocs.io/en/latest/url_handlers.html#loop
+
+class Tests(unittest.TestCase):
+
+	def setUp(self):
+		""" Prepare resources for testing. """
+		self.directory = tempfile.mkdtemp()
+		self.path = os.path.join(self.directory, 'test.smcap')
+		# 10 lines from 2 ports, 50 ms apart, with a sent one in between.
+		writer = sm.captureFile.CaptureWriter(self.path)
+		self.portIds = [writer.addPort('A'), writer.addPort('B')]
+		start = time.monotonic_ns()
+		for i in range(10):
+			writer.write('Line {}\n'.format(i).encode('ascii'), sm.captureFile.RECEIVED,
+				self.portIds[i % 2], start + i*50000000)
+			writer.write(b'Sent\n', sm.captureFile.SENT, self.portIds[0], start + i*50000000)
+		writer.close()
+		self.reader = sm.captureFile.CaptureReader(self.path)
+		self.fixture = sm.serial.serial_for_url(url=TEST_PORT, baudrate=115200, timeout=2)
+		self.finished = threading.Event()
+
+	def tearDown(self):
+		""" Clean up after testing. """
+		self.reader.close()
+		self.fixture.close()
+		shutil.rmtree(self.directory)
+
+	def replay(self, **kwargs):
+		""" Replay into the fixture and time how long it takes. """
+		replayer = sm.replay.CaptureReplayer(self.reader, self.fixture, onFinished=self.finished.set,
+			**kwargs)
+		start = time.monotonic()
+		replayer.start()
+		self.assertTrue(self.finished.wait(5),msg='Expected the replay to finish.')
+		return replayer, time.monotonic() - start
+
+	def testOriginalTiming(self):
+		""" Chunks should be written at the times they were received at. """
+		replayer, duration = self.replay()
+		self.assertGreaterEqual(duration,0.45,msg='Expected the 450 ms of the capture.')
+		self.assertLess(duration,1.,msg='Expected the replay not to take much longer.')
+		self.assertEqual(replayer.chunksReplayed,10,msg='Expected only the received chunks.')
+		self.assertIsNone(replayer.error,msg='Expected no error.')
+		self.assertEqual(self.fixture.read(self.fixture.in_waiting),
+			b''.join('Line {}\n'.format(i).encode('ascii') for i in range(10)),msg='Expected all the lines.')
+
+	def testSpeed(self):
+		""" Replays should be sped up, or as fast as possible. """
+		replayer, duration = self.replay(speed=5.)
+		self.assertGreaterEqual(duration,0.09,msg='Expected 450 ms replayed in 90 ms.')
+		self.assertLess(duration,0.4,msg='Expected 450 ms replayed faster than recorded.')
+		self.fixture.reset_input_buffer()
+		self.finished.clear()
+		replayer, duration = self.replay(speed=None)
+		self.assertLess(duration,0.09,msg='Expected no waiting.')
+		self.assertEqual(replayer.bytesReplayed,70,msg='Expected all the received bytes.')
+		self.assertRaises(ValueError,sm.replay.CaptureReplayer,self.reader,self.fixture,0)
+
+	def testPortAndStart(self):
+		""" Only the chosen port should be replayed, from the chosen time on. """
+		replayer, duration = self.replay(speed=None, portId=self.portIds[1],
+			startTime=self.reader.indexTimes[0] + 200000000)
+		self.assertEqual(self.fixture.read(self.fixture.in_waiting),b'Line 5\nLine 7\nLine 9\n',
+			msg='Expected the odd lines from 200 ms on.')
+
+	def testStop(self):
+		""" A replay should stop when asked to. """
+		replayer = sm.replay.CaptureReplayer(self.reader, self.fixture, speed=0.1,
+			onFinished=self.finished.set)
+		replayer.start()
+		time.sleep(0.1)
+		replayer.stop()
+		self.assertTrue(self.finished.is_set(),msg='Expected the replay finished.')
+		self.assertEqual(replayer.chunksReplayed,1,msg='Expected only the first chunk.')
+
+	@unittest.skipIf(sys.platform.startswith('win'), 'Needs pseudo-terminals.')
+	def testPty(self):
+		""" A port reader should read a replay from a pseudo-terminal. """
+		ptyPort = sm.replay.PtyPort()
+		port = sm.serial.Serial(ptyPort.name, baudrate=115200, timeout=2)
+		dataReady = threading.Event()
+		portReader = sm.commsInterface.PortReader(port, onData=dataReady.set)
+		portReader.start()
+		replayer = sm.replay.CaptureReplayer(self.reader, ptyPort, speed=None, onFinished=self.finished.set)
+		replayer.start()
+		self.assertTrue(self.finished.wait(5),msg='Expected the replay to finish.')
+		received = b''
+		deadline = time.monotonic() + 2
+		while len(received) < 70 and time.monotonic() < deadline:
+			dataReady.wait(0.1)
+			dataReady.clear()
+			received += b''.join(dataStr for timestamp, dataStr in portReader.getChunks())
+		portReader.stop()
+		port.close()
+		ptyPort.close()
+		self.assertEqual(received,b''.join('Line {}\n'.format(i).encode('ascii') for i in range(10)),
+			msg='Expected all the lines unchanged.')
+
+if __name__ == '__main__':
+	unittest.main()
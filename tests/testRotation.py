@@ -0,0 +1,124 @@
+#!/usr/bin/python3
+""" Test the SerialMonitor.rotation without using the GUI.
+
+.. module:: SerialMonitor
+   :platform: Unix, Windows
+   :synopsis: Trial automated testing of rotating the log and capture files.
+
+.. moduleauthor:: Alek, Artur
+
+"""
+import unittest, logging, lzma, os, shutil, tempfile, time
+import SerialMonitor as sm
+
+class Tests(unittest.TestCase):
+
+	def setUp(self):
+		""" Prepare resources for testing. """
+		self.directory = tempfile.mkdtemp()
+		self.compressor = sm.rotation.SegmentCompressor()
+		self.compressor.start()
+
+	def tearDown(self):
+		""" Clean up after testing. """
+		self.compressor.stop()
+		shutil.rmtree(self.directory)
+
+	def makeRotator(self, name, **kwargs):
+		return sm.rotation.Rotator(os.path.join(self.directory, name), compressor=self.compressor, **kwargs)
+
+	def testCaptureRotation(self):
+		""" Every segment should be a complete, compressed capture file. """
+		rotator = self.makeRotator('test.smcap', maxBytes=1000, compression='gzip')
+		writer = sm.rotation.RotatingCaptureWriter(rotator, mergeInterval=0)
+		portId = writer.addPort('/dev/ttyUSB0')
+		for i in range(50):
+			writer.write(bytes([i])*100, sm.captureFile.RECEIVED, portId, i)
+		writer.close()
+		self.compressor.stop()
+
+		segments = rotator.segments()
+		self.assertEqual(len(segments),2*6,msg='Expected 6 segments with their indices.')
+		self.assertTrue(all(path.endswith('.gz') for path in segments),msg='Expected compressed segments.')
+		received = b''
+		for path in segments:
+			if path.endswith(sm.captureFile.INDEX_SUFFIX + '.gz'):
+				continue
+			reader = sm.captureFile.CaptureReader(path)
+			self.assertEqual(reader.ports,{portId: '/dev/ttyUSB0'},msg='Expected the port in every segment.')
+			self.assertEqual(len(reader.indexTimes),1,msg='Expected the compressed index read.')
+			received += b''.join(record.data for record in reader.records()
+				if record.kind == sm.captureFile.RECEIVED)
+			reader.close()
+		self.assertEqual(received,b''.join(bytes([i])*100 for i in range(50)),msg='Expected all the bytes.')
+		with open(os.path.join(self.directory, 'plain.smcap.gz'), 'wb') as notCompressed:
+			notCompressed.write(b'Not compressed.')
+		self.assertRaises(ValueError,sm.captureFile.CaptureReader,notCompressed.name)
+
+	def testLogRotation(self):
+		""" The log should be split into segments by size. """
+		rotator = self.makeRotator('test.log', maxBytes=1000, compression='lzma')
+		handler = sm.rotation.RotatingLogFileHandler(rotator)
+		handler.setFormatter(logging.Formatter('%(message)s'))
+		for i in range(100):
+			handler.handle(logging.makeLogRecord({'msg': '{:019d}'.format(i)}))
+		handler.close()
+		self.compressor.stop()
+
+		segments = rotator.segments()
+		self.assertEqual(len(segments),2,msg='Expected 2 segments of 50 lines.')
+		lines = []
+		for path in segments:
+			self.assertTrue(path.endswith('.log.xz'),msg='Expected compressed segments.')
+			with lzma.open(path, 'rt') as segment:
+				lines += segment.read().splitlines()
+		self.assertEqual(lines,['{:019d}'.format(i) for i in range(100)],msg='Expected all the lines.')
+
+	def testRotationByAge(self):
+		""" A new segment should be started when the current one gets old. """
+		rotator = self.makeRotator('test.smcap', maxBytes=None, maxAge=0.05, compression=None)
+		writer = sm.rotation.RotatingCaptureWriter(rotator)
+		writer.write(b'a')
+		firstPath = writer.path
+		writer.write(b'b')
+		self.assertEqual(writer.path,firstPath,msg='Expected the same segment.')
+		time.sleep(0.1)
+		writer.write(b'c')
+		self.assertNotEqual(writer.path,firstPath,msg='Expected a new segment.')
+		writer.close()
+
+	def testRetention(self):
+		""" The oldest segments should be deleted to keep within the limits. """
+		rotator = self.makeRotator('test.log', keepBytes=2500)
+		paths = []
+		for i in range(5):
+			paths.append(os.path.join(self.directory, 'test.2024010{}-000000.log.gz'.format(i)))
+			with open(paths[-1], 'wb') as segment:
+				segment.write(b'x'*1000)
+		rotator.currentPaths = [paths[-1]]
+		rotator.applyRetention()
+		self.assertEqual(rotator.segments(),paths[3:],msg='Expected the 2 newest segments kept.')
+
+		rotator.keepBytes = None
+		rotator.keepAge = 3600.
+		os.utime(paths[3], (time.time() - 7200., time.time() - 7200.))
+		os.utime(paths[4], (time.time() - 7200., time.time() - 7200.))
+		rotator.applyRetention()
+		self.assertEqual(rotator.segments(),paths[4:],msg='Expected the current segment kept however old.')
+
+	def testSettings(self):
+		""" Settings should be read back as they were written. """
+		settings = sm.rotation.parseSettings('segmentMiB 1\nsegmentHours 0\ncompression none\n'
+			'keepMiB 10\nkeepDays 7\n')
+		self.assertEqual(settings,{'maxBytes': 2**20, 'maxAge': None, 'compression': None,
+			'keepBytes': 10*2**20, 'keepAge': 7*86400.},msg='Expected the settings in bytes and seconds.')
+		self.assertEqual(sm.rotation.parseSettings(sm.rotation.formatSettings(settings)),settings,
+			msg='Expected the same settings after formatting.')
+		self.assertEqual(sm.rotation.parseSettings(sm.rotation.formatSettings({})),
+			sm.rotation.DEFAULT_SETTINGS,msg='Expected the default settings.')
+		for text in ['segmentMiB', 'segmentMiB -1', 'compression zip', 'colour red']:
+			with self.assertRaises(ValueError,msg='Expected {!r} to be rejected.'.format(text)):
+				sm.rotation.parseSettings(text)
+
+if __name__ == '__main__':
+	unittest.main()
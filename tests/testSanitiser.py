@@ -0,0 +1,67 @@
+#!/usr/bin/python3
+""" Test the SerialMonitor.sanitiser without using actual hardware.
+
+.. module:: SerialMonitor
+   :platform: Unix, Windows
+   :synopsis: Trial automated testing of the clean-up of the received text.
+
+.. moduleauthor:: Alek, Artur
+
+"""
+import unittest, unicodedata
+import SerialMonitor as sm
+
+def referenceSanitise(text):
+	""" The expression the sanitiser replaced. """
+	return ''.join(ch if unicodedata.category(ch)[0]!='C' else chr(0xFFFD) for ch in text)
+
+class Tests(unittest.TestCase):
+
+	def testSameAsReference(self):
+		""" Default sanitiser should give the same results as the reference. """
+		sanitiser = sm.sanitiser.Sanitiser()
+		for text in ['', 'Hello World', 'Hello\tWorld\r\n', bytes(range(128)).decode('ascii'),
+				bytes(range(256)).decode('latin-1'), 'Zażółć\u200b\U0001f600\x07']:
+			self.assertEqual(sanitiser.sanitise(text),referenceSanitise(text),
+				msg='Expected the same result as the reference for {!r}.'.format(text))
+
+	def testKeep(self):
+		""" Chosen control characters should be left alone. """
+		sanitiser = sm.sanitiser.Sanitiser(keep='\t\r\n')
+		self.assertEqual(sanitiser.sanitise('A\tB\r\n\x00\x85'),'A\tB\r\n��',
+			msg='Expected tab, CR and LF kept.')
+		self.assertEqual(sanitiser.sanitise(' \t\x07'),' \t�',
+			msg='Expected tab kept in non-Latin-1 text too.')
+
+	def testKeepAll(self):
+		""" Keeping all the control characters below 256 should leave them all
+		alone, and only deal with the others. """
+		sanitiser = sm.sanitiser.Sanitiser(keep=''.join(sm.sanitiser._ASCII_CONTROL))
+		self.assertEqual(sanitiser.sanitise('A\x00\x7f\n'),'A\x00\x7f\n',msg='Expected ASCII kept.')
+		self.assertEqual(sanitiser.sanitise('\x85'),'\ufffd',msg='Expected Latin-1 replaced.')
+		sanitiser = sm.sanitiser.Sanitiser('escape', keep=''.join(sm.sanitiser._LATIN1_CONTROL))
+		self.assertEqual(sanitiser.sanitise('\x00\x85\xe9'),'\x00\x85\xe9',msg='Expected Latin-1 kept.')
+		self.assertEqual(sanitiser.sanitise('\x00\u200b'),'\x00\\u200b',msg='Expected others escaped.')
+
+	def testEscape(self):
+		""" Control characters should be escaped like in Python literals. """
+		sanitiser = sm.sanitiser.Sanitiser('escape', keep='\n')
+		self.assertEqual(sanitiser.sanitise('A\x00B\x7f\n'),'A\\x00B\\x7f\n',msg='Expected ASCII escapes.')
+		self.assertEqual(sanitiser.sanitise('\xe9\x9f'),'\xe9\\x9f',msg='Expected Latin-1 escapes.')
+		self.assertEqual(sanitiser.sanitise('ł\u200b\U000e0001'),'ł\\u200b\\U000e0001',
+			msg='Expected Unicode escapes.')
+
+	def testReplacement(self):
+		""" The replacement character should be configurable. """
+		sanitiser = sm.sanitiser.Sanitiser(replacement='?')
+		self.assertEqual(sanitiser.sanitise('A\x00B'),'A?B',msg='Expected A?B.')
+		sanitiser = sm.sanitiser.Sanitiser(replacement='\\1')
+		self.assertEqual(sanitiser.sanitise('A\x00B'),'A\\1B',msg='Expected A\\1B.')
+
+	def testRaiseErrors(self):
+		""" Should raise VE for invalid policies and characters to keep. """
+		self.assertRaises(ValueError,sm.sanitiser.Sanitiser,'invalidPolicy')
+		self.assertRaises(ValueError,sm.sanitiser.Sanitiser,keep='\tA')
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,114 @@
+#!/usr/bin/python3
+""" Test the SerialMonitor.scrollback without using the GUI.
+
+.. module:: SerialMonitor
+   :platform: Unix, Windows
+   :synopsis: Trial automated testing of storing the output shown in the GUI.
+
+.. moduleauthor:: Alek, Artur
+
+"""
+import unittest
+import SerialMonitor as sm
+
+RED = (255,0,0)
+BLACK = (0,0,0)
+
+class Tests(unittest.TestCase):
+
+	def testLines(self):
+		""" Text should be split into lines, with the last one left open. """
+		lines = sm.scrollback.Scrollback()
+		lines.append('Hello\nWor')
+		lines.append('ld\n\nNext')
+		self.assertEqual([lines.getText(i) for i in range(len(lines))],['Hello','World','','Next'],
+			msg='Expected four lines.')
+		self.assertEqual(lines[1],(('World',BLACK),),msg='Expected the run to be merged.')
+		self.assertEqual(lines[-1],(('Next',BLACK),),msg='Expected Next as the last line.')
+		self.assertRaises(IndexError,lambda: lines[4])
+
+	def testColours(self):
+		""" Runs of different colours on one line should be kept apart. """
+		lines = sm.scrollback.Scrollback()
+		lines.append('Data')
+		lines.append('\nOUT: cmd\n', RED)
+		lines.append('More', RED)
+		lines.append(' data\n')
+		self.assertEqual([lines[i] for i in range(len(lines))],
+			[(('Data',BLACK),), (('OUT: cmd',RED),), (('More',RED), (' data',BLACK))],
+			msg='Expected three lines with their colours.')
+
+	def testLineLimit(self):
+		""" Only the newest lines should be kept. """
+		lines = sm.scrollback.Scrollback(maxLines=3)
+		for i in range(10):
+			lines.append('{}\n'.format(i))
+		self.assertEqual(len(lines),3,msg='Expected three lines.')
+		self.assertEqual([lines.getText(i) for i in range(3)],['7','8','9'],msg='Expected the last three lines.')
+		self.assertEqual(lines.dropped,7,msg='Expected seven lines dropped.')
+		self.assertEqual(lines.chars,3,msg='Expected three characters.')
+
+	def testCharLimit(self):
+		""" Lines should be dropped to keep the characters within the limit, but
+		never the newest one. """
+		lines = sm.scrollback.Scrollback(maxChars=10)
+		lines.append('1234\n5678\nabc')
+		self.assertEqual([lines.getText(i) for i in range(len(lines))],['5678','abc'],
+			msg='Expected the oldest line dropped.')
+		lines.append('defghijklmnop')
+		self.assertEqual([lines.getText(i) for i in range(len(lines))],['klmnop'],
+			msg='Expected the long line wrapped and its start dropped.')
+
+	def testWrap(self):
+		""" A line should be wrapped when it reaches maxChars, and an EOL right
+		after the wrap shouldn't make an empty line. """
+		lines = sm.scrollback.Scrollback(maxChars=10)
+		for char in '0123456789':
+			lines.append(char)
+		lines.append('\nabc', RED)
+		self.assertEqual([lines.getText(i) for i in range(len(lines))],['abc'],
+			msg='Expected the wrapped line dropped, and no empty line after it.')
+		self.assertEqual(lines.dropped,1,msg='Expected one line dropped.')
+		self.assertFalse(lines.wrapped,msg='Expected the wrap consumed by the EOL.')
+		for i in range(1000):
+			lines.append('x')
+		self.assertLessEqual(lines.chars,10,msg='Expected a stream without EOLs trimmed.')
+		self.assertEqual(lines[-1],(('xxx',BLACK),),
+			msg='Expected the pieces of the open line joined into one run.')
+
+	def testOpenLinePieces(self):
+		""" The open line should be readable while it's being added to. """
+		lines = sm.scrollback.Scrollback()
+		lines.append('ab')
+		lines.append('c')
+		self.assertEqual(lines[-1],(('abc',BLACK),),msg='Expected the pieces joined.')
+		lines.append('d', RED)
+		lines.append('e', RED)
+		self.assertEqual(lines[0],(('abc',BLACK),('de',RED)),msg='Expected a run per colour.')
+		lines.append('\n')
+		self.assertFalse(lines.lineOpen,msg='Expected the line closed.')
+		self.assertEqual(lines[0],(('abc',BLACK),('de',RED)),msg='Expected the same runs once closed.')
+		self.assertEqual(lines.chars,5,msg='Expected five characters.')
+
+	def testSetLimits(self):
+		""" Changing the limits should keep the newest lines. """
+		lines = sm.scrollback.Scrollback(maxLines=5)
+		lines.append('1\n2\n3\n4\n5')
+		lines.setLimits(maxLines=2)
+		self.assertEqual([lines.getText(i) for i in range(len(lines))],['4','5'],msg='Expected 4 and 5.')
+		lines.append('6\n7\n')
+		self.assertEqual([lines.getText(i) for i in range(len(lines))],['56','7'],msg='Expected 56 and 7.')
+		self.assertRaises(ValueError,lines.setLimits,0)
+
+	def testClear(self):
+		""" Clearing should drop everything. """
+		lines = sm.scrollback.Scrollback(maxLines=2)
+		lines.append('1\n2\n3')
+		lines.clear()
+		self.assertEqual(len(lines),0,msg='Expected no lines.')
+		self.assertEqual(lines.dropped,0,msg='Expected nothing dropped.')
+		lines.append('A')
+		self.assertEqual(lines.getText(0),'A',msg='Expected A.')
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,62 @@
+#!/usr/bin/python3
+""" Test the SerialMonitor.searchIndex without using the GUI.
+
+.. module:: SerialMonitor
+   :platform: Unix, Windows
+   :synopsis: Trial automated testing of searching the output shown in the GUI.
+
+.. moduleauthor:: Alek, Artur
+
+"""
+import unittest, re
+import SerialMonitor as sm
+
+class Tests(unittest.TestCase):
+
+	def setUp(self):
+		""" Prepare resources for testing. """
+		self.lines = sm.scrollback.Scrollback(maxLines=100)
+		self.index = sm.searchIndex.SearchIndex(blockLines=4)
+
+	def testSubstring(self):
+		""" Substrings should be found in complete lines, across blocks. """
+		for i in range(10):
+			self.lines.append('Line {} OK\n'.format(i))
+		self.lines.append('ERROR in line 10\nLine 11 OK\nERR')
+		self.index.update(self.lines)
+		self.assertEqual(len(self.index.blocks),3,msg='Expected three full blocks.')
+		self.assertEqual(self.index.search('ERROR'),[(10,0,5)],msg='Expected one match in line 10.')
+		self.assertEqual(self.index.search('ok'),[],msg='Expected the case to matter.')
+		self.assertEqual(len(self.index.search('ok',matchCase=False)),11,msg='Expected 11 matches.')
+		self.assertEqual(self.index.search('ERR',lastLine='ERR'),[(10,0,3),(12,0,3)],
+			msg='Expected a match in the incomplete line, too.')
+		self.assertEqual(len(self.index.search('Line',maxMatches=3)),3,msg='Expected at most 3 matches.')
+
+	def testRegex(self):
+		""" Regular expressions should match within lines. """
+		self.lines.append('temp=12\nstatus\ntemp=345\n')
+		self.index.update(self.lines)
+		self.assertEqual(self.index.search(r'^temp=\d+$',regex=True),[(0,0,7),(2,0,8)],
+			msg='Expected two matches.')
+		self.assertEqual(self.index.search('=3',regex=True),[(2,4,2)],msg='Expected column 4.')
+		self.assertRaises(re.error,self.index.search,'(',regex=True)
+
+	def testIncremental(self):
+		""" Updates should only index new lines and forget dropped ones. """
+		self.lines.setLimits(maxLines=6)
+		self.lines.append('A\nB\nC\nD\nE\n')
+		self.index.update(self.lines)
+		self.lines.append('F\nG\nH\nI\nX')
+		self.index.update(self.lines)
+		self.assertEqual(self.index.endLine,9,msg='Expected nine complete lines indexed.')
+		self.assertEqual([block.firstLine for block in self.index.blocks],[4],
+			msg='Expected the first block forgotten.')
+		self.assertEqual(self.index.search('A'),[],msg='Expected A dropped.')
+		self.assertEqual(self.index.search('F'),[(5,0,1)],msg='Expected F in line 5.')
+		self.lines.clear()
+		self.lines.append('F\n')
+		self.index.update(self.lines)
+		self.assertEqual(self.index.search('F'),[(0,0,1)],msg='Expected F in line 0 after clear.')
+
+if __name__ == '__main__':
+	unittest.main()
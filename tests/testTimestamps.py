@@ -0,0 +1,45 @@
+#!/usr/bin/python3
+""" Test the SerialMonitor.timestamps without using the GUI.
+
+.. module:: SerialMonitor
+   :platform: Unix, Windows
+   :synopsis: Trial automated testing of showing the times data were received at.
+
+.. moduleauthor:: Alek, Artur
+
+"""
+import unittest, logging, time
+import SerialMonitor as sm
+
+class Tests(unittest.TestCase):
+
+	def testStampLines(self):
+		""" Every line should be stamped once, also if it arrives in parts. """
+		self.assertEqual(sm.timestamps.stampLines('A\nB\n','[1] '),'[1] A\n[1] B\n',
+			msg='Expected both lines stamped.')
+		self.assertEqual(sm.timestamps.stampLines('A\n\nB','[1] ',atLineStart=False),'A\n\n[1] B',
+			msg='Expected only the new line with text stamped.')
+
+	def testFormatTimestamp(self):
+		""" A monotonic time should be shown as the wall clock time. """
+		now = time.time()
+		text = sm.timestamps.formatTimestamp(time.monotonic_ns())
+		self.assertRegex(text,r'^\d\d:\d\d:\d\d\.\d\d\d$',msg='Expected HH:MM:SS.mmm.')
+		self.assertAlmostEqual(sm.timestamps.toWallClock(time.monotonic_ns()),now,delta=0.5,
+			msg='Expected the wall clock time.')
+
+	def testFormatter(self):
+		""" Records with a receive time should be logged with it. """
+		formatter = sm.timestamps.ReceiveTimeFormatter('%(asctime)s %(message)s', '%H:%M:%S')
+		received = time.monotonic_ns() - 3600*10**9
+		record = logging.LogRecord('SMLog', logging.INFO, __file__, 0, 'Hello', None, None)
+		record.received = received
+		self.assertEqual(formatter.format(record),
+			time.strftime('%H:%M:%S ',time.localtime(sm.timestamps.toWallClock(received)))+'Hello',
+			msg='Expected the receive time, an hour ago.')
+		record = logging.LogRecord('SMLog', logging.INFO, __file__, 0, 'Hello', None, None)
+		self.assertEqual(formatter.format(record),time.strftime('%H:%M:%S ',time.localtime(record.created))+'Hello',
+			msg='Expected the time of logging without a receive time.')
+
+if __name__ == '__main__':
+	unittest.main()